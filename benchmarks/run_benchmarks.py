@@ -0,0 +1,234 @@
+"""
+Headless benchmarks for the simulation engine.
+
+Times population/hospital creation, every phase of a tick and stats
+collection over a sweep of population and grid sizes, and writes the
+results as JSON. A second mode compares two result files and flags phases
+that got slower.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --agents 1000 10000 --grids 40 400 --backend agents numpy
+    python benchmarks/run_benchmarks.py --compare baseline.json bench.json --threshold 0.2
+
+Phase names:
+    create_agents, create_hospitals, movement, grid_update, grouping,
+    transmission, progression, hospitals, grid_cleanup, termination,
+    collect_stats
+
+Times are the median seconds per call over the timed ticks. The "agents"
+backend is skipped above --agent-limit agents (it is a Python loop per agent).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import models.grid as grid  # noqa: E402
+from models.parameters import AgentParameters  # noqa: E402
+from simulation import engine, vectorized  # noqa: E402
+from simulation.stats import StatsAccumulator  # noqa: E402
+from utils.config_loader import DEFAULT_CONFIG  # noqa: E402
+
+DEFAULT_AGENTS = [100, 1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_GRIDS = [40, 400, 4000]
+RESULTS_VERSION = 1
+
+
+class PhaseTimer:
+
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, phase, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.samples.setdefault(phase, []).append(time.perf_counter() - start)
+        return result
+
+    def medians(self):
+        return {phase: float(np.median(values)) for phase, values in self.samples.items()}
+
+
+def _num_sick(num_agents):
+    return max(5, num_agents // 100)
+
+
+def grid_cleanup(map_grid, dead_ids, hospitals):
+    # The end of a step() tick: the dead leave the grid and hospital markers are refreshed
+    map_grid.remove_agents(dead_ids)
+    map_grid.sync_hospitals(hospitals)
+
+
+def bench_agents(num_agents, size, ticks, seed, config):
+    """Agent-object engine (engine.step), one phase at a time."""
+    timer = PhaseTimer()
+    rng = np.random.default_rng(seed)
+    hospitals = timer.time("create_hospitals", engine.create_hospitals, config.hospital.count, size, num_agents,
+                           rng=rng, config=config)
+    agents = timer.time("create_agents", engine.create_agents, num_agents, size, NumSick=_num_sick(num_agents),
+                        rng=rng, config=config)
+
+    map_grid = grid.Grid(size, size)
+    map_grid.sync_hospitals(hospitals)
+    for ag in agents:
+        x, y = ag.location
+        map_grid.addAgent(x, y, ag.id)
+    params = AgentParameters.from_agents(agents, config)
+    stats = StatsAccumulator.from_agents(agents, hospitals, max_ticks=ticks)
+    counts = stats.compartments
+    # Same movement path as engine.step() under this config
+    move = engine.process_movement_bulk if config.simulation.bulk_movement else engine.process_movement
+
+    for _ in range(ticks):
+        moved = timer.time("movement", move, agents, hospitals, map_grid, size, rng, config, params)
+        timer.time("grid_update", engine.update_grid_occupancy, map_grid, *moved)
+        location_agents = timer.time("grouping", engine.group_agents_by_location, agents, map_grid)
+        timer.time("transmission", engine.process_disease_transmission, location_agents, rng, stats, counts,
+                   config, params)
+        died = timer.time("progression", engine.process_disease_progression, agents, rng, stats, counts,
+                          config, params)
+        timer.time("hospitals", engine.process_hospital_interactions, agents, hospitals, map_grid, rng, stats,
+                   counts, config, params)
+        timer.time("grid_cleanup", grid_cleanup, map_grid, [ag.id for ag in died], hospitals)
+        stats.end_tick()
+        timer.time("termination", engine.isTerminationConditionMet, agents, counts)
+
+    timer.time("collect_stats", engine.collect_stats, agents, hospitals)
+    return timer.medians()
+
+
+def bench_numpy(num_agents, size, ticks, seed, config):
+    """Array engine (vectorized.step_vectorized), one phase at a time."""
+    timer = PhaseTimer()
+    rng = np.random.default_rng(seed)
+    hospitals = timer.time("create_hospitals", engine.create_hospitals, config.hospital.count, size, num_agents,
+                           rng=rng, config=config)
+    pop = timer.time("create_agents", vectorized.create_population, num_agents, size,
+                     NumSick=_num_sick(num_agents), rng=rng, config=config)
+
+    map_grid = grid.Grid(size, size)
+    map_grid.sync_hospitals(hospitals)
+    living = np.arange(len(pop))
+    map_grid.move_agents(living, pop.x, pop.y)
+    stats = StatsAccumulator.from_population(pop, hospitals, max_ticks=ticks)
+    counts = stats.compartments
+
+    for _ in range(ticks):
+        field = map_grid.hospital_field(hospitals)
+        timer.time("movement", vectorized.move_population, pop, hospitals, size, rng, field, config)
+
+        def grid_update():
+            alive = pop.health != vectorized.DEAD
+            map_grid.remove_agents(np.flatnonzero(~alive))
+            ids = np.flatnonzero(alive)
+            map_grid.move_agents(ids, pop.x[ids], pop.y[ids])
+
+        timer.time("grid_update", grid_update)
+        newly = timer.time("transmission", vectorized.transmit, pop, size, rng, counts, config)
+        stats.on_infections(pop.age[newly])
+        _, _, died = timer.time("progression", vectorized.progress, pop, rng, counts, config)
+        timer.time("hospitals", vectorized.treat_and_vaccinate, pop, hospitals, rng, size, map_grid, stats, counts,
+                   config)
+        timer.time("grid_cleanup", grid_cleanup, map_grid, np.flatnonzero(died), hospitals)
+        stats.end_tick()
+        timer.time("termination", vectorized.is_termination_condition_met, pop, counts)
+
+    timer.time("collect_stats", vectorized.collect_stats_vectorized, pop, hospitals)
+    return timer.medians()
+
+
+BENCHMARKS = {"agents": bench_agents, "numpy": bench_numpy}
+
+
+def run_sweep(agent_sizes, grid_sizes, backends, ticks=5, seed=0, agent_limit=100_000, config=None):
+    config = config or DEFAULT_CONFIG
+    results = []
+    for backend in backends:
+        for num_agents in agent_sizes:
+            if backend == "agents" and num_agents > agent_limit:
+                print(f"skip {backend} agents={num_agents} (above --agent-limit)")
+                continue
+            for size in grid_sizes:
+                start = time.perf_counter()
+                timings = BENCHMARKS[backend](num_agents, size, ticks, seed, config)
+                elapsed = time.perf_counter() - start
+                tick = sum(v for k, v in timings.items()
+                           if k not in ("create_agents", "create_hospitals", "collect_stats"))
+                print(f"{backend:<7} agents={num_agents:<8} grid={size:<5} tick={tick * 1000:9.2f} ms  ({elapsed:.1f} s)")
+                results.append({"backend": backend, "agents": num_agents, "grid": size, "ticks": ticks,
+                                "tick_total": tick, "timings": timings})
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=0.2, min_seconds=1e-4):
+    """
+    Phases present in both files whose median time grew by more than
+    `threshold` (0.2 = 20%). Phases faster than min_seconds in the baseline
+    are ignored as timer noise. Returns a list of regression dicts.
+    """
+    def index(data):
+        return {(r["backend"], r["agents"], r["grid"]): r["timings"] for r in data["results"]}
+
+    old, new = index(baseline), index(current)
+    regressions = []
+    for key in sorted(set(old) & set(new)):
+        for phase, before in old[key].items():
+            after = new[key].get(phase)
+            if after is None or before < min_seconds:
+                continue
+            ratio = after / before
+            if ratio > 1 + threshold:
+                backend, agents, size = key
+                regressions.append({"backend": backend, "agents": agents, "grid": size, "phase": phase,
+                                    "baseline": before, "current": after, "ratio": ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, nargs="+", default=DEFAULT_AGENTS)
+    parser.add_argument("--grids", type=int, nargs="+", default=DEFAULT_GRIDS)
+    parser.add_argument("--backend", nargs="+", choices=sorted(BENCHMARKS), default=["numpy"])
+    parser.add_argument("--ticks", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--agent-limit", type=int, default=100_000)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"))
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['backend']} agents={r['agents']} grid={r['grid']} {r['phase']}: "
+                  f"{r['baseline'] * 1000:.3f} ms -> {r['current'] * 1000:.3f} ms (x{r['ratio']:.2f})")
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    data = run_sweep(args.agents, args.grids, args.backend, args.ticks, args.seed, args.agent_limit)
+    with open(args.output, "w") as f:
+        json.dump(data, f, indent=2)
+    print(f"Results saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,12 @@ from simulation.engine import create_hospitals
 from simulation.engine import create_agents
 from simulation.engine import step
 from simulation.engine import collect_stats
+from simulation.monte_carlo import iter_monte_carlo_runs
+from models.parameters import AgentParameters
+from simulation.events import EventLog
+from utils.config_loader import DEFAULT_CONFIG, load_config, config_to_dict
+from utils.results_store import ResultsStore, export_results
+from simulation.convergence import ConvergenceMonitor
 
 # Optional pygame visualization
 try:
@@ -23,22 +29,43 @@ except Exception:
     VIS_AVAILABLE = False
 
 
-def main():
+def load_default_config():
+    # config/simulation_config.yaml when it (and pyyaml) is available, else the built-in defaults
+    try:
+        return load_config()
+    except (ImportError, FileNotFoundError) as e:
+        print(f"Using built-in defaults, could not read config: {e}")
+        return DEFAULT_CONFIG
+
+
+def main(config=None, verbose=False, record_path=None, record_every=1, cell_size=4, events_path=None, seed=None):
     """
     Main function to run the pandemic simulation.
+    seed (default config.simulation.random_seed, fresh entropy if that is
+    unset) seeds the run's own generator; its entropy is printed so any run
+    can be repeated.
+    verbose=True prints every recovery, death, treatment and vaccination.
+    events_path writes every such event to a .csv (or .parquet, needs pyarrow) file.
+    record_path runs headless instead of opening a window and writes a frame
+    every `record_every` ticks: a directory gets a PNG sequence, a video
+    file (e.g. run.mp4) is encoded through ffmpeg when it is installed.
     """
+    config = config or load_default_config()
 
     # Init 
-    StateSpace = 40
-    NumOfHospitals = 4
-    NumAgents = 300
-    SickPeople = 5
+    StateSpace = config.grid.size
+    NumOfHospitals = config.hospital.count
+    NumAgents = config.population.num_agents
+    SickPeople = config.population.initial_infected
+    seed_seq = np.random.SeedSequence(config.simulation.random_seed if seed is None else seed)
+    print(f"Seed entropy: {seed_seq.entropy}")
+    rng = np.random.default_rng(seed_seq)
 
     # Create grid and hospitals
     map = grid.Grid(StateSpace, StateSpace)
 
-    hospitals = create_hospitals(NumOfHospitals, StateSpace, NumAgents)
-    agents = create_agents(NumAgents, StateSpace, NumSick=SickPeople)
+    hospitals = create_hospitals(NumOfHospitals, StateSpace, NumAgents, rng=rng, config=config)
+    agents = create_agents(NumAgents, StateSpace, NumSick=SickPeople, rng=rng, config=config)
     
     # Add hospitals and agents to grid
     for idx, hosp in enumerate(hospitals):
@@ -53,24 +80,37 @@ def main():
     print("Initial Grid State:")
     print(map)
 
+    # Per-agent age-band parameters, looked up once for the whole run
+    params = AgentParameters.from_agents(agents, config)
+    # The event log is only kept when something reads it; verbose alone prints without buffering rows
+    events = (EventLog(path=events_path, verbose=verbose, max_rows=0, agents=agents)
+              if events_path is not None or verbose else None)
+
     # --- Minimal step function for demo/visualization ---
     def step_fn():
-        return step(agents, hospitals, map, StateSpace)
+        return step(agents, hospitals, map, StateSpace, rng=rng, config=config, params=params, events=events)
 
     # Toggle to enable vis 
     ENABLE_VISUALIZATION = True
 
-    if ENABLE_VISUALIZATION and VIS_AVAILABLE:
+    if record_path is not None:
+        from visulation.headless import record
+
+        ticks = record(step_fn, map, agents, hospitals, record_path, steps=config.simulation.max_steps,
+                       every=record_every, cell_size=cell_size)
+        print(f"Recorded {ticks} ticks to {record_path}")
+    elif ENABLE_VISUALIZATION and VIS_AVAILABLE:
         # Run a simple visualization loop for a fixed number of steps.
-        # Close the window to stop early.
+        # Close the window to stop early; SPACE pauses, RIGHT steps, UP/DOWN change the speed.
         run_visualizer(
             grid=map,
             agents=agents,
             hospitals=hospitals,
-            steps=365,
+            steps=config.simulation.max_steps,
             cell_size=20,
             fps=8,
             step_fn=step_fn,
+            threaded=True,
         )
     else:
         # Fallback: run a handful of steps headlessly and print the grid
@@ -82,6 +122,11 @@ def main():
         print("Final Grid State (headless run):")
         print(map)
         
+    if events is not None:
+        events.close()
+        if events_path is not None:
+            print(f"Events written to {events_path}")
+
     # Collect and Print Stats
     stats = collect_stats(agents, hospitals)
     
@@ -128,117 +173,113 @@ def main():
         print(f"{bucket:<10} | {data['infected']:<10} | {data['deaths']:<10} | {m_rate:.2f}%")
     print("="*50 + "\n")
 
-    pass
-
-
 
-def run_monte_carlo_analysis(num_runs=50, output_dir="results"):
+def run_monte_carlo_analysis(num_runs=None, output_dir=None, workers=None, seed=None, config=None, resume=False,
+                             save_series=False, results_format=None, target_half_width=None, relative=False,
+                             confidence=0.95, min_runs=10):
     """
     Run Monte Carlo analysis with multiple replications.
+
+    Arguments left as None come from the config's simulation/output sections.
+    workers > 1 spreads the runs over a process pool.
+    Every run is seeded from its own child of SeedSequence(seed), so the
+    results are identical for any worker count.
+
+    Each run is written to a ResultsStore under <output_dir>/monte_carlo_runs
+    as soon as it finishes (Parquet, or CSV without pyarrow; results_format
+    picks explicitly), with its per-tick time series when save_series=True.
+    resume=True keeps the runs already stored, reusing the stored seed, and
+    only runs the missing IDs. The Excel/CSV file is exported from the store
+    at the end.
+
+    num_runs is an upper bound when target_half_width is set: the sweep stops
+    at the first run (in Run ID order) where every tracked metric's
+    `confidence` CI half-width is at most the target (a fraction of the mean
+    with relative=True), checked from min_runs runs on. See ConvergenceMonitor.
     """
+    config = config or load_default_config()
+    num_runs = config.simulation.monte_carlo_runs if num_runs is None else num_runs
+    output_dir = config.output.results_dir if output_dir is None else output_dir
+    workers = config.simulation.workers if workers is None else workers
+    seed = config.simulation.random_seed if seed is None else seed
     print(f"Starting Monte Carlo Analysis with {num_runs} runs...")
     
     if output_dir and not os.path.exists(output_dir):
         os.makedirs(output_dir)
-    
-    # Simulation Parameters
-    StateSpace = 40
-    NumOfHospitals = 4
-    NumAgents = 300
-    SickPeople = 5
-    MaxSteps = 365
-
-    # Storage for all run data
-    all_run_data = []
-
-    for run_id in range(num_runs):
-        # Initialize Simulation
-        map_grid = grid.Grid(StateSpace, StateSpace)
-        hospitals = create_hospitals(NumOfHospitals, StateSpace, NumAgents)
-        agents = create_agents(NumAgents, StateSpace, NumSick=SickPeople)
-        
-        # Initial grid population
-        for idx, hosp in enumerate(hospitals):
-            x, y = hosp.location
-            map_grid.addHospital(x, y, idx)
-        for ag in agents:
-            x, y = ag.location
-            map_grid.addAgent(x, y, ag.id)
-
-        # Run Simulation Loop
-        for _ in range(MaxSteps):
-            should_continue = step(agents, hospitals, map_grid, StateSpace)
-            if not should_continue:
-                break
-        
-        # Collect Stats
-        stats = collect_stats(agents, hospitals)
-        
-        # Flatten stats for DataFrame
-        row = {
-            "Run ID": run_id + 1,
-            "Total Population": stats["total_population"],
-            "Total Infected": stats["total_infected"],
-            "Total Deaths": stats["total_deaths"],
-            "Infection Rate (%)": (stats["total_infected"] / stats["total_population"] * 100) if stats["total_population"] else 0,
-            "Mortality Rate (%)": (stats["total_deaths"] / stats["total_infected"] * 100) if stats["total_infected"] else 0,
-            "Fully Vaccinated": stats["vaccination_status"][2],
-            "Partially Vaccinated": stats["vaccination_status"][1],
-            "Unvaccinated": stats["vaccination_status"][0],
-            "Vaccine Stockout (%)": (stats["hospital_stats"]["stockouts"] / stats["hospital_stats"]["requests"] * 100) if stats["hospital_stats"]["requests"] else 0,
-            "Total Immune": stats["immunity_breakdown"]["total"],
-            "Immune (Vaccine)": stats["immunity_breakdown"]["vaccine"],
-            "Immune (Natural)": stats["immunity_breakdown"]["natural"],
-            "Immune (Treatment)": stats["immunity_breakdown"]["treatment"],
-            "Deaths (Unvaccinated)": stats["deaths_by_vax"][0],
-            "Deaths (Partial)": stats["deaths_by_vax"][1],
-            "Deaths (Full)": stats["deaths_by_vax"][2],
-        }
-
-        # Add Age Stats
-        for bucket, data in stats["age_stats"].items():
-            row[f"Age {bucket} Total"] = data["total"]
-            row[f"Age {bucket} Infected"] = data["infected"]
-            row[f"Age {bucket} Deaths"] = data["deaths"]
-            row[f"Age {bucket} Mortality (%)"] = (data["deaths"] / data["infected"] * 100) if data["infected"] else 0
-            
-        all_run_data.append(row)
-        
-        if (run_id + 1) % 10 == 0:
-            print(f"Run {run_id + 1}/{num_runs} completed.")
 
-    # Create DataFrame
-    df = pd.DataFrame(all_run_data)
-    
-    # Save to Excel/CSV
-    if output_dir:
-        excel_path = os.path.join(output_dir, "monte_carlo_results.xlsx")
-        csv_path = os.path.join(output_dir, "monte_carlo_results.csv")
+    store = ResultsStore(os.path.join(output_dir or ".", "monte_carlo_runs"), results_format)
+    config_data = config_to_dict(config)
+    meta = store.read_meta() if resume else None
+    if meta is not None:
+        # A resumed sweep must continue the same seed and config
+        if seed is not None and np.random.SeedSequence(seed).entropy != meta["seed_entropy"]:
+            raise ValueError(f"Cannot resume {store.root}: it was run with seed entropy {meta['seed_entropy']}")
+        if meta["config"] != config_data:
+            raise ValueError(f"Cannot resume {store.root}: it was run with a different config")
+        seed = meta["seed_entropy"]
+        done = store.completed_run_ids()
     else:
-        excel_path = "monte_carlo_results.xlsx"
-        csv_path = "monte_carlo_results.csv"
+        store.clear()
+        done = set()
+
+    root_seed = np.random.SeedSequence(seed)
+    print(f"Seed entropy: {root_seed.entropy}")
+    store.write_meta({"seed_entropy": root_seed.entropy, "num_runs": max(num_runs, meta["num_runs"] if meta else 0),
+                      "config": config_data})
+    if done:
+        print(f"Resuming: {len(done)} run(s) already stored in {store.root}")
+
+    monitor = ConvergenceMonitor(target_half_width, relative=relative, confidence=confidence, min_runs=min_runs)
+    stored = store.read_runs() if done else None
+    if stored is not None:
+        for row in stored[stored["Run ID"] <= num_runs].to_dict("records"):
+            monitor.add(row)
+
+    completed = len(done & set(range(1, num_runs + 1)))
+    if not monitor.converged:
+        for result in iter_monte_carlo_runs(num_runs, workers=workers, seed=root_seed, config=config,
+                                            skip_run_ids=done, with_series=save_series):
+            if save_series:
+                store.append(*result)
+                row = result[0]
+            else:
+                store.append(result)
+                row = result
+            completed += 1
+
+            if completed % 10 == 0:
+                print(f"Run {completed}/{num_runs} completed.")
+            if monitor.add(row):
+                break
 
-    try:
-        df.to_excel(excel_path, index=False)
-        print(f"\nResults saved to {excel_path}")
-    except Exception as e:
-        print(f"\nCould not save to Excel (missing openpyxl?): {e}")
-        df.to_csv(csv_path, index=False)
-        print(f"Results saved to {csv_path} instead.")
+    last_run = monitor.stopped_at or num_runs
+    if monitor.converged:
+        print(f"Converged after {last_run} runs (target CI half-width reached).")
+
+    # Rows come back in Run ID order whatever order the runs finished in
+    df = store.read_runs()
+    df = df[df["Run ID"] <= last_run].reset_index(drop=True)
+
+    # Export to Excel (CSV without openpyxl)
+    excel_path = os.path.join(output_dir, "monte_carlo_results.xlsx") if output_dir else "monte_carlo_results.xlsx"
+    print(f"\nResults saved to {export_results(df, excel_path)}")
 
     # Report Summary Statistics to Console
     print("\n" + "="*60)
-    print(f"MONTE CARLO ANALYSIS SUMMARY ({num_runs} Runs)")
+    print(f"MONTE CARLO ANALYSIS SUMMARY ({len(df)} Runs)")
     print("="*60)
     
     summary_cols = ["Total Infected", "Total Deaths", "Infection Rate (%)", "Mortality Rate (%)", "Fully Vaccinated", "Vaccine Stockout (%)"]
-    print(f"{'Metric':<25} | {'Mean':<10} | {'Std Dev':<10} | {'Min':<10} | {'Max':<10}")
-    print("-" * 75)
+    ci_label = f"{confidence:.0%} CI +/-"
+    print(f"{'Metric':<25} | {'Mean':<10} | {'Std Dev':<10} | {'Min':<10} | {'Max':<10} | {ci_label:<10}")
+    print("-" * 88)
     
+    summary = monitor.summary()
     for col in summary_cols:
         if col in df.columns:
             values = df[col]
-            print(f"{col:<25} | {values.mean():<10.2f} | {values.std():<10.2f} | {values.min():<10.2f} | {values.max():<10.2f}")
+            half_width = f"{summary[col]['half_width']:<10.2f}" if col in summary else "-"
+            print(f"{col:<25} | {values.mean():<10.2f} | {values.std():<10.2f} | {values.min():<10.2f} | {values.max():<10.2f} | {half_width}")
     
     print("="*60 + "\n")
 
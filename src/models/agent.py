@@ -1,36 +1,162 @@
+from enum import IntEnum
+
+from utils.config_loader import DEFAULT_CONFIG
+
+
+class HealthState(IntEnum):
+    # Same integer codes as the array backend (models.population)
+    HEALTHY = 0
+    INFECTED = 1
+    INFECTIOUS = 2
+    IMMUNE = 3
+    DEAD = 4
+
+    def __str__(self) -> str:
+        return HEALTH_NAMES[self]
+
+
+HEALTH_NAMES = ("healthy", "infected", "infectious", "immune", "dead")
+HEALTH_CODES = {name: code for code, name in enumerate(HEALTH_NAMES)}
+_STATES = tuple(HealthState)
+_STATES_BY_NAME = {name: _STATES[code] for name, code in HEALTH_CODES.items()}
+
+class VaccineTypes:
+    """
+    Fixed vaccine type -> bit mapping of one run. Agents store the types
+    they received as bits of a uint8 mask, so a run tracks at most 8 types.
+    Built from config.hospital.vaccine_types when the population is created.
+    """
+
+    MAX_TYPES = 8
+
+    def __init__(self, names):
+        self.names = tuple(dict.fromkeys(names))
+        if len(self.names) > self.MAX_TYPES:
+            raise ValueError(f"At most {self.MAX_TYPES} vaccine types can be tracked per agent, got {len(self.names)}")
+        self._bits = {name: 1 << i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def from_config(cls, config=None):
+        return cls((config or DEFAULT_CONFIG).hospital.vaccine_types)
+
+    def bit(self, vaccine_type: str) -> int:
+        try:
+            return self._bits[vaccine_type]
+        except KeyError:
+            raise ValueError(f"Unknown vaccine type {vaccine_type!r}; this run tracks {list(self.names)}") from None
+
+    def to_mask(self, vaccine_types) -> int:
+        mask = 0
+        for vtype in vaccine_types:
+            mask |= self.bit(vtype)
+        return mask
+
+    def from_mask(self, mask: int) -> set:
+        return {vtype for vtype, bit in self._bits.items() if mask & bit}
+
+    def __eq__(self, other):
+        return isinstance(other, VaccineTypes) and self.names == other.names
+
+    def __hash__(self):
+        return hash(self.names)
+
+    def __repr__(self):
+        return f"VaccineTypes({list(self.names)})"
+
+
+DEFAULT_VACCINE_TYPES = VaccineTypes.from_config(DEFAULT_CONFIG)
+
+
+def health_state(health) -> HealthState:
+    """HealthState of a health name ("infected") or code."""
+    return _STATES_BY_NAME[health] if isinstance(health, str) else _STATES[health]
+
 
 class Agent:
+    """
+    One agent, kept compact: health is a HealthState in `state` (compare it
+    with the integer codes), the vaccine types received are bits of
+    `vaccine_mask` (bit positions from the shared `vaccine_types` mapping),
+    and the name is only built when asked for. The string
+    forms (`health`, `received_vaccine_types`, healthStatus(), get_info())
+    are derived from those on access.
+    """
+
+    __slots__ = ("id", "_name", "age", "location", "state", "mask", "days_infected", "vaccine_doses",
+                 "vaccine_mask", "vaccine_types", "immunity_reason", "has_been_infected")
 
-    def __init__(self, id: int, name: str, age: int, location: tuple, health: str, mask: bool = False):
+    def __init__(self, id: int, name: str, age: int, location: tuple, health, mask: bool = False,
+                 vaccine_types: VaccineTypes = None):
+        # name=None names the agent "Agent_<id>" on access; health is a name or a HealthState
+        # vaccine_types: the run's mapping (the default config's types if None), shared by every agent
 
         # traits
         self.id = id
-        self.name = name
+        self._name = name
         self.age = age
         self.location = location
-        self.health = health
+        self.state = health_state(health)
         self.mask = mask
         self.days_infected = 0
         self.vaccine_doses = 0
-        self.received_vaccine_types = set()
+        self.vaccine_mask = 0
+        self.vaccine_types = vaccine_types if vaccine_types is not None else DEFAULT_VACCINE_TYPES
         self.immunity_reason = None # "vaccine", "natural", "treatment"
-        self.has_been_infected = health in ["infected", "infectious"]
+        self.has_been_infected = self.state in (HealthState.INFECTED, HealthState.INFECTIOUS)
+
+    @property
+    def name(self) -> str:
+        return self._name if self._name is not None else f"Agent_{self.id}"
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+
+    @property
+    def health(self) -> str:
+        return HEALTH_NAMES[self.state]
+
+    @health.setter
+    def health(self, value):
+        self.state = health_state(value)
 
+    @property
+    def received_vaccine_types(self):
+        return VaccineTypeSet(self)
+
+    @received_vaccine_types.setter
+    def received_vaccine_types(self, value):
+        self.vaccine_mask = self.vaccine_types.to_mask(value)
+
+    def has_vaccine(self, vaccine_type: str) -> bool:
+        return bool(self.vaccine_mask & self.vaccine_types.bit(vaccine_type))
 
     def get_info(self) -> str:
         return f"Agent ID: {self.id}, Name: {self.name}, Age: {self.age}, Location: {self.location}, Health: {self.health}, Doses: {self.vaccine_doses}, Vaccine Types: {list(self.received_vaccine_types)}, Immunity Reason: {self.immunity_reason}, Ever Infected: {self.has_been_infected}"
-    
+
     def move(self, new_location: tuple):
         self.location = new_location
 
-    def updateHealth(self, new_health: str):
+    def updateHealth(self, new_health):
+        # A health name or a HealthState / integer code
         self.health = new_health
 
     def healthStatus(self) -> str:
         return self.health
-    
+
     def putOnMask(self):
         self.mask = True
-    
+
     def maskStatus(self) -> bool:
         return self.mask
+
+
+class VaccineTypeSet(set):
+    # Set of vaccine type names built from an agent's vaccine_mask; .add() also sets the bit
+    def __init__(self, owner):
+        super().__init__(owner.vaccine_types.from_mask(int(owner.vaccine_mask)))
+        self._owner = owner
+
+    def add(self, vaccine_type):
+        self._owner.vaccine_mask |= self._owner.vaccine_types.bit(vaccine_type)
+        super().add(vaccine_type)
@@ -1,47 +1,91 @@
+import numpy as np
+
+from models.occupancy import OccupancyIndex
+from models.hospital_field import NearestHospitalField
+
+
 class Grid:
+    """
+    Agents live in an OccupancyIndex (integer ids per cell, CSR layout);
+    hospitals and set_cell() values are kept per cell on the side. get_cell()
+    still returns the old "H0"/"A17" strings built from both.
+    """
 
     def __init__(self, width, height):
         self.width = width
         self.height = height
-        self.cells = [[[] for _ in range(width)] for _ in range(height)]
+        self.index = OccupancyIndex(width * height)
+        self._hospitals = {}
+        self._labels = {}
+        self._hospital_field = None
 
-    def set_cell(self, x, y, value):
+    def _cell_id(self, x, y):
         if 0 <= x < self.width and 0 <= y < self.height:
-            self.cells[y][x] = [value]
+            return y * self.width + x
         else:
             raise IndexError("Cell position out of bounds")
 
+    @property
+    def cells(self):
+        # Materialized view in the original list-of-lists-of-strings layout
+        return [[self.get_cell(x, y) for x in range(self.width)] for y in range(self.height)]
+
+    def set_cell(self, x, y, value):
+        cell = self._cell_id(x, y)
+        self.index.remove(self.index.agents_in(cell))
+        self._hospitals.pop(cell, None)
+        self._labels[cell] = [value]
+
     def get_cell(self, x, y):
-        if 0 <= x < self.width and 0 <= y < self.height:
-            return self.cells[y][x]
-        else:
-            raise IndexError("Cell position out of bounds")
+        cell = self._cell_id(x, y)
+        return self._labels.get(cell, []) + self._hospitals.get(cell, []) + [f"A{i}" for i in self.index.agents_in(cell)]
 
     def __str__(self):
-        grid_str = ""
-        for row in self.cells:
-            # Display cell contents separated by commas, or empty space if empty
-            row_content = []
-            for cell in row:
-                if cell:
-                    row_content.append(",".join(str(item) for item in cell))
-                else:
-                    row_content.append(".")
-            grid_str += " | ".join(row_content) + "\n"
-        return grid_str
-    
+        # Display cell contents separated by commas, or "." if empty. Only the
+        # non-empty cells are looked up, and each row is joined once
+        labels = ["."] * (self.width * self.height)
+        for cell in set(self.index.occupied_cells().tolist()) | set(self._hospitals) | set(self._labels):
+            labels[cell] = ",".join(str(item) for item in self.get_cell(cell % self.width, cell // self.width))
+        return "".join(" | ".join(labels[y * self.width:(y + 1) * self.width]) + "\n" for y in range(self.height))
+
     def clear(self):
-        self.cells = [[[] for _ in range(self.width)] for _ in range(self.height)]
+        self.index.clear()
+        self._hospitals = {}
+        self._labels = {}
 
     def addHospital(self, x, y, hospital_id):
-        if 0 <= x < self.width and 0 <= y < self.height:
-            self.cells[y][x].append(f"H{hospital_id}")
-        else:
-            raise IndexError("Cell position out of bounds")
+        cell = self._cell_id(x, y)
+        self._hospitals.setdefault(cell, []).append(f"H{hospital_id}")
 
-    # Agents can occupy the same cell 
+    # Agents can occupy the same cell
     def addAgent(self, x, y, agent_id):
-        if 0 <= x < self.width and 0 <= y < self.height:
-            self.cells[y][x].append(f"A{agent_id}")
-        else:
-            raise IndexError("Cell position out of bounds")
\ No newline at end of file
+        self.index.add(agent_id, self._cell_id(x, y))
+
+    def agents_at(self, x, y):
+        """Ids of the agents in cell (x, y), sorted."""
+        return self.index.agents_in(self._cell_id(x, y))
+
+    def move_agents(self, agent_ids, xs, ys):
+        """Places each agent at (xs[k], ys[k]); only agents whose cell changed are touched."""
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        if len(xs) and (xs.min() < 0 or xs.max() >= self.width or ys.min() < 0 or ys.max() >= self.height):
+            raise IndexError("Cell position out of bounds")
+        self.index.move(agent_ids, ys * self.width + xs)
+
+    def remove_agents(self, agent_ids):
+        self.index.remove(agent_ids)
+
+    def sync_hospitals(self, hospitals):
+        self._hospitals = {}
+        for idx, hosp in enumerate(hospitals):
+            x, y = hosp.location
+            self.addHospital(x, y, idx)
+
+    def hospital_field(self, hospitals) -> NearestHospitalField:
+        """Nearest-active-hospital map for these hospitals, cached on the grid."""
+        if self._hospital_field is None or not self._hospital_field.tracks(hospitals):
+            if self._hospital_field is not None:
+                self._hospital_field.detach()
+            self._hospital_field = NearestHospitalField(self.width, self.height, hospitals)
+        return self._hospital_field
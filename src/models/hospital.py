@@ -1,12 +1,20 @@
+from utils.random_utils import get_rng
+
+
 class Hospital:
 
-    def __init__(self, location: tuple, vaccine_capacity: int, vaccine_type: str, admin_speed: int, bed_capacity: float):
+    __slots__ = ("location", "vaccine_capacity", "vaccine_type", "admin_speed", "bed_capacity", "treatment_success",
+                 "current_patients", "_listeners", "_active", "vaccine_requests", "vaccine_stockouts")
+
+    def __init__(self, location: tuple, vaccine_capacity: int, vaccine_type: str, admin_speed: int, bed_capacity: float, treatment_success: float = 0.5):
         self.location = location
         self.vaccine_capacity = vaccine_capacity
         self.vaccine_type = vaccine_type
         self.admin_speed = admin_speed
         self.bed_capacity = bed_capacity
+        self.treatment_success = treatment_success
         self.current_patients = 0
+        self._listeners = []
         self.active = True
         self.vaccine_requests = 0
         self.vaccine_stockouts = 0
@@ -25,17 +33,60 @@ class Hospital:
                 self.vaccine_stockouts += 1
             return False
 
-    def treat_patient(self) -> bool:
+    def administer_vaccines(self, number_of_requests: int) -> int:
+        """
+        Serves a queue of single-dose requests in arrival order.
+        Same accounting as calling administer_vaccine(1) once per request;
+        returns how many of the requests were granted.
+        """
+        self.vaccine_requests += number_of_requests
+        if not self.active:
+            return 0
+        granted = min(number_of_requests, max(self.vaccine_capacity, 0))
+        self.vaccine_capacity -= granted
+        self.vaccine_stockouts += number_of_requests - granted
+        return granted
+
+    def treat_patient(self, rng=None) -> bool:
         """
         Attempts to treat a sick patient.
-        Returns True if treatment is successful (50% chance), False otherwise.
+        Returns True if treatment is successful (treatment_success chance, 50% by default), False otherwise.
         """
         if self.active:
-            # 50% chance of success
-            import numpy as np
-            return np.random.rand() < 0.5
+            return get_rng(rng).random() < self.treatment_success
         return False
             
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    @active.setter
+    def active(self, value: bool):
+        changed = getattr(self, "_active", None) != value
+        self._active = value
+        if changed:
+            for callback in self._listeners:
+                callback(self)
+
+    def add_listener(self, callback):
+        """Registers callback(hospital), called whenever `active` changes."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Unregisters a callback added with add_listener(); unknown callbacks are ignored."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def __getstate__(self):
+        # Listeners are runtime wiring (e.g. a grid's distance field); don't copy them
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["_listeners"] = []
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
     def has_vaccines(self) -> bool:
         return self.active and self.vaccine_capacity > 0
         
@@ -47,9 +98,6 @@ class Hospital:
     def restock_vaccines(self, additional_doses: int):
         self.vaccine_capacity += additional_doses
 
-    def location(self, location: tuple):
-        return tuple
-
     def is_active(self) -> bool:
         return self.active
     
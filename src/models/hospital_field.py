@@ -0,0 +1,116 @@
+import numpy as np
+
+
+class NearestHospitalField:
+    """
+    Precomputed nearest-active-hospital map over the grid (L1 / Manhattan).
+
+    nearest[y, x] is the index (into `hospitals`) of the closest active
+    hospital, ties going to the lowest index like engine.findHosp; -1 when no
+    hospital is active. step_x / step_y hold the one-cell move an agent at
+    (x, y) makes toward it (x gap first, then y). The maps are rebuilt lazily,
+    only after some hospital's `active` flag has changed.
+    """
+
+    def __init__(self, width: int, height: int, hospitals):
+        self.width = width
+        self.height = height
+        self.hospitals = list(hospitals)
+        self._dirty = True
+        for hosp in self.hospitals:
+            hosp.add_listener(self._on_hospital_change)
+
+    def _on_hospital_change(self, hosp):
+        self._dirty = True
+
+    def detach(self):
+        """Stops listening to the hospitals; called when the field is replaced."""
+        for hosp in self.hospitals:
+            hosp.remove_listener(self._on_hospital_change)
+
+    def tracks(self, hospitals) -> bool:
+        return len(hospitals) == len(self.hospitals) and all(a is b for a, b in zip(hospitals, self.hospitals))
+
+    def refresh(self):
+        if self._dirty:
+            self._compute()
+            self._dirty = False
+
+    @property
+    def any_active(self) -> bool:
+        self.refresh()
+        return self._any_active
+
+    @property
+    def nearest(self):
+        self.refresh()
+        return self._nearest
+
+    @property
+    def distance(self):
+        self.refresh()
+        return self._distance
+
+    @property
+    def step_x(self):
+        self.refresh()
+        return self._step_x
+
+    @property
+    def step_y(self):
+        self.refresh()
+        return self._step_y
+
+    def target(self, x: int, y: int):
+        """Closest active hospital to (x, y), or None."""
+        idx = self.nearest[y, x]
+        return self.hospitals[idx] if idx >= 0 else None
+
+    def next_location(self, x: int, y: int) -> tuple:
+        self.refresh()
+        return (x + int(self._step_x[y, x]), y + int(self._step_y[y, x]))
+
+    def next_locations(self, xs, ys):
+        self.refresh()
+        return xs + self._step_x[ys, xs], ys + self._step_y[ys, xs]
+
+    def _compute(self):
+        w, h = self.width, self.height
+        active = [k for k, hosp in enumerate(self.hospitals) if hosp.active]
+        self._any_active = bool(active)
+        if not active:
+            self._nearest = np.full((h, w), -1, dtype=np.int32)
+            self._distance = np.full((h, w), -1, dtype=np.int64)
+            self._step_x = np.zeros((h, w), dtype=np.int8)
+            self._step_y = np.zeros((h, w), dtype=np.int8)
+            return
+
+        # Distance transform on keys dist * m + index, so a plain min picks the
+        # closest hospital and, among equally close ones, the first in the list.
+        m = len(self.hospitals)
+        inf = np.iinfo(np.int64).max // 2
+        key = np.full((h, w), inf, dtype=np.int64)
+        for k in active:
+            hx, hy = self.hospitals[k].location
+            key[hy, hx] = min(key[hy, hx], k)
+
+        # Two sweeps along x, then two along y (L1 is separable)
+        for x in range(1, w):
+            np.minimum(key[:, x], key[:, x - 1] + m, out=key[:, x])
+        for x in range(w - 2, -1, -1):
+            np.minimum(key[:, x], key[:, x + 1] + m, out=key[:, x])
+        for y in range(1, h):
+            np.minimum(key[y], key[y - 1] + m, out=key[y])
+        for y in range(h - 2, -1, -1):
+            np.minimum(key[y], key[y + 1] + m, out=key[y])
+
+        self._nearest = (key % m).astype(np.int32)
+        self._distance = key // m
+
+        hx = np.array([hosp.location[0] for hosp in self.hospitals])
+        hy = np.array([hosp.location[1] for hosp in self.hospitals])
+        ys, xs = np.mgrid[0:h, 0:w]
+        tx, ty = hx[self._nearest], hy[self._nearest]
+        same_x = xs == tx
+        self._step_x = np.where(same_x, 0, np.sign(tx - xs)).astype(np.int8)
+        self._step_y = np.where(same_x, np.sign(ty - ys), 0).astype(np.int8)
@@ -0,0 +1,166 @@
+import numpy as np
+
+# Sort keys pack (cell, agent id) into one int64: cell in the high 32 bits
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+
+
+class OccupancyIndex:
+    """
+    Cell -> agent id index in CSR layout.
+
+    `offsets` has one entry per cell plus one; the ids of the agents in cell c
+    are ids[offsets[c]:offsets[c + 1]], sorted by id. `cell_of[i]` is the cell
+    of agent i, or -1 when the agent is not on the grid.
+
+    Updates only touch the agents whose cell changed: their old keys are
+    dropped and their new keys merged into the sorted key array. Single adds
+    are buffered and merged on the next read, so filling the index one agent
+    at a time stays O(N log N).
+
+    Nothing on the update path scans every cell. agents_in() and groups()
+    read the sorted keys directly (binary search / one pass over the N
+    keys); `offsets`, the only O(cells) structure, is rebuilt on first use
+    after a change.
+    """
+
+    # Above this fraction of agents changing cell, re-sorting everything is cheaper
+    REBUILD_FRACTION = 0.25
+
+    def __init__(self, num_cells: int):
+        self.num_cells = num_cells
+        self.cell_of = np.full(0, -1, dtype=np.int64)
+        self._keys = np.empty(0, dtype=np.int64)
+        self._counts = np.zeros(num_cells, dtype=np.int64)
+        self._offsets = np.zeros(num_cells + 1, dtype=np.int64)
+        self._offsets_stale = False
+        self._groups = None
+        self._pending_ids = []
+        self._pending_cells = []
+
+    def __len__(self) -> int:
+        self._flush()
+        return len(self._keys)
+
+    @property
+    def ids(self):
+        self._flush()
+        return self._keys & _ID_MASK
+
+    @property
+    def offsets(self):
+        self._flush()
+        if self._offsets_stale:
+            np.cumsum(self._counts, out=self._offsets[1:])
+            self._offsets_stale = False
+        return self._offsets
+
+    def counts(self):
+        self._flush()
+        return self._counts
+
+    def groups(self):
+        """
+        (cells, starts, ends): the non-empty cells in ascending order, and for
+        each the slice ids[start:end] of its agents. One pass over the keys,
+        cached until the next change.
+        """
+        self._flush()
+        if self._groups is None:
+            key_cells = self._keys >> _ID_BITS
+            starts = np.flatnonzero(np.diff(key_cells, prepend=-1))
+            ends = np.append(starts[1:], len(key_cells))
+            self._groups = (key_cells[starts], starts, ends)
+        return self._groups
+
+    def occupied_cells(self):
+        return self.groups()[0]
+
+    def cells_of(self, n: int):
+        """Cells of agents 0..n-1 as a new array, -1 for agents not on the grid."""
+        self._flush()
+        cells = np.full(n, -1, dtype=np.int64)
+        known = min(n, len(self.cell_of))
+        cells[:known] = self.cell_of[:known]
+        return cells
+
+    def agents_in(self, cell: int):
+        self._flush()
+        start, end = np.searchsorted(self._keys, (cell << _ID_BITS, (cell + 1) << _ID_BITS))
+        return self._keys[start:end] & _ID_MASK
+
+    def clear(self):
+        self.cell_of = np.full(0, -1, dtype=np.int64)
+        self._keys = np.empty(0, dtype=np.int64)
+        self._counts[:] = 0
+        self._offsets[:] = 0
+        self._offsets_stale = False
+        self._groups = None
+        self._pending_ids = []
+        self._pending_cells = []
+
+    def add(self, agent_id: int, cell: int):
+        self._pending_ids.append(agent_id)
+        self._pending_cells.append(cell)
+
+    def remove(self, agent_ids):
+        agent_ids = np.asarray(agent_ids, dtype=np.int64)
+        self.move(agent_ids, np.full(len(agent_ids), -1, dtype=np.int64))
+
+    def move(self, agent_ids, cells):
+        """Sets the cell of each agent (-1 removes it); unchanged agents cost nothing."""
+        self._flush()
+        self._apply(np.asarray(agent_ids, dtype=np.int64), np.asarray(cells, dtype=np.int64))
+
+    def _flush(self):
+        if not self._pending_ids:
+            return
+        ids = np.array(self._pending_ids, dtype=np.int64)
+        cells = np.array(self._pending_cells, dtype=np.int64)
+        self._pending_ids = []
+        self._pending_cells = []
+        self._apply(ids, cells)
+
+    def _grow(self, max_id: int):
+        if max_id >= len(self.cell_of):
+            grown = np.full(max(max_id + 1, 2 * len(self.cell_of)), -1, dtype=np.int64)
+            grown[:len(self.cell_of)] = self.cell_of
+            self.cell_of = grown
+
+    def _apply(self, ids, cells):
+        if len(ids) == 0:
+            return
+        # Last write wins when an id appears more than once
+        _, last = np.unique(ids[::-1], return_index=True)
+        keep = len(ids) - 1 - last
+        ids, cells = ids[keep], cells[keep]
+
+        self._grow(int(ids.max()))
+        old = self.cell_of[ids]
+        changed = old != cells
+        ids, old, cells = ids[changed], old[changed], cells[changed]
+        if len(ids) == 0:
+            return
+
+        self.cell_of[ids] = cells
+        leaving = old >= 0
+        arriving = cells >= 0
+        np.subtract.at(self._counts, old[leaving], 1)
+        np.add.at(self._counts, cells[arriving], 1)
+
+        if len(ids) > self.REBUILD_FRACTION * max(len(self._keys), 1):
+            placed = np.flatnonzero(self.cell_of >= 0)
+            self._keys = np.sort((self.cell_of[placed] << _ID_BITS) | placed)
+        else:
+            if leaving.any():
+                old_keys = (old[leaving] << _ID_BITS) | ids[leaving]
+                mask = np.ones(len(self._keys), dtype=bool)
+                mask[np.searchsorted(self._keys, old_keys)] = False
+                self._keys = self._keys[mask]
+            if arriving.any():
+                new_keys = np.sort((cells[arriving] << _ID_BITS) | ids[arriving])
+                self._keys = np.insert(self._keys, np.searchsorted(self._keys, new_keys), new_keys)
+
+        # Derived views are rebuilt when next read
+        self._offsets_stale = True
+        self._groups = None
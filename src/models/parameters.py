@@ -0,0 +1,37 @@
+"""
+Per-agent disease parameters.
+
+Age never changes during a run, so the age-band lookups (transmission draw
+mean/sd and the matching infection probability, natural recovery
+probability, treatment eligibility) are done once,
+with np.searchsorted over the config's band edges, when the population is
+created. Each tick then reads them by agent id instead of walking the age
+bands for every agent.
+"""
+import numpy as np
+
+from utils.config_loader import DEFAULT_CONFIG
+
+
+class AgentParameters:
+    """Row i holds agent i's parameters (agent ids are positions in the population)."""
+
+    def __init__(self, ages, config=None):
+        config = config or DEFAULT_CONFIG
+        disease = config.disease
+        ages = np.asarray(ages, dtype=np.int64)
+        self.config = config
+
+        band = np.searchsorted(disease.transmission_age_edges, ages)
+        self.transmission_mean = disease.transmission_mean[band]
+        self.transmission_sd = disease.transmission_sd[band]
+        self.infection_prob = disease.transmission_prob[band]
+        self.recovery_prob = disease.recovery_prob[np.searchsorted(disease.recovery_age_edges, ages)]
+        self.treatment_eligible = ages >= config.hospital.treatment_min_age
+
+    @classmethod
+    def from_agents(cls, agents, config=None):
+        return cls([ag.age for ag in agents], config)
+
+    def __len__(self) -> int:
+        return len(self.recovery_prob)
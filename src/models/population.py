@@ -0,0 +1,224 @@
+import numpy as np
+
+import models.agent as agent
+from models.agent import HealthState, HEALTH_NAMES, HEALTH_CODES, VaccineTypes
+from models.parameters import AgentParameters
+from utils.config_loader import DEFAULT_CONFIG
+
+# Integer health codes used by the array backend (plain ints of models.agent.HealthState)
+HEALTHY = int(HealthState.HEALTHY)
+INFECTED = int(HealthState.INFECTED)
+INFECTIOUS = int(HealthState.INFECTIOUS)
+IMMUNE = int(HealthState.IMMUNE)
+DEAD = int(HealthState.DEAD)
+
+# Immunity reason codes (0 means no immunity recorded)
+IMMUNITY_REASONS = (None, "vaccine", "natural", "treatment")
+IMMUNITY_CODES = {reason: code for code, reason in enumerate(IMMUNITY_REASONS)}
+
+# Number of set bits for every possible uint8 mask
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int8)
+
+
+class Population:
+    """
+    Structure-of-arrays population. Agent i lives at index i of every array.
+    `vaccine_types` maps vaccine types to the bits of `vaccine_mask`.
+    """
+
+    def __init__(self, x, y, age, health=None, mask=None, vaccine_types=None):
+        n = len(x)
+        self.x = np.asarray(x, dtype=np.int32).copy()
+        self.y = np.asarray(y, dtype=np.int32).copy()
+        self.age = np.asarray(age, dtype=np.int16).copy()
+        if health is None:
+            self.health = np.full(n, HEALTHY, dtype=np.int8)
+        else:
+            self.health = np.asarray(health, dtype=np.int8).copy()
+        if mask is None:
+            self.mask = np.zeros(n, dtype=bool)
+        else:
+            self.mask = np.asarray(mask, dtype=bool).copy()
+        self.days_infected = np.zeros(n, dtype=np.int32)
+        self.vaccine_doses = np.zeros(n, dtype=np.int8)
+        self.vaccine_mask = np.zeros(n, dtype=np.uint8)
+        self.vaccine_types = vaccine_types if vaccine_types is not None else agent.DEFAULT_VACCINE_TYPES
+        self.immunity_reason = np.zeros(n, dtype=np.int8)
+        self.has_been_infected = (self.health == INFECTED) | (self.health == INFECTIOUS)
+        self._views = None
+        self._params = None
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    @classmethod
+    def from_agents(cls, agents):
+        pop = cls(
+            x=[ag.location[0] for ag in agents],
+            y=[ag.location[1] for ag in agents],
+            age=[ag.age for ag in agents],
+            health=[ag.state for ag in agents],
+            mask=[ag.mask for ag in agents],
+            vaccine_types=agents[0].vaccine_types if len(agents) else None,
+        )
+        for i, ag in enumerate(agents):
+            pop.days_infected[i] = ag.days_infected
+            pop.vaccine_doses[i] = ag.vaccine_doses
+            pop.vaccine_mask[i] = ag.vaccine_mask
+            pop.immunity_reason[i] = IMMUNITY_CODES[ag.immunity_reason]
+            pop.has_been_infected[i] = ag.has_been_infected
+        return pop
+
+    def to_agents(self):
+        """Materialize independent Agent objects from the arrays."""
+        agents = []
+        for i in range(len(self)):
+            ag = agent.Agent(
+                id=i,
+                name=None,
+                age=int(self.age[i]),
+                location=(int(self.x[i]), int(self.y[i])),
+                health=int(self.health[i]),
+                mask=bool(self.mask[i]),
+                vaccine_types=self.vaccine_types,
+            )
+            ag.days_infected = int(self.days_infected[i])
+            ag.vaccine_doses = int(self.vaccine_doses[i])
+            ag.vaccine_mask = int(self.vaccine_mask[i])
+            ag.immunity_reason = IMMUNITY_REASONS[self.immunity_reason[i]]
+            ag.has_been_infected = bool(self.has_been_infected[i])
+            agents.append(ag)
+        return agents
+
+    def agents(self):
+        """
+        Agent-like views over the arrays, for callers (stats, visualizer)
+        written against the Agent interface. Writes go straight to the arrays.
+        """
+        if self._views is None or len(self._views) != len(self):
+            self._views = [AgentView(self, i) for i in range(len(self))]
+        return self._views
+
+    def parameters(self, config=None):
+        """Per-agent AgentParameters for this config, built on first use and cached."""
+        config = config or DEFAULT_CONFIG
+        stale = self._params is None or len(self._params) != len(self) or (
+            self._params.config is not config and self._params.config != config)
+        if stale:
+            self._params = AgentParameters(self.age, config)
+        return self._params
+
+    def cell_ids(self, width: int):
+        return self.y.astype(np.int64) * width + self.x
+
+    def living(self):
+        return self.health != DEAD
+
+    def __getstate__(self):
+        # Views are rebuilt on demand by agents(); copies and pickles don't carry them
+        state = self.__dict__.copy()
+        state["_views"] = None
+        return state
+
+
+class AgentView(agent.Agent):
+    """Thin adapter exposing row i of a Population through the Agent interface."""
+
+    __slots__ = ("_pop", "_index")
+
+    def __init__(self, population: Population, index: int):
+        self._pop = population
+        self._index = index
+
+    def __reduce__(self):
+        # The inherited Agent slots are read-only properties here, so rebuild from the row
+        return AgentView, (self._pop, self._index)
+
+    @property
+    def id(self):
+        return self._index
+
+    @property
+    def name(self):
+        return f"Agent_{self._index}"
+
+    @property
+    def age(self):
+        return int(self._pop.age[self._index])
+
+    @property
+    def location(self):
+        return (int(self._pop.x[self._index]), int(self._pop.y[self._index]))
+
+    @location.setter
+    def location(self, value):
+        self._pop.x[self._index], self._pop.y[self._index] = value
+
+    @property
+    def health(self):
+        return HEALTH_NAMES[self._pop.health[self._index]]
+
+    @health.setter
+    def health(self, value):
+        self._pop.health[self._index] = agent.health_state(value)
+
+    @property
+    def state(self):
+        return HealthState(self._pop.health[self._index])
+
+    @state.setter
+    def state(self, value):
+        self._pop.health[self._index] = value
+
+    @property
+    def mask(self):
+        return bool(self._pop.mask[self._index])
+
+    @mask.setter
+    def mask(self, value):
+        self._pop.mask[self._index] = value
+
+    @property
+    def days_infected(self):
+        return int(self._pop.days_infected[self._index])
+
+    @days_infected.setter
+    def days_infected(self, value):
+        self._pop.days_infected[self._index] = value
+
+    @property
+    def vaccine_doses(self):
+        return int(self._pop.vaccine_doses[self._index])
+
+    @vaccine_doses.setter
+    def vaccine_doses(self, value):
+        self._pop.vaccine_doses[self._index] = value
+
+    @property
+    def vaccine_mask(self):
+        return int(self._pop.vaccine_mask[self._index])
+
+    @vaccine_mask.setter
+    def vaccine_mask(self, value):
+        self._pop.vaccine_mask[self._index] = value
+
+    @property
+    def vaccine_types(self):
+        return self._pop.vaccine_types
+
+    @property
+    def immunity_reason(self):
+        return IMMUNITY_REASONS[self._pop.immunity_reason[self._index]]
+
+    @immunity_reason.setter
+    def immunity_reason(self, value):
+        self._pop.immunity_reason[self._index] = IMMUNITY_CODES[value]
+
+    @property
+    def has_been_infected(self):
+        return bool(self._pop.has_been_infected[self._index])
+
+    @has_been_infected.setter
+    def has_been_infected(self, value):
+        self._pop.has_been_infected[self._index] = value
+
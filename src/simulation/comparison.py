@@ -0,0 +1,144 @@
+"""
+Paired comparison of configurations with common random numbers.
+
+Every variant of a replicate is built from the same seed with
+Simulation.create(crn=True): hospitals, population and each phase of each
+tick (movement, transmission, progression, treatment) draw from the same
+per-purpose, per-tick substreams, and the array backend draws one number
+per agent, so agent i sees the same numbers in every variant. The
+difference between two variants of one replicate is then mostly the effect
+of the change, and the paired differences need far fewer replicates for
+the same confidence than two independent sweeps.
+
+antithetic=True also runs every replicate with mirrored draws and uses the
+average of the pair as the replicate's value.
+
+    variants = {
+        "baseline": {},
+        "8 hospitals": {"hospital.count": 8},
+        "double stock": {"hospital.vaccine_capacity": 20},
+    }
+    rows, diffs = run_paired_comparison(variants, replicates=30, seed=1)
+    print_paired_report(diffs)
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simulation.convergence import CONVERGENCE_METRICS, RunningStats, t_quantile
+from simulation.monte_carlo import flatten_stats, spawn_run_seeds, resolve_config
+from simulation.simulation import Simulation
+from utils.config_loader import SimulationConfig, with_overrides
+
+
+def _variant_config(spec, base):
+    # A SimulationConfig, or {"section.key": value} overrides of the base config
+    return spec if isinstance(spec, SimulationConfig) else with_overrides(base, spec)
+
+
+def _run_variant(name, run_id, seed_seq, config, backend, mirrored):
+    sim = Simulation.create(seed=seed_seq, config=config, backend=backend, crn=True, antithetic=mirrored)
+    sim.run()
+    row = flatten_stats(sim.collect_stats(), run_id)
+    row["Scenario"] = name
+    row["Antithetic"] = mirrored
+    return row
+
+
+def run_paired_comparison(variants, replicates=20, seed=None, workers=1, antithetic=False, crn=True,
+                          backend="numpy", params=None, config=None, metrics=CONVERGENCE_METRICS, confidence=0.95):
+    """
+    Runs every variant for every replicate and returns (rows, differences).
+
+    variants: {name: overrides dict or SimulationConfig}; the first one is the
+    baseline the others are compared with. crn=False gives every variant its
+    own seed instead (an unpaired reference). rows are sorted by Run ID, then
+    variant order. differences is paired_differences() of the rows.
+    """
+    base = resolve_config(params, config)
+    names = list(variants)
+    configs = {name: _variant_config(spec, base) for name, spec in variants.items()}
+    mirrors = (False, True) if antithetic else (False,)
+
+    tasks = []
+    for replicate, seed_seq in enumerate(spawn_run_seeds(replicates, seed)):
+        variant_seeds = [seed_seq] * len(names) if crn else seed_seq.spawn(len(names))
+        for name, variant_seed in zip(names, variant_seeds):
+            for mirrored in mirrors:
+                tasks.append((name, replicate + 1, variant_seed, configs[name], backend, mirrored))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        rows = [_run_variant(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(_run_variant, *zip(*tasks)))
+
+    order = {name: i for i, name in enumerate(names)}
+    rows.sort(key=lambda row: (row["Run ID"], order[row["Scenario"]], row["Antithetic"]))
+    return rows, paired_differences(rows, names[0], metrics, confidence)
+
+
+def paired_differences(rows, baseline, metrics=CONVERGENCE_METRICS, confidence=0.95):
+    """
+    Per variant and metric: mean of (variant - baseline) over replicates with
+    its paired CI half-width, next to the half-width an unpaired comparison of
+    the same runs would give. Antithetic pairs are averaged first.
+    """
+    # values[scenario][run_id][metric] -> replicate value (mean over antithetic pair)
+    values = {}
+    for row in rows:
+        per_run = values.setdefault(row["Scenario"], {}).setdefault(row["Run ID"], {})
+        for m in metrics:
+            per_run.setdefault(m, []).append(row[m])
+    for per_scenario in values.values():
+        for per_run in per_scenario.values():
+            for m in metrics:
+                per_run[m] = float(np.mean(per_run[m]))
+
+    q = 0.5 + confidence / 2
+    results = []
+    base = values[baseline]
+    for scenario, per_scenario in values.items():
+        if scenario == baseline:
+            continue
+        run_ids = sorted(set(base) & set(per_scenario))
+        for m in metrics:
+            diff, a, b = RunningStats(), RunningStats(), RunningStats()
+            for run_id in run_ids:
+                a.add(base[run_id][m])
+                b.add(per_scenario[run_id][m])
+                diff.add(per_scenario[run_id][m] - base[run_id][m])
+            n = diff.count
+            unpaired = (t_quantile(q, n - 1) * math.sqrt((a.variance + b.variance) / n)) if n > 1 else math.inf
+            results.append({
+                "Scenario": scenario,
+                "Metric": m,
+                "Replicates": n,
+                "Baseline Mean": a.mean,
+                "Scenario Mean": b.mean,
+                "Mean Difference": diff.mean,
+                "Paired CI +/-": diff.half_width(confidence),
+                "Unpaired CI +/-": unpaired,
+                # Var(unpaired difference) / Var(paired difference): how many times
+                # more replicates an independent comparison needs for the same CI
+                "Variance Reduction": ((a.variance + b.variance) / diff.variance
+                                       if n > 1 and diff.variance > 0 else math.inf),
+            })
+    return results
+
+
+def print_paired_report(differences, confidence=0.95):
+    print("\n" + "=" * 100)
+    print(f"PAIRED COMPARISON vs BASELINE ({confidence:.0%} CI)")
+    print("=" * 100)
+    print(f"{'Scenario':<20} | {'Metric':<22} | {'Difference':<11} | {'Paired +/-':<10} | "
+          f"{'Unpaired +/-':<12} | {'Var. reduction':<14}")
+    print("-" * 100)
+    for d in differences:
+        print(f"{d['Scenario']:<20} | {d['Metric']:<22} | {d['Mean Difference']:<11.2f} | "
+              f"{d['Paired CI +/-']:<10.2f} | {d['Unpaired CI +/-']:<12.2f} | {d['Variance Reduction']:<14.1f}")
+    print("=" * 100 + "\n")
@@ -0,0 +1,79 @@
+"""
+Live per-health-state counts and the central health transition API.
+
+Every health change in the engine goes through transition() (Agent objects)
+or transition_population() (array backend), which keep a CompartmentCounts
+up to date. Compartment queries and the termination check then cost O(1)
+instead of a scan over the population.
+"""
+import numpy as np
+
+from models.population import HEALTH_NAMES, HEALTH_CODES, HEALTHY, INFECTED, INFECTIOUS, IMMUNE, DEAD
+
+
+class CompartmentCounts:
+
+    def __init__(self, counts=None):
+        self._counts = [0] * len(HEALTH_NAMES)
+        if counts is not None:
+            for state, n in counts.items():
+                self._counts[HEALTH_CODES[state]] = int(n)
+
+    @classmethod
+    def from_agents(cls, agents):
+        counts = cls()
+        for ag in agents:
+            counts._counts[ag.state] += 1
+        return counts
+
+    @classmethod
+    def from_population(cls, pop):
+        counts = cls()
+        counts._counts = [int(n) for n in np.bincount(pop.health, minlength=len(HEALTH_NAMES))]
+        return counts
+
+    def __getitem__(self, state) -> int:
+        if isinstance(state, str):
+            state = HEALTH_CODES[state]
+        return self._counts[state]
+
+    def as_dict(self):
+        return {name: self._counts[code] for code, name in enumerate(HEALTH_NAMES)}
+
+    def move(self, old, new, count: int = 1):
+        if isinstance(old, str):
+            old = HEALTH_CODES[old]
+        if isinstance(new, str):
+            new = HEALTH_CODES[new]
+        self._counts[old] -= count
+        self._counts[new] += count
+
+    @property
+    def living(self) -> int:
+        return sum(self._counts) - self._counts[DEAD]
+
+    def is_terminal(self) -> bool:
+        # Same rule as engine.isTerminationConditionMet
+        living = self.living
+        if living == 0:
+            return True
+        all_healthy_or_immune = self._counts[HEALTHY] + self._counts[IMMUNE] == living
+        all_infected = self._counts[INFECTED] + self._counts[INFECTIOUS] == living
+        return all_healthy_or_immune or all_infected
+
+
+def transition(ag, new_health, counts=None):
+    """Moves one agent to new_health (a name or code), keeping `counts` in step."""
+    if counts is not None:
+        counts.move(ag.state, new_health)
+    ag.updateHealth(new_health)
+
+
+def transition_population(pop, selector, new_code: int, counts=None):
+    """Moves the selected rows of a Population (mask or index array) to new_code."""
+    if counts is not None:
+        old = np.bincount(pop.health[selector], minlength=len(HEALTH_NAMES))
+        for code, n in enumerate(old):
+            if n and code != new_code:
+                counts.move(code, new_code, int(n))
+    pop.health[selector] = new_code
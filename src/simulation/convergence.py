@@ -0,0 +1,181 @@
+"""
+Streaming summary statistics and a stopping rule for Monte Carlo sweeps.
+
+RunningStats keeps Welford's running mean and variance, so the summary of
+a sweep is available after every run without holding the rows.
+ConvergenceMonitor tracks the key metrics of each run row and reports when
+every metric's confidence interval is narrower than a target half-width.
+
+Rows are folded in Run ID order whatever order they arrive in (runs finish
+out of order on a process pool), so the run at which a sweep stops depends
+only on the seed, never on the worker count or timing.
+"""
+import math
+from statistics import NormalDist
+
+try:
+    from scipy.stats import t as _student_t
+except ImportError:
+    _student_t = None
+
+# Metrics of a flatten_stats() row tracked by default
+CONVERGENCE_METRICS = (
+    "Total Infected",
+    "Total Deaths",
+    "Infection Rate (%)",
+    "Mortality Rate (%)",
+    "Vaccine Stockout (%)",
+)
+
+
+def t_quantile(p: float, dof: int) -> float:
+    """
+    Student-t quantile. Uses scipy.stats.t.ppf when scipy is installed.
+    Without scipy, dof 1-4 are computed exactly, dof 1, 2 and 4 in closed
+    form and dof 3 by Newton's method on its CDF. From 5 degrees of freedom
+    it uses the Cornish-Fisher expansion of the normal quantile (Abramowitz
+    & Stegun 26.7.5), which is accurate to ~1e-3 there.
+    """
+    if dof <= 0:
+        return math.inf
+    if _student_t is not None:
+        return float(_student_t.ppf(p, dof))
+    if dof == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if dof == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    if dof == 4:
+        a = 4 * p * (1 - p)
+        q = math.cos(math.acos(math.sqrt(a)) / 3) / math.sqrt(a)
+        return math.copysign(2 * math.sqrt(q - 1), p - 0.5)
+    z = NormalDist().inv_cdf(p)
+    g1 = (z ** 3 + z) / 4
+    g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96
+    g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384
+    g4 = (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160
+    t = z + g1 / dof + g2 / dof ** 2 + g3 / dof ** 3 + g4 / dof ** 4
+    if dof == 3:
+        # Newton on F(t) = 1/2 + (atan(u) + u / (1 + u^2)) / pi with u = t / sqrt(3), from the expansion's guess
+        for _ in range(50):
+            u = t / math.sqrt(3)
+            cdf = 0.5 + (math.atan(u) + u / (1 + u * u)) / math.pi
+            pdf = 6 * math.sqrt(3) / (math.pi * (3 + t * t) ** 2)
+            step = (cdf - p) / pdf
+            t -= step
+            if abs(step) < 1e-12 * max(1.0, abs(t)):
+                break
+    return t
+
+
+class RunningStats:
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        # Welford's update: numerically stable in one pass
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (n - 1 denominator)."""
+        return self._m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def half_width(self, confidence: float = 0.95) -> float:
+        """Half-width of the t confidence interval for the mean."""
+        if self.count < 2:
+            return math.inf
+        return t_quantile(0.5 + confidence / 2, self.count - 1) * self.std / math.sqrt(self.count)
+
+    def ci(self, confidence: float = 0.95):
+        h = self.half_width(confidence)
+        return self.mean - h, self.mean + h
+
+
+class ConvergenceMonitor:
+
+    def __init__(self, target_half_width=None, relative=False, confidence=0.95, min_runs=10,
+                 metrics=CONVERGENCE_METRICS, first_run_id=1):
+        """
+        target_half_width: a number for every metric, or {metric: width};
+        None never stops. With relative=True the target is a fraction of the
+        metric's mean (0.05 = CI within +/-5% of the mean). The rule is only
+        checked once min_runs runs have been folded in.
+        """
+        self.metrics = tuple(metrics)
+        if isinstance(target_half_width, dict):
+            unknown = set(target_half_width) - set(self.metrics)
+            if unknown:
+                raise ValueError(f"No such tracked metrics: {sorted(unknown)}")
+        self.target_half_width = target_half_width
+        self.relative = relative
+        self.confidence = confidence
+        self.min_runs = max(min_runs, 2)
+        self.stats = {m: RunningStats() for m in self.metrics}
+        self.next_run_id = first_run_id
+        self.stopped_at = None
+        self._pending = {}
+
+    @property
+    def count(self) -> int:
+        return self.stats[self.metrics[0]].count if self.metrics else 0
+
+    @property
+    def converged(self) -> bool:
+        return self.stopped_at is not None
+
+    def add(self, row):
+        """
+        Folds in a run row (any arrival order). Returns True once the sweep
+        has converged; rows after the stopping run are ignored.
+        """
+        self._pending[row["Run ID"]] = row
+        while not self.converged and self.next_run_id in self._pending:
+            row = self._pending.pop(self.next_run_id)
+            for m in self.metrics:
+                self.stats[m].add(row[m])
+            if self._check():
+                self.stopped_at = self.next_run_id
+            self.next_run_id += 1
+        return self.converged
+
+    def _target(self, metric):
+        if isinstance(self.target_half_width, dict):
+            return self.target_half_width.get(metric)
+        return self.target_half_width
+
+    def _check(self):
+        if self.target_half_width is None or self.count < self.min_runs:
+            return False
+        for m in self.metrics:
+            target = self._target(m)
+            if target is None:
+                continue
+            if self.relative:
+                target *= abs(self.stats[m].mean)
+            if not self.stats[m].half_width(self.confidence) <= target:
+                return False
+        return True
+
+    def summary(self):
+        """{metric: {"n", "mean", "std", "min", "max", "ci_low", "ci_high", "half_width"}}."""
+        out = {}
+        for m, s in self.stats.items():
+            low, high = s.ci(self.confidence)
+            out[m] = {"n": s.count, "mean": s.mean, "std": s.std, "min": s.min, "max": s.max,
+                      "ci_low": low, "ci_high": high, "half_width": s.half_width(self.confidence)}
+        return out
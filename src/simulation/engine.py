@@ -2,50 +2,75 @@ import numpy as np
 
 import models.agent as agent
 import models.hospital as hospital
-
-
-def create_hospitals(NumOfHospitals, StateSpace, CityPopulation):
+from utils.random_utils import get_rng, BatchedDraws
+from simulation.compartments import transition
+from simulation.events import NATURAL_RECOVERY, DEATH, TREATMENT, VACCINATION
+from simulation.vectorized import move_arrays
+from models.agent import HealthState, VaccineTypes
+from models.population import HEALTHY, INFECTED, INFECTIOUS, IMMUNE, DEAD
+from models.parameters import AgentParameters
+from utils.config_loader import DEFAULT_CONFIG
+
+# Health states that can infect others / be treated (members, so `in` matches by identity)
+SICK = (HealthState.INFECTED, HealthState.INFECTIOUS)
+
+
+def create_hospitals(NumOfHospitals, StateSpace, CityPopulation, rng=None, config=None):
+    rng = get_rng(rng)
+    hc = (config or DEFAULT_CONFIG).hospital
     hospitals = []
     # Ensure at least a minimum capacity for small simulations
-    calculated_capacity = (CityPopulation / 1000) * 2.35
-    bed_capacity = max(5, int(calculated_capacity))
+    calculated_capacity = (CityPopulation / 1000) * hc.beds_per_1000
+    bed_capacity = max(hc.min_beds, int(calculated_capacity))
     
     for i in range(NumOfHospitals):
-        x = np.random.randint(0, StateSpace)
-        y = np.random.randint(0, StateSpace)
-        vaccine_type = "Type 1" if i % 2 == 0 else "Type 2"
-        hosp = hospital.Hospital(location=(x, y), vaccine_capacity=10, vaccine_type=vaccine_type, admin_speed=5, bed_capacity=bed_capacity)
+        x = int(rng.integers(0, StateSpace))
+        y = int(rng.integers(0, StateSpace))
+        vaccine_type = hc.vaccine_types[i % len(hc.vaccine_types)]
+        hosp = hospital.Hospital(location=(x, y), vaccine_capacity=hc.vaccine_capacity, vaccine_type=vaccine_type,
+                                 admin_speed=hc.admin_speed, bed_capacity=bed_capacity,
+                                 treatment_success=hc.treatment_success_prob)
         hospitals.append(hosp)
     return hospitals
 
 
-def create_agents(NumAgents, StateSpace, NumSick=0):
+def create_agents(NumAgents, StateSpace, NumSick=0, rng=None, config=None):
+    rng = get_rng(rng)
+    pc = (config or DEFAULT_CONFIG).population
+    vaccine_types = VaccineTypes.from_config(config)
     agents = []
     for i in range(NumAgents):
-        loc = (np.random.randint(0, StateSpace), np.random.randint(0, StateSpace))
+        loc = (int(rng.integers(0, StateSpace)), int(rng.integers(0, StateSpace)))
                 
-        # Sampled da age from normal distribution (mean=40, std=20), clipped to [0, 90]
-        age = int(np.clip(np.random.normal(40, 20), 0, 90))
+        # Sampled da age from normal distribution (mean=40, std=20 by default), clipped to [0, 90]
+        age = int(np.clip(rng.normal(pc.age_mean, pc.age_sd), 0, pc.age_max))
         
-        health = "healthy"
+        health = HEALTHY
         if i < NumSick:
-            health = "infected"
+            health = INFECTED
             
-        ag = agent.Agent(id=i, name=f"Agent_{i}", age=age, location=loc, health=health)
+        # Names are generated on access ("Agent_<id>") instead of stored per agent
+        ag = agent.Agent(id=i, name=None, age=age, location=loc, health=health, vaccine_types=vaccine_types)
         agents.append(ag)
     return agents
 
-def randomWalk(agent, StateSpace):
+def randomWalk(agent, StateSpace, rng=None):
+    rng = get_rng(rng)
     x, y = agent.location
-    dx = int(np.random.choice([-1, 0, 1]))
-    dy = int(np.random.choice([-1, 0, 1]))
+    dx = int(rng.integers(-1, 2))
+    dy = int(rng.integers(-1, 2))
     nx = max(0, min(StateSpace - 1, x + dx))
     ny = max(0, min(StateSpace - 1, y + dy))
     agent.move((nx, ny))
 
 
-def findHosp(hospitals, agent, StateSpace):
-    
+def findHosp(hospitals, agent, StateSpace, field=None):
+    # With a NearestHospitalField the whole search is one table lookup
+    if field is not None:
+        x, y = agent.location
+        agent.move(field.next_location(x, y))
+        return
+
     closestHosp = (hospitals[0], 999999999999999)
     x, y = agent.location
     nx, ny = x, y
@@ -74,42 +99,37 @@ def findHosp(hospitals, agent, StateSpace):
 
     agent.move((nx, ny))
 
-def get_age_based_params(age):
-    if age <= 4:
-        return 0.27111401, 1.5623923
-    elif age <= 9:
-        return 0.27619241, 1.5853057
-    elif age <= 17:
-        return 0.23507195, 1.35129295
-    elif age <= 29:
-        return 0.16806533, 1.11063756
-    elif age <= 39:
-        return 0.17647801, 1.28169089
-    elif age <= 49:
-        return 0.16738755, 1.14906492
-    elif age <= 59:
-        return 0.15507585, 1.22311138
-    elif age <= 69:
-        return 0.16214078, 1.15063113
-    elif age <= 79:
-        return 0.17056577, 1.17523736
-    else:
-        return 0.20907177, 1.35574058
+def get_age_based_params(age, config=None):
+    # (mean, sd) of the transmission draw, from the config's age bands
+    return (config or DEFAULT_CONFIG).disease.transmission_params(age)
     
 
-def isTerminationConditionMet(agents):
-    living_agents = [ag for ag in agents if ag.health != "dead"]
+def isTerminationConditionMet(agents, counts=None):
+    # O(1) when live CompartmentCounts are available
+    if counts is not None:
+        return counts.is_terminal()
+
+    living_agents = [ag for ag in agents if ag.state != DEAD]
     if not living_agents:
         return True
         
-    all_healthy_or_immune = all(ag.health in ["healthy", "immune"] for ag in living_agents)
-    all_infected = all(ag.health in ["infected", "infectious"] for ag in living_agents)
+    all_healthy_or_immune = all(ag.state == HEALTHY or ag.state == IMMUNE for ag in living_agents)
+    all_infected = all(ag.state in SICK for ag in living_agents)
     return all_healthy_or_immune or all_infected
 
-def group_agents_by_location(agents):
+def group_agents_by_location(agents, grid=None):
+    # With a grid, read the groups straight from its occupancy index
+    # (index ids are positions in `agents`; create_agents assigns id == position)
+    if grid is not None:
+        ids = grid.index.ids.tolist()
+        location_agents = {}
+        for cell, start, end in zip(*(a.tolist() for a in grid.index.groups())):
+            location_agents[(cell % grid.width, cell // grid.width)] = [agents[i] for i in ids[start:end]]
+        return location_agents
+
     location_agents = {}
     for ag in agents:
-        if ag.health == "dead":
+        if ag.state == DEAD:
             continue
         loc = ag.location
         if loc not in location_agents:
@@ -117,148 +137,324 @@ def group_agents_by_location(agents):
         location_agents[loc].append(ag)
     return location_agents
 
-def process_disease_transmission(location_agents):
+def process_disease_transmission(location_agents, rng=None, stats=None, counts=None, config=None, params=None):
+    # params: AgentParameters indexed by agent id; without it the age bands are searched per agent
+    # Returns the number of new infections
+    rng = get_rng(rng)
+    disease = (config or DEFAULT_CONFIG).disease
+    infected = 0
     # Check transmission within each cell
     for loc, cell_agents in location_agents.items():
         # Check if there is at least one sick person (infected or infectious)
-        if any(a.health in ["infected", "infectious"] for a in cell_agents):
+        if any(a.state in SICK for a in cell_agents):
             for a in cell_agents:
-                if a.health == "healthy":
-                    # Check immunity based on doses
-                    infection_risk_multiplier = 1.0
-                    if a.vaccine_doses == 1:
-                        infection_risk_multiplier = 0.3 # 70% immunity
-                    elif a.vaccine_doses >= 2:
-                        infection_risk_multiplier = 0.0 # 100% immunity
+                if a.state == HEALTHY:
+                    # Check immunity based on doses (default: 70% after one dose, 100% after two)
+                    infection_risk_multiplier = disease.risk_multiplier(a.vaccine_doses)
 
                     if infection_risk_multiplier > 0:
                         # Sample from normal distribution based on age
-                        mean, sd = get_age_based_params(a.age)
-                        val = np.random.normal(mean, sd)
+                        if params is not None:
+                            mean, sd = params.transmission_mean[a.id], params.transmission_sd[a.id]
+                        else:
+                            mean, sd = disease.transmission_params(a.age)
+                        val = rng.normal(mean, sd)
                         if val > 0:
                             # Apply immunity reduction
-                            if np.random.rand() < infection_risk_multiplier:
-                                a.updateHealth("infected")
+                            if rng.random() < infection_risk_multiplier:
+                                transition(a, INFECTED, counts)
                                 a.days_infected = 0
+                                infected += 1
+                                if stats is not None:
+                                    stats.on_infection(a.age, not a.has_been_infected)
                                 a.has_been_infected = True
-
-def process_disease_progression(agents):
+    return infected
+
+def process_disease_progression(agents, rng=None, stats=None, counts=None, config=None, params=None, events=None):
+    # Returns the agents that died this step
+    # Recoveries and deaths are recorded in `events` (an EventLog) when given
+    rng = get_rng(rng)
+    disease = (config or DEFAULT_CONFIG).disease
+    died = []
     for ag in agents:
-        if ag.health == "infected":
+        if ag.state == INFECTED:
             ag.days_infected += 1
-            if ag.days_infected > 5:
-                ag.updateHealth("infectious")
-        elif ag.health == "infectious":
+            if ag.days_infected > disease.incubation_days:
+                transition(ag, INFECTIOUS, counts)
+        elif ag.state == INFECTIOUS:
             ag.days_infected += 1
             
             # Natural Recovery Logic
-            if ag.days_infected > 14:
-                recovery_prob = 0.0
-                if ag.age <= 5:
-                    recovery_prob = 0.2
-                elif ag.age < 30:
-                    recovery_prob = 0.5
-                elif 30 <= ag.age <= 39:
-                    recovery_prob = 0.3
-                elif 40 <= ag.age <= 49:
-                    recovery_prob = 0.2
-                elif 50 <= ag.age <= 59:
-                    recovery_prob = 0.1
-                elif 60 <= ag.age <= 69:
-                    recovery_prob = 0.05
+            if ag.days_infected > disease.recovery_after_days:
+                if params is not None:
+                    recovery_prob = params.recovery_prob[ag.id]
+                else:
+                    recovery_prob = disease.recovery_probability(ag.age)
                 
-                if recovery_prob > 0 and np.random.rand() < recovery_prob:
-                    ag.updateHealth("immune")
+                if recovery_prob > 0 and rng.random() < recovery_prob:
+                    transition(ag, IMMUNE, counts)
                     ag.immunity_reason = "natural"
-                    print(f"Agent {ag.id} (Age {ag.age}) naturally recovered.")
+                    if stats is not None:
+                        stats.on_recovery("natural")
+                    if events is not None:
+                        events.record(NATURAL_RECOVERY, ag.id)
                     continue # Skip death check if recovered
 
             # If a agent has been infectious and is not immune and has not recived a vaccine within 2 day
             # infectious starts after day 5. So > 7 means they have been infectious for more than 2 days.
-            if ag.days_infected > 15:
+            if ag.days_infected > disease.death_after_days:
                 # Mean: -0.0189952, SD: 100.84830196 (Corrected SD from 0.84... to 100.84...)
-                risk_score = abs(np.random.normal(-0.0189952, 0.084830196))
-                # print(f"Agent {ag.id} risk score: {risk_score}")
+                risk_score = abs(rng.normal(disease.death_risk_mean, disease.death_risk_sd))
 
                 # If the risk score is higher than a random number between 0 and 1, the agent dies.
                 # (Negative scores will never kill, scores > 1 will always kill)
-                if risk_score > np.random.rand(): 
-                    ag.updateHealth("dead")
-                    print(f"Agent {ag.id} has died after being infectious for {ag.days_infected} days.")
-
-# Main simulation step:
-
-def step(agents, hospitals, grid, StateSpace):
-    # Moves each agent one step to a random neighboring cell (including staying put),
-    # then rebuilds the grid occupancy accordingly.
-    
-    active_hospitals = [h for h in hospitals if h.active]
+                if risk_score > rng.random(): 
+                    transition(ag, DEAD, counts)
+                    died.append(ag)
+                    if stats is not None:
+                        stats.on_death(ag.age, ag.vaccine_doses)
+                    if events is not None:
+                        events.record(DEATH, ag.id)
+    return died
+
+def process_hospital_interactions(agents, hospitals, grid, rng=None, stats=None, counts=None, config=None,
+                                  params=None, events=None):
+    # Patients are read from the grid's occupancy index (one cell lookup per
+    # hospital) instead of scanning every agent for every hospital.
+    # Returns the number of vaccine doses given
+    # Treatments and vaccinations are recorded in `events` with the hospital's index
+    rng = get_rng(rng)
+    hc = (config or DEFAULT_CONFIG).hospital
+    if params is None:
+        params = AgentParameters.from_agents(agents, config)
+    eligible = params.treatment_eligible
+    # Bits follow the mapping the agents were created with
+    vaccine_types = agents[0].vaccine_types if len(agents) else VaccineTypes.from_config(config)
+    doses = 0
+    for h, hosp in enumerate(hospitals):
+        x, y = hosp.location
+        patients_here = [agents[i] for i in grid.agents_at(x, y) if agents[i].state != DEAD]
+        hosp.update_occupancy(len(patients_here))
+        
+        if not hosp.active:
+            continue
 
+        bit = vaccine_types.bit(hosp.vaccine_type)
+        vaccine_queue = []
+        for ag in patients_here:
+            # Treatment for Sick Agents (Over 30, > 14 days by default)
+            if ag.state in SICK and eligible[ag.id] and ag.days_infected > hc.treatment_after_days:
+                if hosp.treat_patient(rng):
+                    transition(ag, IMMUNE, counts)
+                    ag.immunity_reason = "treatment"
+                    if stats is not None:
+                        stats.on_recovery("treatment")
+                    if events is not None:
+                        events.record(TREATMENT, ag.id, h)
+            
+            # Vaccination for Healthy Agents
+            # Agent only takes vaccine if they haven't received this type yet and aren't fully immune
+            # And they are healthy (Vaccines are for prevention)
+            elif ag.state == HEALTHY and ag.vaccine_doses < 2 and not ag.vaccine_mask & bit:
+                vaccine_queue.append(ag)
+
+        # Doses go out in arrival order until the stock runs out
+        granted = hosp.administer_vaccines(len(vaccine_queue))
+        doses += granted
+        if stats is not None:
+            stats.on_vaccine_requests(len(vaccine_queue), len(vaccine_queue) - granted)
+        for ag in vaccine_queue[:granted]:
+            old_doses = ag.vaccine_doses
+            ag.vaccine_mask |= bit
+            ag.vaccine_doses = bin(ag.vaccine_mask).count("1")
+            if stats is not None:
+                stats.on_vaccination(old_doses, ag.vaccine_doses)
+            if events is not None:
+                events.record(VACCINATION, ag.id, h)
+            if ag.vaccine_doses >= 2:
+                transition(ag, IMMUNE, counts)
+                ag.immunity_reason = "vaccine"
+                if stats is not None:
+                    stats.on_recovery("vaccine")
+    return doses
+
+def process_movement(agents, hospitals, grid, StateSpace, rng=None, config=None, params=None, profiler=None):
+    # Moves every living agent one cell: toward the nearest active hospital when
+    # seeking treatment or a vaccine, otherwise a random walk.
+    # Returns (living_ids, xs, ys, dead_ids) for the grid occupancy update.
+    # A TickProfiler gets the number of agents moved and of hospital seekers.
+    rng = get_rng(rng)
+    hc = (config or DEFAULT_CONFIG).hospital
+    if params is None:
+        params = AgentParameters.from_agents(agents, config)
+    eligible = params.treatment_eligible
+    # Recomputed only when some hospital's active flag has changed
+    field = grid.hospital_field(hospitals)
+    any_active = field.any_active
+
+    living_ids, xs, ys, dead_ids = [], [], [], []
+    seekers = 0
     for ag in agents:
-        if ag.health == "dead":
+        if ag.state == DEAD:
+            dead_ids.append(ag.id)
             continue
             
         # Movement Logic
         # 1. Hospital Treatment Seeking (Over 30, Sick, > 14 days)
-        if active_hospitals and ag.age >= 30 and ag.health in ["infected", "infectious"] and ag.days_infected > 14:
-             findHosp(active_hospitals, ag, StateSpace)
+        if any_active and eligible[ag.id] and ag.state in SICK and ag.days_infected > hc.treatment_after_days:
+             findHosp(hospitals, ag, StateSpace, field)
+             seekers += 1
         # 2. Probabilistic Vaccine Seeking (Healthy/Others, small chance)
         # Every agent (regardless of health) has a small random chance each step to seek vaccine
         # But we prioritize treatment seeking for those who need it above.
-        elif active_hospitals and np.random.rand() < 0.05: 
-            findHosp(active_hospitals, ag, StateSpace)
+        elif any_active and rng.random() < hc.vaccine_seeking_prob: 
+            findHosp(hospitals, ag, StateSpace, field)
+            seekers += 1
         else:
-            randomWalk(ag, StateSpace)
-
-    location_agents = group_agents_by_location(agents)
-
-    process_disease_transmission(location_agents)
+            randomWalk(ag, StateSpace, rng)
 
-    process_disease_progression(agents)
-
-    # --- Hospital Interaction Logic ---
-    for hosp in hospitals:
-        # Count agents at this hospital's location
-        patients_here = [ag for ag in agents if ag.location == hosp.location and ag.health != "dead"]
-        hosp.update_occupancy(len(patients_here))
-        
-        if hosp.active:
-            for ag in patients_here:
-                # Treatment for Sick Agents (Over 30, > 14 days)
-                if ag.health in ["infected", "infectious"] and ag.age >= 30 and ag.days_infected > 14:
-                    if hosp.treat_patient():
-                        ag.updateHealth("immune")
-                        ag.immunity_reason = "treatment"
-                        print(f"Agent {ag.id} (Age {ag.age}) treated and recovered at hospital.")
-                
-                # Vaccination for Healthy Agents
-                # Agent only takes vaccine if they haven't received this type yet and aren't fully immune
-                # And they are healthy (Vaccines are for prevention)
-                elif ag.health == "healthy" and ag.vaccine_doses < 2 and hosp.vaccine_type not in ag.received_vaccine_types:
-                    if hosp.administer_vaccine(1):
-                        ag.received_vaccine_types.add(hosp.vaccine_type)
-                        ag.vaccine_doses = len(ag.received_vaccine_types)
-                        if ag.vaccine_doses >= 2:
-                            ag.updateHealth("immune")
-                            ag.immunity_reason = "vaccine"
-
-    # Rebuild the grid state each step
-    grid.clear()
-    for idx, hosp in enumerate(hospitals):
-        x, y = hosp.location
-        grid.addHospital(x, y, idx)
-    for ag in agents:
-        if ag.health == "dead":
-            continue
         x, y = ag.location
-        grid.addAgent(x, y, ag.id)
+        living_ids.append(ag.id)
+        xs.append(x)
+        ys.append(y)
+    if profiler is not None:
+        profiler.count("agents_moved", len(living_ids))
+        profiler.count("hospital_seekers", seekers)
+    return living_ids, xs, ys, dead_ids
+
+def process_movement_bulk(agents, hospitals, grid, StateSpace, rng=None, config=None, params=None, profiler=None):
+    # Same contract as process_movement(), but the whole population moves in one
+    # vectorized stage (vectorized.move_arrays): three array draws per tick
+    # instead of up to three scalar draws per agent, same seek/walk rules.
+    # Positions come from the grid's occupancy index, which already holds every
+    # agent's cell as an array; only agents not on the grid yet (first tick) are
+    # read from their Agent, and only agents that changed cell are written back.
+    rng = get_rng(rng)
+    if params is None:
+        params = AgentParameters.from_agents(agents, config)
+    n = len(agents)
+    health = np.fromiter((ag.state for ag in agents), dtype=np.int8, count=n)
+    days = np.fromiter((ag.days_infected for ag in agents), dtype=np.int32, count=n)
+    cells = grid.index.cells_of(n)
+    alive = health != DEAD
+    for i in np.flatnonzero(alive & (cells < 0)).tolist():
+        ax, ay = agents[i].location
+        cells[i] = ay * grid.width + ax
+    x = (cells % grid.width).astype(np.int32)
+    y = (cells // grid.width).astype(np.int32)
+    old_x, old_y = x.copy(), y.copy()
+
+    seekers = move_arrays(x, y, health, days, params.treatment_eligible, hospitals, StateSpace, rng,
+                          grid.hospital_field(hospitals), config)
+
+    living_ids = np.flatnonzero(alive)
+    xs, ys = x[living_ids], y[living_ids]
+    moved = np.flatnonzero(alive & ((x != old_x) | (y != old_y)))
+    for i, nx, ny in zip(moved.tolist(), x[moved].tolist(), y[moved].tolist()):
+        agents[i].move((nx, ny))
+    if profiler is not None:
+        profiler.count("agents_moved", len(living_ids))
+        profiler.count("hospital_seekers", seekers)
+    return living_ids, xs, ys, np.flatnonzero(~alive)
+
+def update_grid_occupancy(grid, living_ids, xs, ys, dead_ids):
+    # Only agents whose cell changed touch the occupancy index
+    grid.remove_agents(dead_ids)
+    grid.move_agents(living_ids, xs, ys)
 
+# Main simulation step:
 
+def step(agents, hospitals, grid, StateSpace, rng=None, batched=False, stats=None, counts=None, config=None,
+         params=None, profiler=None, events=None, streams=None, bulk_movement=None):
+    # Moves each agent one step to a random neighboring cell (including staying put),
+    # then updates the grid occupancy for the agents whose cell changed.
+    # With batched=True each phase pre-draws its random numbers in one call.
+    # A StatsAccumulator passed as `stats` is updated as events happen.
+    # Health changes go through transition(), keeping `counts` (by default
+    # stats.compartments) live so the termination check is O(1).
+    # `config` (a frozen SimulationConfig, default DEFAULT_CONFIG) supplies the
+    # disease thresholds and lookup tables. `params` (AgentParameters built once
+    # per population) saves redoing the age-band lookups every tick.
+    # A TickProfiler passed as `profiler` records per-phase wall time and counts,
+    # an EventLog passed as `events` gets every recovery, death, treatment and vaccination.
+    # With `streams` (RandomStreams, common random numbers) each phase draws from
+    # its own per-tick substream instead of `rng`; this needs `stats` for the tick.
+    # bulk_movement (default: config.simulation.bulk_movement, off) moves all agents
+    # with process_movement_bulk instead of one at a time (randomWalk/findHosp).
+    # It draws from the random stream in a different order, so turning it on
+    # changes the results of a seeded run, Monte Carlo replications included.
+    rng = get_rng(rng)
+    config = config or DEFAULT_CONFIG
+    if bulk_movement is None:
+        bulk_movement = config.simulation.bulk_movement
+    if params is None:
+        params = AgentParameters.from_agents(agents, config)
+    if counts is None and stats is not None:
+        counts = stats.compartments
+    n = len(agents)
+    if profiler is not None:
+        profiler.begin_tick()
+
+    if streams is not None:
+        if stats is None:
+            raise ValueError("step() with streams needs stats for the tick number")
+        move_rng, trans_rng, prog_rng, hosp_rng = (
+            streams.generator(purpose, stats.tick)
+            for purpose in ("movement", "transmission", "progression", "treatment"))
+    else:
+        move_rng = trans_rng = prog_rng = hosp_rng = rng
+    if batched:
+        if not bulk_movement:
+            move_rng = BatchedDraws(move_rng, 3 * n)
+        trans_rng = BatchedDraws(trans_rng, n)
+        prog_rng = BatchedDraws(prog_rng, n)
+        hosp_rng = BatchedDraws(hosp_rng, 8 * len(hospitals))
+    
+    move = process_movement_bulk if bulk_movement else process_movement
+    moved = move(agents, hospitals, grid, StateSpace, move_rng, config, params, profiler)
+    if profiler is not None:
+        profiler.lap("movement")
+    update_grid_occupancy(grid, *moved)
+    if profiler is not None:
+        profiler.lap("grid_update")
+
+    location_agents = group_agents_by_location(agents, grid)
+    if profiler is not None:
+        profiler.count("occupied_cells", len(location_agents))
+        profiler.lap("grouping")
+
+    infected = process_disease_transmission(location_agents, trans_rng, stats, counts, config, params)
+    if profiler is not None:
+        profiler.count("new_infections", infected)
+        profiler.lap("transmission")
+
+    died = process_disease_progression(agents, prog_rng, stats, counts, config, params, events)
+    if profiler is not None:
+        profiler.count("deaths", len(died))
+        profiler.lap("progression")
+
+    doses = process_hospital_interactions(agents, hospitals, grid, hosp_rng, stats, counts, config, params, events)
+    if profiler is not None:
+        profiler.count("doses_given", doses)
+        profiler.lap("hospitals")
+
+    # Only the agents that died this step leave the grid
+    grid.remove_agents([ag.id for ag in died])
+    grid.sync_hospitals(hospitals)
+    if profiler is not None:
+        profiler.lap("grid_cleanup")
+
+    if stats is not None:
+        stats.end_tick()
+    if events is not None:
+        events.end_tick()
 
     # Check for termination condition
-    if isTerminationConditionMet(agents):
-        return False
-    return True
+    terminated = isTerminationConditionMet(agents, counts)
+    if profiler is not None:
+        profiler.lap("termination")
+        profiler.end_tick()
+    return not terminated
 
 def collect_stats(agents, hospitals):
     stats = {
@@ -281,7 +477,7 @@ def collect_stats(agents, hospitals):
         # Infection & Mortality
         if ag.has_been_infected:
             stats["total_infected"] += 1
-        if ag.health == "dead":
+        if ag.state == DEAD:
             stats["total_deaths"] += 1
         
         # Vaccination Status
@@ -289,13 +485,13 @@ def collect_stats(agents, hospitals):
         stats["vaccination_status"][doses] += 1
 
         # Immunity Breakdown
-        if ag.health == "immune":
+        if ag.state == IMMUNE:
             stats["immunity_breakdown"]["total"] += 1
             if ag.immunity_reason in stats["immunity_breakdown"]:
                 stats["immunity_breakdown"][ag.immunity_reason] += 1
         
         # Deaths by Vax
-        if ag.health == "dead":
+        if ag.state == DEAD:
             stats["deaths_by_vax"][doses] += 1
 
         # Age Stats
@@ -304,7 +500,7 @@ def collect_stats(agents, hospitals):
         stats["age_stats"][bucket_name]["total"] += 1
         if ag.has_been_infected:
             stats["age_stats"][bucket_name]["infected"] += 1
-        if ag.health == "dead":
+        if ag.state == DEAD:
             stats["age_stats"][bucket_name]["deaths"] += 1
 
     # Hospital Stats
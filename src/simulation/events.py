@@ -0,0 +1,194 @@
+"""
+Structured event log for the simulation engines.
+
+The step functions record one (tick, agent_id, event, hospital_id) row per
+natural recovery, death, treatment and vaccination into columnar in-memory
+buffers. Rows are written out in bulk: to a CSV or Parquet file, or handed
+to a callback as a dict of NumPy columns, every `flush_every` rows and on
+close(). Without a sink the log stays in memory (see to_frame()), up to
+`max_rows` rows; later rows are dropped and counted in `dropped`.
+
+Console output is opt-in: verbose=True prints a line per event, like the
+engine used to do unconditionally. Given the run's agents, the lines carry
+the agent's age and days infected as the engine's messages did.
+"""
+import os
+import warnings
+from array import array
+
+import numpy as np
+
+EVENT_TYPES = ("natural_recovery", "death", "treatment", "vaccination")
+NATURAL_RECOVERY, DEATH, TREATMENT, VACCINATION = range(len(EVENT_TYPES))
+
+COLUMNS = ("tick", "agent_id", "event", "hospital_id")
+
+_MESSAGES = {
+    NATURAL_RECOVERY: "Agent {agent} naturally recovered.",
+    DEATH: "Agent {agent} has died.",
+    TREATMENT: "Agent {agent} treated and recovered at hospital {hospital}.",
+    VACCINATION: "Agent {agent} vaccinated at hospital {hospital}.",
+}
+
+# With the agents at hand: the engine's original wording
+_DETAILED_MESSAGES = {
+    NATURAL_RECOVERY: "Agent {agent} (Age {age}) naturally recovered.",
+    DEATH: "Agent {agent} has died after being infectious for {days} days.",
+    TREATMENT: "Agent {agent} (Age {age}) treated and recovered at hospital {hospital} after {days} days.",
+    VACCINATION: "Agent {agent} vaccinated at hospital {hospital}.",
+}
+
+
+class EventLog:
+
+    def __init__(self, path=None, callback=None, flush_every: int = 100_000, verbose: bool = False,
+                 max_rows: int = 1_000_000, agents=None):
+        # path: *.csv or *.parquet (needs pyarrow); callback(columns) gets a dict of arrays per flush
+        # max_rows: rows kept without a sink (None keeps everything, 0 only prints)
+        # agents: Agent list or Population the verbose lines read age and days infected from
+        if path is not None and path.endswith(".parquet"):
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("Writing the event log as Parquet requires pyarrow; use a .csv path") from None
+        self.path = path
+        self.callback = callback
+        self.flush_every = flush_every
+        self.verbose = verbose
+        self.max_rows = max_rows
+        self.agents = agents
+        self.tick = 0
+        self.total_events = 0
+        self.dropped = 0
+        self._parquet_writer = None
+        self._csv_started = False
+        self._new_buffers()
+
+    def _new_buffers(self):
+        self._tick = array("q")
+        self._agent = array("q")
+        self._event = array("b")
+        self._hospital = array("q")
+
+    def __len__(self) -> int:
+        return len(self._agent)
+
+    @property
+    def has_sink(self) -> bool:
+        return self.path is not None or self.callback is not None
+
+    # --- Recording (called from the step functions) ---
+
+    def record(self, event: int, agent_id: int, hospital_id: int = -1):
+        if self._room(1):
+            self._tick.append(self.tick)
+            self._agent.append(agent_id)
+            self._event.append(event)
+            self._hospital.append(hospital_id)
+        if self.verbose:
+            self._print(event, agent_id, hospital_id)
+
+    def record_many(self, event: int, agent_ids, hospital_id: int = -1):
+        """Same as record() for every id in `agent_ids` (array backends)."""
+        agent_ids = np.asarray(agent_ids, dtype=np.int64)
+        n = len(agent_ids)
+        if n == 0:
+            return
+        kept = self._room(n)
+        self._tick.extend([self.tick] * kept)
+        self._agent.frombytes(agent_ids[:kept].tobytes())
+        self._event.extend([event] * kept)
+        self._hospital.extend([hospital_id] * kept)
+        if self.verbose:
+            for agent_id in agent_ids:
+                self._print(event, int(agent_id), hospital_id)
+
+    def _room(self, n: int) -> int:
+        # How many of n new rows fit; a sink is flushed instead, so it never drops rows
+        if self.has_sink or self.max_rows is None:
+            return n
+        room = min(n, max(self.max_rows - len(self), 0))
+        if room < n:
+            if self.dropped == 0 and self.max_rows > 0:
+                warnings.warn(f"EventLog without a sink is full ({self.max_rows} rows); dropping later events. "
+                              f"Give it a path or callback, or a larger max_rows.", RuntimeWarning, stacklevel=3)
+            self.dropped += n - room
+        return room
+
+    def _print(self, event: int, agent_id: int, hospital_id: int):
+        if self.agents is None:
+            line = _MESSAGES[event].format(agent=agent_id, hospital=hospital_id)
+        else:
+            agents = self.agents.agents() if hasattr(self.agents, "agents") else self.agents
+            ag = agents[agent_id]
+            line = _DETAILED_MESSAGES[event].format(agent=agent_id, hospital=hospital_id, age=ag.age,
+                                                    days=ag.days_infected)
+        print(f"Tick {self.tick}: " + line)
+
+    def end_tick(self):
+        self.tick += 1
+        if self.has_sink and len(self) >= self.flush_every:
+            self.flush()
+
+    # --- Output ---
+
+    def columns(self):
+        """The buffered rows as a dict of NumPy arrays."""
+        return {
+            "tick": np.frombuffer(self._tick, dtype=np.int64).copy(),
+            "agent_id": np.frombuffer(self._agent, dtype=np.int64).copy(),
+            "event": np.frombuffer(self._event, dtype=np.int8).copy(),
+            "hospital_id": np.frombuffer(self._hospital, dtype=np.int64).copy(),
+        }
+
+    def to_frame(self):
+        """Buffered rows as a DataFrame with event names; everything not yet flushed."""
+        import pandas as pd
+
+        cols = self.columns()
+        cols["event"] = pd.Categorical.from_codes(cols["event"], categories=EVENT_TYPES)
+        return pd.DataFrame(cols, columns=COLUMNS)
+
+    def flush(self):
+        """Writes the buffered rows to the sink and clears the buffers (no-op without a sink)."""
+        if not self.has_sink or len(self) == 0:
+            return
+        if self.callback is not None:
+            self.callback(self.columns())
+        if self.path is not None:
+            self._write(self.to_frame())
+        self.total_events += len(self)
+        self._new_buffers()
+
+    def _write(self, frame):
+        if self.path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            # The first flush of this log starts a fresh file
+            header = not self._csv_started or not os.path.exists(self.path)
+            frame.to_csv(self.path, mode="w" if header else "a", header=header, index=False)
+            self._csv_started = True
+
+    def close(self):
+        self.flush()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getstate__(self):
+        # An open Parquet writer cannot be copied; a copy starts a new file
+        state = self.__dict__.copy()
+        state["_parquet_writer"] = None
+        return state
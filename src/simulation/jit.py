@@ -0,0 +1,381 @@
+"""
+Optional Numba backend for the array engine.
+
+step_numba() runs the same tick as vectorized.step_vectorized(), but
+movement, transmission, progression and the hospital phase are explicit
+per-agent loops compiled with numba.njit. The hospital phase in particular
+is sequential (each hospital's vaccine stock runs out in arrival order and
+later hospitals see earlier ones' health changes), which a loop expresses
+directly.
+
+All random numbers are drawn up front with NumPy, in the same order and
+amounts as step_vectorized(), so both backends produce identical states
+from the same seed. When numba is not installed step_numba() falls back to
+step_vectorized(); the kernels can still be run as plain Python (slowly)
+with fallback=False, which is what parity_check() uses.
+
+    python -m simulation.jit     # from src/: parity check against NumPy and the reference step()
+    pytest tests/test_jit_parity.py
+"""
+import numpy as np
+
+from models.population import (
+    HEALTHY,
+    INFECTED,
+    INFECTIOUS,
+    IMMUNE,
+    DEAD,
+    IMMUNITY_CODES,
+    POPCOUNT,
+)
+from simulation.vectorized import (
+    move_population, hospital_occupants, treat_and_vaccinate, step_vectorized, is_termination_condition_met,
+)
+from simulation.events import NATURAL_RECOVERY, DEATH
+from utils.config_loader import DEFAULT_CONFIG
+from utils.random_utils import get_rng
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+_NATURAL = IMMUNITY_CODES["natural"]
+_TREATMENT = IMMUNITY_CODES["treatment"]
+_VACCINE = IMMUNITY_CODES["vaccine"]
+
+
+def _njit(fn):
+    return numba.njit(cache=True)(fn) if NUMBA_AVAILABLE else fn
+
+
+@_njit
+def _move_kernel(x, y, health, days, eligible, seek_roll, dx, dy, step_x, step_y,
+                 treatment_after_days, seek_prob, size):
+    # Returns the number of hospital seekers
+    seekers = 0
+    for i in range(len(x)):
+        h = health[i]
+        if h == DEAD:
+            continue
+        sick = h == INFECTED or h == INFECTIOUS
+        if (eligible[i] and sick and days[i] > treatment_after_days) or seek_roll[i] < seek_prob:
+            xi, yi = x[i], y[i]
+            x[i] = xi + step_x[yi, xi]
+            y[i] = yi + step_y[yi, xi]
+            seekers += 1
+        else:
+            x[i] = min(max(x[i] + dx[i], 0), size - 1)
+            y[i] = min(max(y[i] + dy[i], 0), size - 1)
+    return seekers
+
+
+@_njit
+def _exposed_kernel(cells, health, num_cells):
+    # Healthy agents sharing a cell with an infected/infectious one, in id order
+    sick = np.zeros(num_cells, np.int64)
+    for i in range(len(cells)):
+        if health[i] == INFECTED or health[i] == INFECTIOUS:
+            sick[cells[i]] += 1
+    out = np.empty(len(cells), np.int64)
+    k = 0
+    for i in range(len(cells)):
+        if health[i] == HEALTHY and sick[cells[i]] > 0:
+            out[k] = i
+            k += 1
+    return out[:k]
+
+
+@_njit
+def _progress_kernel(health, days, immunity_reason, recovery_prob, recovery_roll, risk_score, death_roll,
+                     incubation_days, recovery_after_days, death_after_days):
+    n = len(health)
+    progressed = np.zeros(n, np.bool_)
+    recovered = np.zeros(n, np.bool_)
+    died = np.zeros(n, np.bool_)
+    for i in range(n):
+        h = health[i]
+        if h == INFECTED:
+            days[i] += 1
+            if days[i] > incubation_days:
+                health[i] = INFECTIOUS
+                progressed[i] = True
+        elif h == INFECTIOUS:
+            days[i] += 1
+            if days[i] > recovery_after_days and recovery_roll[i] < recovery_prob[i]:
+                health[i] = IMMUNE
+                immunity_reason[i] = _NATURAL
+                recovered[i] = True
+            elif days[i] > death_after_days and risk_score[i] > death_roll[i]:
+                health[i] = DEAD
+                died[i] = True
+    return progressed, recovered, died
+
+
+@_njit
+def _hospital_kernel(health, days, eligible, doses, vaccine_mask, immunity_reason, popcount,
+                     offsets, ids, active, bits, success, capacity, requests, stockouts,
+                     treatment_rolls, treatment_after_days):
+    # cured_from[code]: treated agents by previous health code
+    cured_from = np.zeros(5, np.int64)
+    n_full = 0
+    old_doses = np.empty(len(ids), np.int64)
+    new_doses = np.empty(len(ids), np.int64)
+    n_vaccinated = 0
+    new_requests = 0
+    new_stockouts = 0
+    used = 0
+    for k in range(len(active)):
+        if not active[k]:
+            continue
+        remaining = max(capacity[k], 0)
+        n_eligible = 0
+        for j in range(offsets[k], offsets[k + 1]):
+            i = ids[j]
+            h = health[i]
+            if (h == INFECTED or h == INFECTIOUS) and eligible[i] and days[i] > treatment_after_days:
+                if treatment_rolls[used] < success[k]:
+                    health[i] = IMMUNE
+                    immunity_reason[i] = _TREATMENT
+                    cured_from[h] += 1
+                used += 1
+            elif h == HEALTHY and doses[i] < 2 and (vaccine_mask[i] & bits[k]) == 0:
+                n_eligible += 1
+                if remaining > 0:
+                    remaining -= 1
+                    old_doses[n_vaccinated] = doses[i]
+                    vaccine_mask[i] |= bits[k]
+                    doses[i] = popcount[vaccine_mask[i]]
+                    new_doses[n_vaccinated] = doses[i]
+                    n_vaccinated += 1
+                    if doses[i] >= 2:
+                        health[i] = IMMUNE
+                        immunity_reason[i] = _VACCINE
+                        n_full += 1
+        granted = min(n_eligible, max(capacity[k], 0))
+        capacity[k] -= granted
+        requests[k] += n_eligible
+        stockouts[k] += n_eligible - granted
+        new_requests += n_eligible
+        new_stockouts += n_eligible - granted
+    return cured_from, n_full, old_doses[:n_vaccinated], new_doses[:n_vaccinated], new_requests, new_stockouts
+
+
+def step_numba(pop, hospitals, grid, StateSpace, rng=None, stats=None, counts=None, config=None, fallback=True,
+               profiler=None, events=None, streams=None):
+    """
+    Numba version of vectorized.step_vectorized(), same arguments and result.
+    Without numba (and fallback=True) this simply calls step_vectorized().
+    With an event log the hospital phase runs treat_and_vaccinate() (same
+    draws, same result), since the kernel does not report individual agents.
+    Common random numbers (`streams`) always run step_vectorized().
+    """
+    if streams is not None or (fallback and not NUMBA_AVAILABLE):
+        return step_vectorized(pop, hospitals, grid, StateSpace, rng=rng, stats=stats, counts=counts, config=config,
+                               profiler=profiler, events=events, streams=streams)
+
+    rng = get_rng(rng)
+    config = config or DEFAULT_CONFIG
+    disease, hc = config.disease, config.hospital
+    if counts is None and stats is not None:
+        counts = stats.compartments
+    params = pop.parameters(config)
+    n = len(pop)
+    if profiler is not None:
+        profiler.begin_tick()
+
+    # Movement (draws: seek roll, dx, dy)
+    field = grid.hospital_field(hospitals) if grid is not None else None
+    seekers = 0
+    if field is None:
+        seekers = move_population(pop, hospitals, StateSpace, rng, None, config)
+    else:
+        seek_roll = rng.random(n)
+        dx = rng.integers(-1, 2, n)
+        dy = rng.integers(-1, 2, n)
+        if field.any_active:
+            seekers = _move_kernel(pop.x, pop.y, pop.health, pop.days_infected, params.treatment_eligible, seek_roll,
+                         dx, dy, field.step_x, field.step_y, hc.treatment_after_days, hc.vaccine_seeking_prob,
+                         StateSpace)
+        else:
+            # Nobody seeks a hospital: a plain clipped random walk
+            alive = pop.health != DEAD
+            pop.x[alive] = np.clip(pop.x[alive] + dx[alive], 0, StateSpace - 1)
+            pop.y[alive] = np.clip(pop.y[alive] + dy[alive], 0, StateSpace - 1)
+    if profiler is not None:
+        profiler.count("agents_moved", int(np.count_nonzero(pop.health != DEAD)))
+        profiler.count("hospital_seekers", seekers)
+        profiler.lap("movement")
+
+    if grid is not None:
+        alive = pop.health != DEAD
+        grid.remove_agents(np.flatnonzero(~alive))
+        living = np.flatnonzero(alive)
+        grid.move_agents(living, pop.x[living], pop.y[living])
+        if profiler is not None:
+            profiler.count("occupied_cells", len(grid.index.occupied_cells()))
+    if profiler is not None:
+        profiler.lap("grid_update")
+
+    # Transmission (draw: one uniform per exposed agent)
+    exposed = _exposed_kernel(pop.cell_ids(StateSpace), pop.health, StateSpace * StateSpace)
+    p = params.infection_prob[exposed] * disease.dose_multiplier[np.minimum(pop.vaccine_doses[exposed], 2)]
+    newly = exposed[rng.random(len(exposed)) < p]
+    pop.health[newly] = INFECTED
+    pop.days_infected[newly] = 0
+    pop.has_been_infected[newly] = True
+    if counts is not None:
+        counts.move(HEALTHY, INFECTED, len(newly))
+    if stats is not None:
+        stats.on_infections(pop.age[newly])
+    if profiler is not None:
+        profiler.count("new_infections", len(newly))
+        profiler.lap("transmission")
+
+    # Progression (draws: recovery roll, death risk, death roll)
+    recovery_roll = rng.random(n)
+    risk_score = np.abs(rng.normal(disease.death_risk_mean, disease.death_risk_sd, n))
+    death_roll = rng.random(n)
+    progressed, recovered, died = _progress_kernel(
+        pop.health, pop.days_infected, pop.immunity_reason, params.recovery_prob, recovery_roll, risk_score,
+        death_roll, disease.incubation_days, disease.recovery_after_days, disease.death_after_days)
+    if counts is not None:
+        counts.move(INFECTED, INFECTIOUS, int(progressed.sum()))
+        counts.move(INFECTIOUS, IMMUNE, int(recovered.sum()))
+        counts.move(INFECTIOUS, DEAD, int(died.sum()))
+    if stats is not None:
+        stats.on_recovery("natural", int(recovered.sum()))
+        stats.on_deaths(pop.age[died], pop.vaccine_doses[died])
+    if events is not None:
+        events.record_many(NATURAL_RECOVERY, np.flatnonzero(recovered))
+        events.record_many(DEATH, np.flatnonzero(died))
+    if profiler is not None:
+        profiler.count("deaths", int(died.sum()))
+        profiler.lap("progression")
+
+    # Hospitals (draw: one uniform per occupant, as in treat_and_vaccinate)
+    if events is not None:
+        doses = treat_and_vaccinate(pop, hospitals, rng, StateSpace, grid, stats, counts, config, events)
+        if profiler is not None:
+            profiler.count("doses_given", doses)
+    elif hospitals:
+        occupants = hospital_occupants(pop, hospitals, StateSpace, grid)
+        treatment_rolls = rng.random(sum(len(ids) for ids in occupants))
+        for hosp, here in zip(hospitals, occupants):
+            hosp.update_occupancy(len(here))
+        offsets = np.zeros(len(hospitals) + 1, dtype=np.int64)
+        np.cumsum([len(ids) for ids in occupants], out=offsets[1:])
+        ids = np.concatenate(occupants).astype(np.int64)
+        capacity = np.array([h.vaccine_capacity for h in hospitals], dtype=np.int64)
+        requests = np.array([h.vaccine_requests for h in hospitals], dtype=np.int64)
+        stockouts = np.array([h.vaccine_stockouts for h in hospitals], dtype=np.int64)
+
+        cured_from, n_full, old_doses, new_doses, new_requests, new_stockouts = _hospital_kernel(
+            pop.health, pop.days_infected, params.treatment_eligible, pop.vaccine_doses, pop.vaccine_mask,
+            pop.immunity_reason, POPCOUNT, offsets, ids,
+            np.array([h.active for h in hospitals], dtype=np.bool_),
+            np.array([pop.vaccine_types.bit(h.vaccine_type) for h in hospitals], dtype=np.uint8),
+            np.array([h.treatment_success for h in hospitals], dtype=np.float64),
+            capacity, requests, stockouts, treatment_rolls, hc.treatment_after_days)
+
+        for k, hosp in enumerate(hospitals):
+            hosp.vaccine_capacity = int(capacity[k])
+            hosp.vaccine_requests = int(requests[k])
+            hosp.vaccine_stockouts = int(stockouts[k])
+        if counts is not None:
+            counts.move(INFECTED, IMMUNE, int(cured_from[INFECTED]))
+            counts.move(INFECTIOUS, IMMUNE, int(cured_from[INFECTIOUS]))
+            counts.move(HEALTHY, IMMUNE, int(n_full))
+        if stats is not None:
+            stats.on_recovery("treatment", int(cured_from.sum()))
+            stats.on_vaccine_requests(int(new_requests), int(new_stockouts))
+            stats.on_vaccinations(old_doses, new_doses)
+            stats.on_recovery("vaccine", int(n_full))
+        if profiler is not None:
+            profiler.count("doses_given", len(new_doses))
+    if profiler is not None:
+        profiler.lap("hospitals")
+
+    if grid is not None:
+        grid.remove_agents(np.flatnonzero(died))
+        grid.sync_hospitals(hospitals)
+    if profiler is not None:
+        profiler.lap("grid_cleanup")
+
+    if stats is not None:
+        stats.end_tick()
+    if events is not None:
+        events.end_tick()
+
+    terminated = is_termination_condition_met(pop, counts)
+    if profiler is not None:
+        profiler.lap("termination")
+        profiler.end_tick()
+    return not terminated
+
+
+def _check(condition, message):
+    # Explicit raise rather than assert, so python -O still checks
+    if not condition:
+        raise AssertionError(message)
+
+
+def exact_parity(seed=0, ticks=60, NumAgents=300):
+    """
+    Kernel path (compiled if numba is installed, plain Python otherwise)
+    against step_vectorized(): identical population arrays, stats and
+    termination after every tick from the same seed. Raises AssertionError
+    on a mismatch; returns the number of ticks checked.
+    """
+    from simulation.simulation import Simulation
+
+    a = Simulation.create(seed=seed, NumAgents=NumAgents, backend="numpy")
+    b = Simulation.create(seed=seed, NumAgents=NumAgents, backend="numpy")
+    for tick in range(ticks):
+        more_a = a.step()
+        more_b = step_numba(b.agents, b.hospitals, b.grid, b.StateSpace, rng=b.rng, stats=b.stats,
+                            config=b.config, fallback=False)
+        for name in ("x", "y", "health", "days_infected", "vaccine_doses", "vaccine_mask", "immunity_reason"):
+            _check(np.array_equal(getattr(a.agents, name), getattr(b.agents, name)), f"{name} differs at tick {tick}")
+        _check(a.collect_stats() == b.collect_stats(), f"stats differ at tick {tick}")
+        _check(more_a == more_b, f"termination differs at tick {tick}")
+        if not more_a:
+            break
+    return tick + 1
+
+
+def reference_agreement(seed=0, runs=40, NumAgents=300, z_tolerance=4.0):
+    """
+    Kernel path against the reference Agent engine step(). The two consume
+    random numbers differently, so they are compared statistically: over
+    `runs` seeds spawned from `seed` the mean total infections must agree
+    within z_tolerance standard errors. Deterministic for a given seed.
+    Raises AssertionError on a mismatch; returns the summary numbers.
+    """
+    from simulation.simulation import Simulation
+
+    totals = {"reference": [], "numba": []}
+    for run in range(runs):
+        for backend, key in (("agents", "reference"), ("numba", "numba")):
+            sim = Simulation.create(seed=[seed, run], NumAgents=NumAgents, backend=backend)
+            sim.run()
+            totals[key].append(sim.collect_stats()["total_infected"])
+    ref, jit = np.array(totals["reference"]), np.array(totals["numba"])
+    z = (ref.mean() - jit.mean()) / np.sqrt(ref.var(ddof=1) / runs + jit.var(ddof=1) / runs + 1e-12)
+    _check(abs(z) < z_tolerance,
+           f"mean infections differ: reference {ref.mean():.1f} vs numba {jit.mean():.1f} (z={z:.2f})")
+    return {"reference_mean_infected": ref.mean(), "numba_mean_infected": jit.mean(), "z": z}
+
+
+def parity_check(seed=0, ticks=60, runs=40, NumAgents=300):
+    """exact_parity() and reference_agreement(); tests/test_jit_parity.py runs both under pytest."""
+    summary = {"ticks_checked": exact_parity(seed, ticks, NumAgents)}
+    summary.update(reference_agreement(seed, runs, NumAgents))
+    return summary
+
+
+if __name__ == "__main__":
+    print(f"numba available: {NUMBA_AVAILABLE}")
+    print(parity_check())
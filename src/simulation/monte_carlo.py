@@ -0,0 +1,166 @@
+"""
+Monte Carlo replication runner.
+
+Each replication is seeded from its own SeedSequence.spawn() child, so a run
+depends only on (seed, run index) and can be reproduced on its own. Runs can
+be spread over a process pool; the rows are identical for any worker count.
+Runs use the per-agent reference movement unless config.simulation.bulk_movement
+is set; the bulk path is faster but draws its random numbers in another order,
+so the same seed gives different (equally valid) replications.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import models.grid as grid
+from simulation.engine import create_hospitals
+from simulation.engine import create_agents
+from simulation.engine import step
+from simulation.stats import StatsAccumulator
+from models.parameters import AgentParameters
+from utils.config_loader import DEFAULT_CONFIG, with_overrides
+
+# Legacy parameter names -> config paths
+PARAM_PATHS = {
+    "StateSpace": "grid.size",
+    "NumOfHospitals": "hospital.count",
+    "NumAgents": "population.num_agents",
+    "SickPeople": "population.initial_infected",
+    "MaxSteps": "simulation.max_steps",
+}
+
+
+def params_from_config(config):
+    return {
+        "StateSpace": config.grid.size,
+        "NumOfHospitals": config.hospital.count,
+        "NumAgents": config.population.num_agents,
+        "SickPeople": config.population.initial_infected,
+        "MaxSteps": config.simulation.max_steps,
+    }
+
+
+# Simulation Parameters
+DEFAULT_PARAMS = params_from_config(DEFAULT_CONFIG)
+
+
+def resolve_config(params=None, config=None):
+    """`config` (default DEFAULT_CONFIG) with any legacy `params` applied on top."""
+    config = config or DEFAULT_CONFIG
+    if params:
+        config = with_overrides(config, {PARAM_PATHS[k]: v for k, v in params.items()})
+    return config
+
+
+def flatten_stats(stats, run_id):
+    # Flatten stats for DataFrame
+    row = {
+        "Run ID": run_id,
+        "Total Population": stats["total_population"],
+        "Total Infected": stats["total_infected"],
+        "Total Deaths": stats["total_deaths"],
+        "Infection Rate (%)": (stats["total_infected"] / stats["total_population"] * 100) if stats["total_population"] else 0,
+        "Mortality Rate (%)": (stats["total_deaths"] / stats["total_infected"] * 100) if stats["total_infected"] else 0,
+        "Fully Vaccinated": stats["vaccination_status"][2],
+        "Partially Vaccinated": stats["vaccination_status"][1],
+        "Unvaccinated": stats["vaccination_status"][0],
+        "Vaccine Stockout (%)": (stats["hospital_stats"]["stockouts"] / stats["hospital_stats"]["requests"] * 100) if stats["hospital_stats"]["requests"] else 0,
+        "Total Immune": stats["immunity_breakdown"]["total"],
+        "Immune (Vaccine)": stats["immunity_breakdown"]["vaccine"],
+        "Immune (Natural)": stats["immunity_breakdown"]["natural"],
+        "Immune (Treatment)": stats["immunity_breakdown"]["treatment"],
+        "Deaths (Unvaccinated)": stats["deaths_by_vax"][0],
+        "Deaths (Partial)": stats["deaths_by_vax"][1],
+        "Deaths (Full)": stats["deaths_by_vax"][2],
+    }
+
+    # Add Age Stats
+    for bucket, data in stats["age_stats"].items():
+        row[f"Age {bucket} Total"] = data["total"]
+        row[f"Age {bucket} Infected"] = data["infected"]
+        row[f"Age {bucket} Deaths"] = data["deaths"]
+        row[f"Age {bucket} Mortality (%)"] = (data["deaths"] / data["infected"] * 100) if data["infected"] else 0
+
+    return row
+
+
+def run_single_simulation(run_id, seed_seq, params=None, config=None, with_series=False):
+    """
+    Runs one replication from scratch and returns its flattened stats row,
+    or (row, per-tick time series DataFrame) with with_series=True.
+    """
+    config = resolve_config(params, config)
+    StateSpace = config.grid.size
+    max_steps = config.simulation.max_steps
+
+    rng = np.random.default_rng(seed_seq)
+
+    # Initialize Simulation
+    map_grid = grid.Grid(StateSpace, StateSpace)
+    hospitals = create_hospitals(config.hospital.count, StateSpace, config.population.num_agents, rng=rng, config=config)
+    agents = create_agents(config.population.num_agents, StateSpace, NumSick=config.population.initial_infected,
+                           rng=rng, config=config)
+
+    # Initial grid population
+    for idx, hosp in enumerate(hospitals):
+        x, y = hosp.location
+        map_grid.addHospital(x, y, idx)
+    for ag in agents:
+        x, y = ag.location
+        map_grid.addAgent(x, y, ag.id)
+
+    stats = StatsAccumulator.from_agents(agents, hospitals, max_ticks=max_steps)
+    params = AgentParameters.from_agents(agents, config)
+
+    # Run Simulation Loop
+    for _ in range(max_steps):
+        should_continue = step(agents, hospitals, map_grid, StateSpace, rng=rng, stats=stats, config=config, params=params)
+        if not should_continue:
+            break
+
+    row = flatten_stats(stats.snapshot(), run_id)
+    if with_series:
+        return row, stats.time_series_frame()
+    return row
+
+
+def spawn_run_seeds(num_runs, seed=None):
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(num_runs)
+
+
+def iter_monte_carlo_runs(num_runs, workers=1, seed=None, params=None, config=None, skip_run_ids=(),
+                          with_series=False):
+    """
+    Yields each run's flattened stats row as soon as it finishes
+    ((row, time series) pairs with with_series=True).
+
+    With workers > 1 rows arrive in completion order, not Run ID order.
+    workers=None uses one process per CPU. The config is resolved once and
+    shipped to every run as is. Run IDs in `skip_run_ids` (e.g. already in a
+    ResultsStore) are not run; the others get the same seeds as in a full sweep.
+    """
+    config = resolve_config(params, config)
+    seeds = spawn_run_seeds(num_runs, seed)
+    pending = [(run_id + 1, seed_seq) for run_id, seed_seq in enumerate(seeds) if run_id + 1 not in skip_run_ids]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        for run_id, seed_seq in pending:
+            yield run_single_simulation(run_id, seed_seq, config=config, with_series=with_series)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            pool.submit(run_single_simulation, run_id, seed_seq, config=config, with_series=with_series)
+            for run_id, seed_seq in pending
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # A consumer that stops early (e.g. on convergence) cancels the runs not yet started
+        pool.shutdown(wait=True, cancel_futures=True)
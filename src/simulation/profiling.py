@@ -0,0 +1,123 @@
+"""
+Opt-in per-tick instrumentation.
+
+Pass a TickProfiler as `profiler=` to engine.step() (or the array
+backends, or Simulation) to record the wall time of every phase and a few
+item counts for each tick. Records go into a fixed-size ring buffer, so a
+long production run keeps only the most recent `capacity` ticks, and can be
+pushed to a callback as each tick completes. With profiler=None the step
+functions only pay a few `is not None` checks.
+"""
+import time
+
+import numpy as np
+
+PHASES = (
+    "movement",
+    "grid_update",
+    "grouping",
+    "transmission",
+    "progression",
+    "hospitals",
+    "grid_cleanup",
+    "termination",
+)
+
+COUNTERS = (
+    "agents_moved",
+    "hospital_seekers",
+    "occupied_cells",
+    "new_infections",
+    "deaths",
+    "doses_given",
+)
+
+_PHASE = {name: i for i, name in enumerate(PHASES)}
+_COUNTER = {name: i for i, name in enumerate(COUNTERS)}
+
+
+class TickProfiler:
+
+    def __init__(self, capacity: int = 1024, callback=None):
+        # callback(record) is called with each finished tick's record dict
+        self.capacity = capacity
+        self.callback = callback
+        self.times = np.zeros((capacity, len(PHASES)), dtype=np.float64)
+        self.counts = np.zeros((capacity, len(COUNTERS)), dtype=np.int64)
+        self.tick_ids = np.zeros(capacity, dtype=np.int64)
+        self.total_ticks = 0
+        self._row = 0
+        self._last = 0.0
+
+    def __len__(self) -> int:
+        return min(self.total_ticks, self.capacity)
+
+    # --- Recording (called from the step functions) ---
+
+    def begin_tick(self):
+        self._row = self.total_ticks % self.capacity
+        self.times[self._row] = 0.0
+        self.counts[self._row] = 0
+        self.tick_ids[self._row] = self.total_ticks
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str):
+        """Charges the time since the previous lap (or begin_tick) to `phase`."""
+        now = time.perf_counter()
+        self.times[self._row, _PHASE[phase]] += now - self._last
+        self._last = now
+
+    def count(self, counter: str, value: int):
+        self.counts[self._row, _COUNTER[counter]] += value
+
+    def end_tick(self):
+        self.total_ticks += 1
+        if self.callback is not None:
+            self.callback(self._record(self._row))
+
+    # --- Export ---
+
+    def _record(self, row):
+        record = {"tick": int(self.tick_ids[row]), "total": float(self.times[row].sum())}
+        record.update({name: float(self.times[row, i]) for i, name in enumerate(PHASES)})
+        record.update({name: int(self.counts[row, i]) for i, name in enumerate(COUNTERS)})
+        return record
+
+    def _rows(self):
+        # Oldest to newest
+        if self.total_ticks <= self.capacity:
+            return list(range(self.total_ticks))
+        start = self.total_ticks % self.capacity
+        return list(range(start, self.capacity)) + list(range(start))
+
+    def records(self):
+        """Buffered ticks as a list of dicts, oldest first."""
+        return [self._record(row) for row in self._rows()]
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.records(), columns=["tick", "total", *PHASES, *COUNTERS])
+
+    def to_csv(self, path):
+        self.to_frame().to_csv(path, index=False)
+
+    def summary(self):
+        """Mean seconds per phase and mean counts over the buffered ticks."""
+        rows = self._rows()
+        if not rows:
+            return {}
+        times = self.times[rows].mean(axis=0)
+        counts = self.counts[rows].mean(axis=0)
+        summary = {name: float(times[i]) for i, name in enumerate(PHASES)}
+        summary["total"] = float(times.sum())
+        summary.update({name: float(counts[i]) for i, name in enumerate(COUNTERS)})
+        return summary
+
+    def reset(self):
+        """Empties the buffer: per-phase times, counts and tick ids start again from zero."""
+        self.times[:] = 0.0
+        self.counts[:] = 0
+        self.tick_ids[:] = 0
+        self.total_ticks = 0
+        self._row = 0
+        self._last = 0.0
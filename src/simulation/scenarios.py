@@ -0,0 +1,117 @@
+"""
+Scenario tree runner.
+
+Policy comparisons share the same outbreak up to a decision day. Instead of
+re-simulating from tick 0 for every intervention, each replicate runs the
+common prefix once, forks the state (Simulation.fork copies the agent and
+hospital state; the grid is rebuilt from it), applies each branch's overrides
+and runs the branches to the end, optionally on a process pool.
+
+A branch is a dict with a "name" and any of:
+
+    "vaccine_capacity": int or {hospital index: int}  -- set stock
+    "restock_vaccines": int or {hospital index: int}  -- add stock
+    "deactivate":       [hospital index, ...]         -- close hospitals
+
+Any other key is a ValueError. In particular there is no "mask" override:
+Agent.mask is stored but transmission does not read it yet.
+
+By default every branch of a replicate continues the prefix's random stream
+(common random numbers), so differences between branches come from the
+intervention rather than from sampling noise.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from simulation.monte_carlo import flatten_stats, spawn_run_seeds, resolve_config
+from simulation.simulation import Simulation
+
+
+def _per_hospital(hospitals, value):
+    if isinstance(value, dict):
+        return [(hospitals[idx], n) for idx, n in value.items()]
+    return [(hosp, value) for hosp in hospitals]
+
+
+OVERRIDES = ("vaccine_capacity", "restock_vaccines", "deactivate")
+
+
+def check_branch(branch):
+    """Raises ValueError for overrides apply_overrides() does not support."""
+    unknown = sorted(set(branch) - {"name", *OVERRIDES})
+    if "mask" in unknown:
+        raise ValueError(f"Branch {branch.get('name')!r}: masks do not affect transmission yet, "
+                         f"so there is no 'mask' override")
+    if unknown:
+        raise ValueError(f"Branch {branch.get('name')!r}: unknown overrides {unknown}; "
+                         f"supported: {list(OVERRIDES)}")
+
+
+def apply_overrides(sim, branch):
+    """Applies one branch's overrides to `sim` in place."""
+    check_branch(branch)
+    for hosp, n in _per_hospital(sim.hospitals, branch.get("vaccine_capacity", {})):
+        hosp.vaccine_capacity = n
+    for hosp, n in _per_hospital(sim.hospitals, branch.get("restock_vaccines", {})):
+        hosp.restock_vaccines(n)
+    for idx in branch.get("deactivate", []):
+        sim.hospitals[idx].deactivate()
+
+
+def _run_branch(sim, name, replicate):
+    sim.run()
+    row = flatten_stats(sim.collect_stats(), replicate)
+    row["Scenario"] = name
+    row["Branch Tick"] = sim.stats.tick
+    return row
+
+
+def iter_scenario_tree(branches, branch_tick, replicates=1, workers=1, seed=None, params=None,
+                       common_random_numbers=True, config=None):
+    """
+    Yields one stats row per (replicate, branch), tagged with "Run ID"
+    (the replicate) and "Scenario" (the branch name).
+
+    Prefixes run in this process; branches run on `workers` processes
+    (workers=None uses one per CPU), in completion order.
+    """
+    config = resolve_config(params, config)
+    for branch in branches:
+        check_branch(branch)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        futures = []
+        for replicate, seed_seq in enumerate(spawn_run_seeds(replicates, seed)):
+            prefix_seed, *branch_seeds = seed_seq.spawn(1 + len(branches))
+            prefix = Simulation.create(seed=prefix_seed, config=config)
+            prefix.run(branch_tick)
+
+            for branch, branch_seed in zip(branches, branch_seeds):
+                rng = None if common_random_numbers else np.random.default_rng(branch_seed)
+                sim = prefix.fork(rng)
+                apply_overrides(sim, branch)
+                if pool is None:
+                    yield _run_branch(sim, branch["name"], replicate + 1)
+                else:
+                    futures.append(pool.submit(_run_branch, sim, branch["name"], replicate + 1))
+
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def run_scenario_tree(branches, branch_tick, replicates=1, workers=1, seed=None, params=None,
+                      common_random_numbers=True, config=None):
+    """List version of iter_scenario_tree(), sorted by replicate then branch order."""
+    order = {branch["name"]: i for i, branch in enumerate(branches)}
+    rows = list(iter_scenario_tree(branches, branch_tick, replicates, workers, seed, params,
+                                   common_random_numbers, config))
+    rows.sort(key=lambda row: (row["Run ID"], order[row["Scenario"]]))
+    return rows
@@ -0,0 +1,295 @@
+"""
+A single simulation run as one object, with checkpoint/restore.
+
+Simulation bundles everything a run needs between ticks: the agents (an
+Agent list, or a Population for the array backend), hospitals, grid, RNG,
+StatsAccumulator and tick number. save_checkpoint() writes all of it to one
+versioned .npz file and load_checkpoint() rebuilds a Simulation that
+continues bit-identically, because the RNG's bit-generator state is saved
+alongside the arrays. The grid and the nearest-hospital field are derived
+data and are rebuilt on load instead of stored.
+"""
+import copy
+import json
+
+import numpy as np
+
+import models.grid as grid
+import models.hospital as hospital
+from models.parameters import AgentParameters
+from models.agent import VaccineTypes
+from models.population import Population, DEAD
+from simulation.engine import create_hospitals, create_agents, step
+from simulation.vectorized import create_population, step_vectorized
+from simulation.jit import step_numba
+from simulation.stats import StatsAccumulator
+from utils.config_loader import DEFAULT_CONFIG, config_from_dict, config_to_dict
+from utils.random_utils import RandomStreams
+
+CHECKPOINT_VERSION = 2
+
+# "agents": Agent objects and engine.step(); "numpy": Population and
+# step_vectorized(); "numba": Population and jit.step_numba() (NumPy fallback)
+BACKENDS = ("agents", "numpy", "numba")
+
+_AGENT_FIELDS = ("x", "y", "age", "health", "mask", "days_infected", "vaccine_doses",
+                 "vaccine_mask", "immunity_reason", "has_been_infected")
+
+
+class Simulation:
+
+    def __init__(self, agents, hospitals, StateSpace, rng=None, batched=False, max_ticks=365, stats=None,
+                 config=None, backend=None, profiler=None, events=None, streams=None):
+        # `agents` is a list of Agent objects, or a Population for the array backends
+        # `profiler`: optional simulation.profiling.TickProfiler fed by every step()
+        # `events`: optional simulation.events.EventLog, its tick follows stats.tick
+        # `streams`: optional RandomStreams; the step phases then draw from common random numbers
+        if backend is None:
+            backend = "numpy" if isinstance(agents, Population) else "agents"
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        if (backend == "agents") == isinstance(agents, Population):
+            raise ValueError(f"Backend {backend!r} does not run on {type(agents).__name__}")
+        self.backend = backend
+        self.config = config or DEFAULT_CONFIG
+        self.agents = agents
+        self.hospitals = hospitals
+        self.StateSpace = StateSpace
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.batched = batched
+        self.max_ticks = max_ticks
+        self.finished = False
+        self.profiler = profiler
+        self.events = events
+        self.streams = streams
+        # Per-agent age-band lookups, done once (a Population caches its own)
+        self.params = None if self.vectorized else AgentParameters.from_agents(agents, self.config)
+
+        self.grid = grid.Grid(StateSpace, StateSpace)
+        self._populate_grid()
+
+        if stats is None:
+            if self.vectorized:
+                stats = StatsAccumulator.from_population(agents, hospitals, max_ticks)
+            else:
+                stats = StatsAccumulator.from_agents(agents, hospitals, max_ticks)
+        self.stats = stats
+        if events is not None:
+            events.tick = stats.tick
+            if events.agents is None:
+                events.agents = agents
+
+    @classmethod
+    def create(cls, StateSpace=None, NumOfHospitals=None, NumAgents=None, SickPeople=None, seed=None,
+               vectorized=False, batched=False, max_ticks=None, config=None, backend=None, profiler=None,
+               events=None, crn=False, antithetic=False):
+        # Arguments left as None come from the config; vectorized=True means backend="numpy"
+        # crn=True draws the hospitals, population and every phase of every tick from
+        # RandomStreams(seed), so runs built from the same seed with different
+        # configs share their random numbers; antithetic=True (implies crn) mirrors them.
+        config = config or DEFAULT_CONFIG
+        if backend is None:
+            backend = "numpy" if vectorized else "agents"
+        StateSpace = config.grid.size if StateSpace is None else StateSpace
+        NumOfHospitals = config.hospital.count if NumOfHospitals is None else NumOfHospitals
+        NumAgents = config.population.num_agents if NumAgents is None else NumAgents
+        SickPeople = config.population.initial_infected if SickPeople is None else SickPeople
+        max_ticks = config.simulation.max_steps if max_ticks is None else max_ticks
+
+        rng = np.random.default_rng(seed)
+        streams = RandomStreams(seed, antithetic) if crn or antithetic else None
+        hosp_rng = streams.generator("hospitals") if streams is not None else rng
+        pop_rng = streams.generator("population") if streams is not None else rng
+        hospitals = create_hospitals(NumOfHospitals, StateSpace, NumAgents, rng=hosp_rng, config=config)
+        if backend == "agents":
+            agents = create_agents(NumAgents, StateSpace, NumSick=SickPeople, rng=pop_rng, config=config)
+        else:
+            agents = create_population(NumAgents, StateSpace, NumSick=SickPeople, rng=pop_rng, config=config)
+        return cls(agents, hospitals, StateSpace, rng=rng, batched=batched, max_ticks=max_ticks, config=config,
+                   backend=backend, profiler=profiler, events=events, streams=streams)
+
+    @property
+    def vectorized(self) -> bool:
+        return isinstance(self.agents, Population)
+
+    @property
+    def tick(self) -> int:
+        return self.stats.tick
+
+    def agent_list(self):
+        """Agent-interface view of the population, whichever backend is in use."""
+        return self.agents.agents() if self.vectorized else self.agents
+
+    def _populate_grid(self):
+        self.grid.sync_hospitals(self.hospitals)
+        if self.vectorized:
+            living = np.flatnonzero(self.agents.health != DEAD)
+            self.grid.move_agents(living, self.agents.x[living], self.agents.y[living])
+        else:
+            for ag in self.agents:
+                if ag.state != DEAD:
+                    x, y = ag.location
+                    self.grid.addAgent(x, y, ag.id)
+
+    def step(self) -> bool:
+        """Advances one tick; returns False once the run has ended."""
+        if self.finished:
+            return False
+        if self.backend == "numba":
+            should_continue = step_numba(self.agents, self.hospitals, self.grid, self.StateSpace,
+                                         rng=self.rng, stats=self.stats, config=self.config,
+                                         profiler=self.profiler, events=self.events, streams=self.streams)
+        elif self.backend == "numpy":
+            should_continue = step_vectorized(self.agents, self.hospitals, self.grid, self.StateSpace,
+                                              rng=self.rng, stats=self.stats, config=self.config,
+                                              profiler=self.profiler, events=self.events, streams=self.streams)
+        else:
+            should_continue = step(self.agents, self.hospitals, self.grid, self.StateSpace,
+                                   rng=self.rng, batched=self.batched, stats=self.stats, config=self.config,
+                                   params=self.params, profiler=self.profiler, events=self.events,
+                                   streams=self.streams)
+        if not should_continue or self.tick >= self.max_ticks:
+            self.finished = True
+        return should_continue
+
+    def run(self, steps=None) -> bool:
+        """Runs `steps` more ticks (default: until the end); returns False once finished."""
+        remaining = self.max_ticks - self.tick if steps is None else steps
+        for _ in range(remaining):
+            if not self.step():
+                return False
+        return not self.finished
+
+    def collect_stats(self):
+        return self.stats.snapshot()
+
+    def fork(self, rng=None):
+        """
+        Independent copy of the current state. The copy continues the same
+        random stream unless a different `rng` is given.
+        """
+        sim = copy.deepcopy(self)
+        if rng is not None:
+            sim.rng = rng
+        return sim
+
+    def __getstate__(self):
+        # The grid (and the hospital field listening on the hospitals) is rebuilt on the other side.
+        # A profiler and event log stay with the original: copies start without them.
+        state = self.__dict__.copy()
+        del state["grid"]
+        state.pop("profiler", None)
+        state.pop("events", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.profiler = None
+        self.events = None
+        self.grid = grid.Grid(self.StateSpace, self.StateSpace)
+        self._populate_grid()
+
+    # --- Checkpoints ---
+
+    def save_checkpoint(self, path, compress=True):
+        """
+        Writes the full run state to `path` as a single .npz file.
+        compress=False gives an uncompressed archive whose arrays np.load can memory-map.
+        """
+        pop = self.agents if self.vectorized else Population.from_agents(self.agents)
+        meta = {
+            "version": CHECKPOINT_VERSION,
+            "vectorized": self.vectorized,
+            "backend": self.backend,
+            "StateSpace": self.StateSpace,
+            "batched": self.batched,
+            "max_ticks": self.max_ticks,
+            "finished": self.finished,
+            "vaccine_types": list(pop.vaccine_types.names),
+            "rng_state": self.rng.bit_generator.state,
+            "streams": self.streams.to_dict() if self.streams is not None else None,
+            "config": config_to_dict(self.config),
+        }
+        arrays = {"meta": np.array(json.dumps(meta, default=_to_json))}
+        for name in _AGENT_FIELDS:
+            arrays[f"agent_{name}"] = getattr(pop, name)
+
+        hospitals = self.hospitals
+        arrays["hosp_location"] = np.array([h.location for h in hospitals], dtype=np.int64).reshape(-1, 2)
+        arrays["hosp_vaccine_type"] = np.array([h.vaccine_type for h in hospitals], dtype=str)
+        arrays["hosp_bed_capacity"] = np.array([h.bed_capacity for h in hospitals], dtype=np.float64)
+        arrays["hosp_treatment_success"] = np.array([h.treatment_success for h in hospitals], dtype=np.float64)
+        arrays["hosp_active"] = np.array([h.active for h in hospitals], dtype=bool)
+        for name in ("vaccine_capacity", "admin_speed", "current_patients", "vaccine_requests", "vaccine_stockouts"):
+            arrays[f"hosp_{name}"] = np.array([getattr(h, name) for h in hospitals], dtype=np.int64)
+
+        for name, value in self.stats.to_arrays().items():
+            arrays[f"stats_{name}"] = value
+
+        with open(path, "wb") as f:
+            (np.savez_compressed if compress else np.savez)(f, **arrays)
+
+    @classmethod
+    def load_checkpoint(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["version"] != CHECKPOINT_VERSION:
+                raise ValueError(f"Unsupported checkpoint version {meta['version']} (expected {CHECKPOINT_VERSION})")
+
+            # The saved mapping gives the bits of agent_vaccine_mask their meaning
+            pop = Population(data["agent_x"], data["agent_y"], data["agent_age"], data["agent_health"],
+                             data["agent_mask"], vaccine_types=VaccineTypes(meta["vaccine_types"]))
+            for name in _AGENT_FIELDS[5:]:
+                setattr(pop, name, data[f"agent_{name}"].copy())
+
+            hospitals = []
+            for i in range(len(data["hosp_active"])):
+                x, y = data["hosp_location"][i]
+                hosp = hospital.Hospital(location=(int(x), int(y)),
+                                         vaccine_capacity=int(data["hosp_vaccine_capacity"][i]),
+                                         vaccine_type=str(data["hosp_vaccine_type"][i]),
+                                         admin_speed=int(data["hosp_admin_speed"][i]),
+                                         bed_capacity=_number(data["hosp_bed_capacity"][i]),
+                                         treatment_success=float(data["hosp_treatment_success"][i]))
+                hosp.current_patients = int(data["hosp_current_patients"][i])
+                hosp.vaccine_requests = int(data["hosp_vaccine_requests"][i])
+                hosp.vaccine_stockouts = int(data["hosp_vaccine_stockouts"][i])
+                hosp.active = bool(data["hosp_active"][i])
+                hospitals.append(hosp)
+
+            stats = StatsAccumulator.from_arrays(
+                {name: data[f"stats_{name}"] for name in ("counters", "age", "series")}, meta["max_ticks"])
+
+        rng = np.random.Generator(getattr(np.random, meta["rng_state"]["bit_generator"])())
+        rng.bit_generator.state = meta["rng_state"]
+
+        agents = pop if meta["vectorized"] else pop.to_agents()
+        sim = cls(agents, hospitals, meta["StateSpace"], rng=rng, batched=meta["batched"],
+                  max_ticks=meta["max_ticks"], stats=stats, config=config_from_dict(meta["config"]),
+                  backend=meta.get("backend"),
+                  streams=RandomStreams.from_dict(meta["streams"]) if meta.get("streams") else None)
+        sim.finished = meta["finished"]
+        return sim
+
+
+def save_checkpoint(sim, path, compress=True):
+    sim.save_checkpoint(path, compress)
+
+
+def load_checkpoint(path) -> Simulation:
+    return Simulation.load_checkpoint(path)
+
+
+def _to_json(value):
+    # Bit-generator states may hold NumPy arrays/ints (e.g. MT19937's key)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.integer):
+        return int(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _number(value):
+    # Bed capacity is an int from create_hospitals but typed as float on Hospital
+    value = float(value)
+    return int(value) if value.is_integer() else value
@@ -0,0 +1,268 @@
+"""
+Streaming statistics for a single run.
+
+StatsAccumulator is built once from the initial population and then updated
+by the engine as events happen (infections, recoveries, deaths, doses,
+vaccine requests), each at O(1) cost. Its compartment counts are a
+CompartmentCounts kept current by the engine's health transitions. It writes one row per
+tick into a preallocated NumPy buffer and can produce, at any point, the same
+dict that engine.collect_stats() builds by walking the whole population.
+"""
+import numpy as np
+
+from models.population import HEALTH_NAMES, IMMUNE, DEAD, IMMUNITY_REASONS
+from simulation.compartments import CompartmentCounts
+
+AGE_BUCKETS = ["0-9", "10-19", "20-29", "30-39", "40-49", "50-59", "60-69", "70-79", "80+"]
+
+# Per-tick time series: S/E/I/R/D compartments, vaccination coverage and flows
+SERIES_COLUMNS = (
+    "tick",
+    "susceptible",
+    "exposed",
+    "infectious",
+    "recovered",
+    "dead",
+    "partially_vaccinated",
+    "fully_vaccinated",
+    "new_infections",
+    "new_deaths",
+    "doses_given",
+    "vaccine_stockouts",
+)
+_COL = {name: i for i, name in enumerate(SERIES_COLUMNS)}
+
+
+def age_bucket(age) -> int:
+    return min(int(age) // 10, 8)
+
+
+class StatsAccumulator:
+
+    def __init__(self, total_population: int, max_ticks: int = 365):
+        self.total_population = total_population
+        self.tick = 0
+        self.compartments = CompartmentCounts()
+        self.total_infected = 0
+        self.total_deaths = 0
+        self.vaccination_status = {0: 0, 1: 0, 2: 0}
+        self.immunity_breakdown = {"total": 0, "vaccine": 0, "natural": 0, "treatment": 0}
+        self.deaths_by_vax = {0: 0, 1: 0, 2: 0}
+        self.age_total = np.zeros(len(AGE_BUCKETS), dtype=np.int64)
+        self.age_infected = np.zeros(len(AGE_BUCKETS), dtype=np.int64)
+        self.age_deaths = np.zeros(len(AGE_BUCKETS), dtype=np.int64)
+        self.vaccine_requests = 0
+        self.vaccine_stockouts = 0
+
+        # Flows since the last end_tick()
+        self._new_infections = 0
+        self._new_deaths = 0
+        self._doses_given = 0
+        self._new_stockouts = 0
+
+        # Row 0 is the initial state, row t the state after tick t
+        self._series = np.zeros((max_ticks + 1, len(SERIES_COLUMNS)), dtype=np.int64)
+        self._rows = 0
+
+    @classmethod
+    def from_agents(cls, agents, hospitals, max_ticks: int = 365):
+        acc = cls(len(agents), max_ticks)
+        acc.compartments = CompartmentCounts.from_agents(agents)
+        for ag in agents:
+            acc._add_initial(ag.health, ag.age, ag.vaccine_doses, ag.has_been_infected, ag.immunity_reason)
+        acc._add_hospitals(hospitals)
+        acc._write_row()
+        return acc
+
+    @classmethod
+    def from_population(cls, pop, hospitals, max_ticks: int = 365):
+        acc = cls(len(pop), max_ticks)
+        acc.compartments = CompartmentCounts.from_population(pop)
+        immune = pop.health == IMMUNE
+        dead = pop.health == DEAD
+        doses = np.minimum(pop.vaccine_doses, 2)
+        buckets = np.minimum(pop.age // 10, 8)
+
+        acc.total_infected = int(pop.has_been_infected.sum())
+        acc.total_deaths = int(dead.sum())
+        acc.vaccination_status = {k: int(v) for k, v in enumerate(np.bincount(doses, minlength=3))}
+        acc.deaths_by_vax = {k: int(v) for k, v in enumerate(np.bincount(doses[dead], minlength=3))}
+        reasons = np.bincount(pop.immunity_reason[immune], minlength=len(IMMUNITY_REASONS))
+        acc.immunity_breakdown["total"] = int(immune.sum())
+        for code, reason in enumerate(IMMUNITY_REASONS):
+            if reason is not None:
+                acc.immunity_breakdown[reason] = int(reasons[code])
+        acc.age_total += np.bincount(buckets, minlength=len(AGE_BUCKETS))
+        acc.age_infected += np.bincount(buckets[pop.has_been_infected], minlength=len(AGE_BUCKETS))
+        acc.age_deaths += np.bincount(buckets[dead], minlength=len(AGE_BUCKETS))
+        acc._add_hospitals(hospitals)
+        acc._write_row()
+        return acc
+
+    def _add_initial(self, health, age, doses, has_been_infected, immunity_reason):
+        bucket = age_bucket(age)
+        self.age_total[bucket] += 1
+        self.vaccination_status[min(doses, 2)] += 1
+        if has_been_infected:
+            self.total_infected += 1
+            self.age_infected[bucket] += 1
+        if health == "dead":
+            self.total_deaths += 1
+            self.age_deaths[bucket] += 1
+            self.deaths_by_vax[min(doses, 2)] += 1
+        if health == "immune":
+            self.immunity_breakdown["total"] += 1
+            if immunity_reason in self.immunity_breakdown:
+                self.immunity_breakdown[immunity_reason] += 1
+
+    def _add_hospitals(self, hospitals):
+        for hosp in hospitals:
+            self.vaccine_requests += hosp.vaccine_requests
+            self.vaccine_stockouts += hosp.vaccine_stockouts
+
+    # --- Events (scalar versions for the Agent engine) ---
+    # Compartment counts are not touched here; engine transitions move them.
+
+    def on_infection(self, age, first_infection: bool = True):
+        self._new_infections += 1
+        if first_infection:
+            self.total_infected += 1
+            self.age_infected[age_bucket(age)] += 1
+
+    def on_recovery(self, reason: str, count: int = 1):
+        self.immunity_breakdown["total"] += count
+        self.immunity_breakdown[reason] += count
+
+    def on_death(self, age, doses: int):
+        self.total_deaths += 1
+        self._new_deaths += 1
+        self.deaths_by_vax[min(doses, 2)] += 1
+        self.age_deaths[age_bucket(age)] += 1
+
+    def on_vaccination(self, old_doses: int, new_doses: int):
+        self.vaccination_status[min(old_doses, 2)] -= 1
+        self.vaccination_status[min(new_doses, 2)] += 1
+        self._doses_given += 1
+
+    def on_vaccine_requests(self, requests: int, stockouts: int):
+        self.vaccine_requests += requests
+        self.vaccine_stockouts += stockouts
+        self._new_stockouts += stockouts
+
+    # --- Events (array versions for the vectorized engine) ---
+
+    def on_infections(self, ages):
+        n = len(ages)
+        self._new_infections += n
+        self.total_infected += n
+        self.age_infected += np.bincount(np.minimum(np.asarray(ages) // 10, 8), minlength=len(AGE_BUCKETS))
+
+    def on_deaths(self, ages, doses):
+        n = len(ages)
+        self.total_deaths += n
+        self._new_deaths += n
+        for k, v in enumerate(np.bincount(np.minimum(doses, 2), minlength=3)):
+            self.deaths_by_vax[k] += int(v)
+        self.age_deaths += np.bincount(np.minimum(np.asarray(ages) // 10, 8), minlength=len(AGE_BUCKETS))
+
+    def on_vaccinations(self, old_doses, new_doses):
+        old = np.bincount(np.minimum(old_doses, 2), minlength=3)
+        new = np.bincount(np.minimum(new_doses, 2), minlength=3)
+        for k in range(3):
+            self.vaccination_status[k] += int(new[k] - old[k])
+        self._doses_given += len(old_doses)
+
+    # --- Time series ---
+
+    def end_tick(self):
+        self.tick += 1
+        self._write_row()
+        self._new_infections = 0
+        self._new_deaths = 0
+        self._doses_given = 0
+        self._new_stockouts = 0
+
+    def _write_row(self):
+        if self._rows >= len(self._series):
+            grown = np.zeros((2 * len(self._series), len(SERIES_COLUMNS)), dtype=np.int64)
+            grown[:self._rows] = self._series[:self._rows]
+            self._series = grown
+        row = self._series[self._rows]
+        row[_COL["tick"]] = self.tick
+        row[_COL["susceptible"]] = self.compartments["healthy"]
+        row[_COL["exposed"]] = self.compartments["infected"]
+        row[_COL["infectious"]] = self.compartments["infectious"]
+        row[_COL["recovered"]] = self.compartments["immune"]
+        row[_COL["dead"]] = self.compartments["dead"]
+        row[_COL["partially_vaccinated"]] = self.vaccination_status[1]
+        row[_COL["fully_vaccinated"]] = self.vaccination_status[2]
+        row[_COL["new_infections"]] = self._new_infections
+        row[_COL["new_deaths"]] = self._new_deaths
+        row[_COL["doses_given"]] = self._doses_given
+        row[_COL["vaccine_stockouts"]] = self._new_stockouts
+        self._rows += 1
+
+    def time_series(self):
+        """(ticks + 1) x len(SERIES_COLUMNS) array; row 0 is the initial state."""
+        return self._series[:self._rows]
+
+    def time_series_frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.time_series(), columns=SERIES_COLUMNS)
+
+    # --- Snapshot ---
+
+    def snapshot(self):
+        """Same dict as engine.collect_stats() for the current state."""
+        return {
+            "total_population": self.total_population,
+            "total_infected": self.total_infected,
+            "total_deaths": self.total_deaths,
+            "vaccination_status": dict(self.vaccination_status),
+            "immunity_breakdown": dict(self.immunity_breakdown),
+            "deaths_by_vax": dict(self.deaths_by_vax),
+            "age_stats": {
+                bucket: {
+                    "infected": int(self.age_infected[i]),
+                    "deaths": int(self.age_deaths[i]),
+                    "total": int(self.age_total[i]),
+                }
+                for i, bucket in enumerate(AGE_BUCKETS)
+            },
+            "hospital_stats": {"requests": self.vaccine_requests, "stockouts": self.vaccine_stockouts},
+        }
+
+    # --- Serialization (used by checkpoints) ---
+
+    def to_arrays(self):
+        counters = [
+            self.total_population, self.tick, self.total_infected, self.total_deaths,
+            self.vaccine_requests, self.vaccine_stockouts,
+            self._new_infections, self._new_deaths, self._doses_given, self._new_stockouts,
+        ]
+        counters += [self.vaccination_status[k] for k in range(3)]
+        counters += [self.deaths_by_vax[k] for k in range(3)]
+        counters += [self.immunity_breakdown[k] for k in ("total", "vaccine", "natural", "treatment")]
+        counters += [self.compartments[code] for code in range(len(HEALTH_NAMES))]
+        return {
+            "counters": np.array(counters, dtype=np.int64),
+            "age": np.stack([self.age_total, self.age_infected, self.age_deaths]),
+            "series": self.time_series().copy(),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, max_ticks: int = 365):
+        c = [int(v) for v in arrays["counters"]]
+        series = arrays["series"]
+        acc = cls(c[0], max(max_ticks, len(series)))
+        (acc.tick, acc.total_infected, acc.total_deaths, acc.vaccine_requests, acc.vaccine_stockouts,
+         acc._new_infections, acc._new_deaths, acc._doses_given, acc._new_stockouts) = c[1:10]
+        acc.vaccination_status = {k: c[10 + k] for k in range(3)}
+        acc.deaths_by_vax = {k: c[13 + k] for k in range(3)}
+        acc.immunity_breakdown = dict(zip(("total", "vaccine", "natural", "treatment"), c[16:20]))
+        acc.compartments = CompartmentCounts()
+        acc.compartments._counts = c[20:20 + len(HEALTH_NAMES)]
+        acc.age_total, acc.age_infected, acc.age_deaths = (row.astype(np.int64) for row in arrays["age"])
+        acc._series[:len(series)] = series
+        acc._rows = len(series)
+        return acc
@@ -0,0 +1,387 @@
+"""
+Array-backed simulation step.
+
+Same model as simulation.engine.step(), but every phase runs as whole-array
+operations over a models.population.Population instead of a loop over Agents.
+"""
+import numpy as np
+
+from models.population import (
+    Population,
+    HEALTHY,
+    INFECTED,
+    INFECTIOUS,
+    IMMUNE,
+    DEAD,
+    IMMUNITY_CODES,
+    POPCOUNT,
+)
+from models.agent import VaccineTypes
+from utils.random_utils import get_rng
+from simulation.compartments import transition_population
+from simulation.events import NATURAL_RECOVERY, DEATH, TREATMENT, VACCINATION
+from utils.config_loader import DEFAULT_CONFIG
+
+# Age-band and dose lookup tables come precompiled on config.disease
+# (transmission_age_edges/_mean/_sd, recovery_age_edges/_prob, dose_multiplier).
+
+
+def create_population(NumAgents, StateSpace, NumSick=0, rng=None, config=None) -> Population:
+    rng = get_rng(rng)
+    pc = (config or DEFAULT_CONFIG).population
+    x = rng.integers(0, StateSpace, NumAgents)
+    y = rng.integers(0, StateSpace, NumAgents)
+    age = np.clip(rng.normal(pc.age_mean, pc.age_sd, NumAgents), 0, pc.age_max).astype(int)
+    health = np.full(NumAgents, HEALTHY, dtype=np.int8)
+    health[:NumSick] = INFECTED
+    pop = Population(x, y, age, health, vaccine_types=VaccineTypes.from_config(config))
+    # Age-band lookups are done once here and reused every tick
+    pop.parameters(config)
+    return pop
+
+
+def _is_sick(health):
+    return (health == INFECTED) | (health == INFECTIOUS)
+
+
+def _step_toward(x, y, tx, ty):
+    # Same greedy rule as engine.findHosp: close the x gap first, then y.
+    same_x = x == tx
+    nx = np.where(same_x, x, x + np.sign(tx - x))
+    ny = np.where(same_x, y + np.sign(ty - y), y)
+    return nx, ny
+
+
+def move_population(pop: Population, hospitals, StateSpace, rng, field=None, config=None):
+    # field: the grid's NearestHospitalField; without one, seekers are routed
+    # by a seekers x hospitals distance matrix instead
+    # Returns the number of hospital seekers
+    return move_arrays(pop.x, pop.y, pop.health, pop.days_infected, pop.parameters(config).treatment_eligible,
+                       hospitals, StateSpace, rng, field, config)
+
+
+def move_arrays(x, y, health, days_infected, eligible, hospitals, StateSpace, rng, field=None, config=None):
+    """
+    Bulk movement stage shared by both engines: moves every living agent one
+    cell, in place on the x/y arrays. Seek decisions and random-walk offsets
+    for the whole population come from three array draws (seek roll, dx, dy);
+    hospital seekers step toward the nearest active hospital with findHosp's
+    x-first, then y greedy rule. Returns the number of hospital seekers.
+    """
+    hc = (config or DEFAULT_CONFIG).hospital
+    n = len(x)
+    alive = health != DEAD
+    if field is not None:
+        any_active = field.any_active
+    else:
+        active = [h for h in hospitals if h.active]
+        any_active = bool(active)
+
+    seek_roll = rng.random(n)
+    dx = rng.integers(-1, 2, n)
+    dy = rng.integers(-1, 2, n)
+
+    if any_active:
+        seek_treatment = alive & eligible & _is_sick(health) & (days_infected > hc.treatment_after_days)
+        seekers = seek_treatment | (alive & (seek_roll < hc.vaccine_seeking_prob))
+    else:
+        seekers = np.zeros(n, dtype=bool)
+    walkers = alive & ~seekers
+
+    x[walkers] = np.clip(x[walkers] + dx[walkers], 0, StateSpace - 1)
+    y[walkers] = np.clip(y[walkers] + dy[walkers], 0, StateSpace - 1)
+
+    idx = np.flatnonzero(seekers)
+    if len(idx) and field is not None:
+        x[idx], y[idx] = field.next_locations(x[idx], y[idx])
+    elif len(idx):
+        hx = np.array([h.location[0] for h in active])
+        hy = np.array([h.location[1] for h in active])
+        sx, sy = x[idx], y[idx]
+        # argmin keeps the first hospital on ties, like findHosp's strict "<"
+        dist = np.abs(hx[None, :] - sx[:, None]) + np.abs(hy[None, :] - sy[:, None])
+        nearest = np.argmin(dist, axis=1)
+        x[idx], y[idx] = _step_toward(sx, sy, hx[nearest], hy[nearest])
+    return len(idx)
+
+
+def transmission_kernel(cells, health, doses, infection_prob, dose_multiplier, num_cells, rng, per_agent=False):
+    """
+    Ids of the susceptible agents infected this tick.
+
+    Cells holding any infected/infectious agent are found with one bincount
+    over the cell ids. Each healthy agent in such a cell is infected with
+    probability infection_prob * dose_multiplier[doses]; the old pair of draws
+    (Normal(mean, sd) > 0, then uniform < multiplier) has exactly that chance,
+    so all outcomes come from a single uniform draw over the exposed agents.
+    per_agent=True draws one uniform per agent instead, so agent i always gets
+    the i-th number (common random numbers across runs).
+    """
+    sick_per_cell = np.bincount(cells[_is_sick(health)], minlength=num_cells)
+    exposed = np.flatnonzero((health == HEALTHY) & (sick_per_cell[cells] > 0))
+    p = infection_prob[exposed] * dose_multiplier[np.minimum(doses[exposed], 2)]
+    u = rng.random(len(health))[exposed] if per_agent else rng.random(len(exposed))
+    return exposed[u < p]
+
+
+def transmit(pop: Population, StateSpace, rng, counts=None, config=None, per_agent=False):
+    """Infects susceptible agents sharing a cell with a sick one; returns their ids."""
+    disease = (config or DEFAULT_CONFIG).disease
+    newly = transmission_kernel(pop.cell_ids(StateSpace), pop.health, pop.vaccine_doses,
+                                pop.parameters(config).infection_prob, disease.dose_multiplier,
+                                StateSpace * StateSpace, rng, per_agent)
+    transition_population(pop, newly, INFECTED, counts)
+    pop.days_infected[newly] = 0
+    pop.has_been_infected[newly] = True
+    return newly
+
+
+def progress(pop: Population, rng, counts=None, config=None):
+    disease = (config or DEFAULT_CONFIG).disease
+    was_infected = pop.health == INFECTED
+    was_infectious = pop.health == INFECTIOUS
+
+    pop.days_infected[was_infected | was_infectious] += 1
+    progressed = was_infected & (pop.days_infected > disease.incubation_days)
+    transition_population(pop, progressed, INFECTIOUS, counts)
+
+    n = len(pop)
+    recovery_roll = rng.random(n)
+    recovered = (was_infectious & (pop.days_infected > disease.recovery_after_days)
+                 & (recovery_roll < pop.parameters(config).recovery_prob))
+    transition_population(pop, recovered, IMMUNE, counts)
+    pop.immunity_reason[recovered] = IMMUNITY_CODES["natural"]
+
+    risk_score = np.abs(rng.normal(disease.death_risk_mean, disease.death_risk_sd, n))
+    death_roll = rng.random(n)
+    died = was_infectious & ~recovered & (pop.days_infected > disease.death_after_days) & (risk_score > death_roll)
+    transition_population(pop, died, DEAD, counts)
+    return progressed, recovered, died
+
+
+def hospital_occupants(pop: Population, hospitals, StateSpace, grid=None):
+    """
+    Living agent ids at each hospital's cell, computed once per tick: from the
+    grid's occupancy index when there is one, else from a single pass that
+    groups the agents standing on any hospital cell.
+    """
+    alive = pop.health != DEAD
+    hosp_cells = np.array([y * StateSpace + x for x, y in (h.location for h in hospitals)], dtype=np.int64)
+    if grid is not None:
+        occupants = []
+        for cell in hosp_cells:
+            ids = grid.index.agents_in(cell)
+            occupants.append(ids[alive[ids]])
+        return occupants
+
+    cells = pop.cell_ids(StateSpace)
+    candidates = np.flatnonzero(alive & np.isin(cells, hosp_cells))
+    # Stable sort keeps agent id order inside each cell
+    candidates = candidates[np.argsort(cells[candidates], kind="stable")]
+    sorted_cells = cells[candidates]
+    starts = np.searchsorted(sorted_cells, hosp_cells, side="left")
+    ends = np.searchsorted(sorted_cells, hosp_cells, side="right")
+    return [candidates[a:b] for a, b in zip(starts, ends)]
+
+
+def treat_and_vaccinate(pop: Population, hospitals, rng, StateSpace=None, grid=None, stats=None, counts=None,
+                        config=None, events=None, per_agent=False):
+    # Returns the number of vaccine doses given
+    # Treatments and vaccinations are recorded in `events` with the hospital's index
+    # per_agent=True gives each agent one treatment roll per tick, indexed by id
+    # (common random numbers), instead of one per treatable occupant
+    if not hospitals:
+        return 0
+    hc = (config or DEFAULT_CONFIG).hospital
+    can_be_treated = pop.parameters(config).treatment_eligible
+    if StateSpace is None:
+        StateSpace = grid.width
+    occupants = hospital_occupants(pop, hospitals, StateSpace, grid)
+
+    # One draw for every treatment this tick (at most one per occupant per hospital)
+    if per_agent:
+        agent_rolls = rng.random(len(pop))
+    else:
+        treatment_rolls = rng.random(sum(len(ids) for ids in occupants))
+    used = 0
+    doses = 0
+
+    for h, (hosp, here) in enumerate(zip(hospitals, occupants)):
+        # Earlier hospitals sharing this cell may have changed some states
+        hosp.update_occupancy(len(here))
+        if not hosp.active:
+            continue
+
+        health = pop.health[here]
+        treatable = here[_is_sick(health) & can_be_treated[here] & (pop.days_infected[here] > hc.treatment_after_days)]
+        # Hospital.treat_patient: treatment_success chance while active
+        if per_agent:
+            cured = treatable[agent_rolls[treatable] < hosp.treatment_success]
+        else:
+            cured = treatable[treatment_rolls[used:used + len(treatable)] < hosp.treatment_success]
+            used += len(treatable)
+        transition_population(pop, cured, IMMUNE, counts)
+        if stats is not None:
+            stats.on_recovery("treatment", len(cured))
+        pop.immunity_reason[cured] = IMMUNITY_CODES["treatment"]
+        if events is not None:
+            events.record_many(TREATMENT, cured, h)
+
+        bit = pop.vaccine_types.bit(hosp.vaccine_type)
+        eligible = here[(health == HEALTHY) & (pop.vaccine_doses[here] < 2) & ((pop.vaccine_mask[here] & bit) == 0)]
+        # Stock runs out in arrival (agent id) order
+        granted = eligible[:hosp.administer_vaccines(len(eligible))]
+        doses += len(granted)
+        if events is not None:
+            events.record_many(VACCINATION, granted, h)
+        old_doses = pop.vaccine_doses[granted]
+        pop.vaccine_mask[granted] |= bit
+        pop.vaccine_doses[granted] = POPCOUNT[pop.vaccine_mask[granted]]
+        full = granted[pop.vaccine_doses[granted] >= 2]
+        if stats is not None:
+            stats.on_vaccine_requests(len(eligible), len(eligible) - len(granted))
+            stats.on_vaccinations(old_doses, pop.vaccine_doses[granted])
+            stats.on_recovery("vaccine", len(full))
+        transition_population(pop, full, IMMUNE, counts)
+        pop.immunity_reason[full] = IMMUNITY_CODES["vaccine"]
+    return doses
+
+
+def is_termination_condition_met(pop: Population, counts=None) -> bool:
+    if counts is not None:
+        return counts.is_terminal()
+    counts = np.bincount(pop.health, minlength=5)
+    living = len(pop) - counts[DEAD]
+    if living == 0:
+        return True
+    all_healthy_or_immune = counts[HEALTHY] + counts[IMMUNE] == living
+    all_infected = counts[INFECTED] + counts[INFECTIOUS] == living
+    return bool(all_healthy_or_immune or all_infected)
+
+
+def step_vectorized(pop: Population, hospitals, grid, StateSpace, rng=None, stats=None, counts=None, config=None,
+                    profiler=None, events=None, streams=None):
+    # Pass grid=None to skip occupancy bookkeeping in headless runs.
+    # A StatsAccumulator passed as `stats` is updated as events happen, and
+    # live CompartmentCounts (default stats.compartments) make termination O(1).
+    # `config` (default DEFAULT_CONFIG) supplies thresholds and lookup tables.
+    # A TickProfiler passed as `profiler` records per-phase wall time and counts,
+    # an EventLog passed as `events` gets every recovery, death, treatment and vaccination.
+    # With `streams` (RandomStreams, common random numbers) each phase draws from
+    # its own per-tick substream, one number per agent, instead of `rng`.
+    rng = get_rng(rng)
+    if counts is None and stats is not None:
+        counts = stats.compartments
+    per_agent = streams is not None
+    if per_agent:
+        if stats is None:
+            raise ValueError("step_vectorized() with streams needs stats for the tick number")
+        move_rng, trans_rng, prog_rng, hosp_rng = (
+            streams.generator(purpose, stats.tick)
+            for purpose in ("movement", "transmission", "progression", "treatment"))
+    else:
+        move_rng = trans_rng = prog_rng = hosp_rng = rng
+    if profiler is not None:
+        profiler.begin_tick()
+    field = grid.hospital_field(hospitals) if grid is not None else None
+    seekers = move_population(pop, hospitals, StateSpace, move_rng, field, config)
+    if profiler is not None:
+        profiler.count("agents_moved", int(np.count_nonzero(pop.health != DEAD)))
+        profiler.count("hospital_seekers", seekers)
+        profiler.lap("movement")
+
+    if grid is not None:
+        alive = pop.health != DEAD
+        grid.remove_agents(np.flatnonzero(~alive))
+        living = np.flatnonzero(alive)
+        grid.move_agents(living, pop.x[living], pop.y[living])
+        if profiler is not None:
+            profiler.count("occupied_cells", len(grid.index.occupied_cells()))
+    if profiler is not None:
+        profiler.lap("grid_update")
+
+    newly = transmit(pop, StateSpace, trans_rng, counts, config, per_agent)
+    if stats is not None:
+        stats.on_infections(pop.age[newly])
+    if profiler is not None:
+        profiler.count("new_infections", len(newly))
+        profiler.lap("transmission")
+
+    progressed, recovered, died = progress(pop, prog_rng, counts, config)
+    if stats is not None:
+        stats.on_recovery("natural", int(recovered.sum()))
+        stats.on_deaths(pop.age[died], pop.vaccine_doses[died])
+    if events is not None:
+        events.record_many(NATURAL_RECOVERY, np.flatnonzero(recovered))
+        events.record_many(DEATH, np.flatnonzero(died))
+    if profiler is not None:
+        profiler.count("deaths", int(died.sum()))
+        profiler.lap("progression")
+
+    doses = treat_and_vaccinate(pop, hospitals, hosp_rng, StateSpace, grid, stats, counts, config, events, per_agent)
+    if profiler is not None:
+        profiler.count("doses_given", doses)
+        profiler.lap("hospitals")
+
+    if grid is not None:
+        grid.remove_agents(np.flatnonzero(died))
+        grid.sync_hospitals(hospitals)
+    if profiler is not None:
+        profiler.lap("grid_cleanup")
+
+    if stats is not None:
+        stats.end_tick()
+    if events is not None:
+        events.end_tick()
+
+    terminated = is_termination_condition_met(pop, counts)
+    if profiler is not None:
+        profiler.lap("termination")
+        profiler.end_tick()
+    return not terminated
+
+
+def collect_stats_vectorized(pop: Population, hospitals):
+    """Array version of engine.collect_stats(); returns the same dict layout."""
+    dead = pop.health == DEAD
+    infected = pop.has_been_infected
+    doses = np.minimum(pop.vaccine_doses, 2)
+    immune = pop.health == IMMUNE
+
+    vax = np.bincount(doses, minlength=3)
+    dead_vax = np.bincount(doses[dead], minlength=3)
+    reasons = np.bincount(pop.immunity_reason[immune], minlength=len(IMMUNITY_CODES))
+
+    stats = {
+        "total_population": len(pop),
+        "total_infected": int(infected.sum()),
+        "total_deaths": int(dead.sum()),
+        "vaccination_status": {k: int(vax[k]) for k in range(3)},
+        "immunity_breakdown": {
+            "total": int(immune.sum()),
+            "vaccine": int(reasons[IMMUNITY_CODES["vaccine"]]),
+            "natural": int(reasons[IMMUNITY_CODES["natural"]]),
+            "treatment": int(reasons[IMMUNITY_CODES["treatment"]]),
+        },
+        "deaths_by_vax": {k: int(dead_vax[k]) for k in range(3)},
+        "age_stats": {},
+        "hospital_stats": {"requests": 0, "stockouts": 0},
+    }
+
+    age_buckets = ["0-9", "10-19", "20-29", "30-39", "40-49", "50-59", "60-69", "70-79", "80+"]
+    bucket_id = np.minimum(pop.age // 10, 8)
+    totals = np.bincount(bucket_id, minlength=9)
+    infected_by_age = np.bincount(bucket_id[infected], minlength=9)
+    deaths_by_age = np.bincount(bucket_id[dead], minlength=9)
+    for i, bucket in enumerate(age_buckets):
+        stats["age_stats"][bucket] = {
+            "infected": int(infected_by_age[i]),
+            "deaths": int(deaths_by_age[i]),
+            "total": int(totals[i]),
+        }
+
+    for hosp in hospitals:
+        stats["hospital_stats"]["requests"] += hosp.vaccine_requests
+        stats["hospital_stats"]["stockouts"] += hosp.vaccine_stockouts
+
+    return stats
@@ -0,0 +1,398 @@
+"""
+Typed simulation configuration.
+
+load_config() reads config/simulation_config.yaml once, validates it against
+the frozen dataclasses below and returns a SimulationConfig. The age tables
+and disease thresholds are compiled into NumPy arrays when the config is
+built, so a config can be passed to every run of a sweep (including across
+processes) without re-parsing the YAML or rebuilding lookup tables.
+
+DEFAULT_CONFIG reproduces the values the engine has always used.
+
+Values are checked against the field annotations (Optional[...] fields may
+be null) and then for range and ordering. Sections and keys of the original
+config file that the engine does not model (UNMODELLED) are accepted,
+reported with a ConfigWarning and dropped; any other unknown key is an error.
+"""
+import bisect
+import math
+import os
+import typing
+import warnings
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "config", "simulation_config.yaml")
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class ConfigWarning(UserWarning):
+    pass
+
+
+def _frozen_array(values, dtype):
+    arr = np.array(values, dtype=dtype)
+    arr.setflags(write=False)
+    return arr
+
+
+def _check_bands(name, bands, width):
+    if not bands or any(len(b) != width for b in bands):
+        raise ConfigError(f"{name} must be a non-empty list of {width}-value bands")
+    edges = [b[0] for b in bands[:-1]]
+    if bands[-1][0] is not None or any(e is None for e in edges):
+        raise ConfigError(f"{name}: only the last band may (and must) have max_age null")
+    if edges != sorted(set(edges)):
+        raise ConfigError(f"{name}: max_age values must be strictly increasing")
+
+
+@dataclass(frozen=True)
+class GridConfig:
+    size: int = 40
+
+
+@dataclass(frozen=True)
+class PopulationConfig:
+    num_agents: int = 300
+    initial_infected: int = 5
+    age_mean: float = 40.0
+    age_sd: float = 20.0
+    age_max: int = 90
+
+
+@dataclass(frozen=True)
+class DiseaseConfig:
+    # Day thresholds are exclusive: a stage starts once days_infected exceeds them
+    incubation_days: int = 5
+    recovery_after_days: int = 14
+    death_after_days: int = 15
+    death_risk_mean: float = -0.0189952
+    death_risk_sd: float = 0.084830196
+    # Infection risk multiplier for 0, 1 and 2+ vaccine doses
+    dose_risk_multiplier: typing.Tuple[float, ...] = (1.0, 0.3, 0.0)
+    # (max_age, mean, sd) bands, max_age inclusive; the last band is open-ended (None)
+    transmission_by_age: tuple = (
+        (4, 0.27111401, 1.5623923),
+        (9, 0.27619241, 1.5853057),
+        (17, 0.23507195, 1.35129295),
+        (29, 0.16806533, 1.11063756),
+        (39, 0.17647801, 1.28169089),
+        (49, 0.16738755, 1.14906492),
+        (59, 0.15507585, 1.22311138),
+        (69, 0.16214078, 1.15063113),
+        (79, 0.17056577, 1.17523736),
+        (None, 0.20907177, 1.35574058),
+    )
+    # (max_age, probability) bands for natural recovery, same layout
+    natural_recovery_by_age: tuple = (
+        (5, 0.2),
+        (29, 0.5),
+        (39, 0.3),
+        (49, 0.2),
+        (59, 0.1),
+        (69, 0.05),
+        (None, 0.0),
+    )
+
+    # Compiled lookup tables (see __post_init__)
+    transmission_age_edges: np.ndarray = field(init=False, repr=False, compare=False)
+    transmission_mean: np.ndarray = field(init=False, repr=False, compare=False)
+    transmission_sd: np.ndarray = field(init=False, repr=False, compare=False)
+    # P(Normal(mean, sd) > 0) = Phi(mean / sd): the per-contact-tick infection chance of each band
+    transmission_prob: np.ndarray = field(init=False, repr=False, compare=False)
+    recovery_age_edges: np.ndarray = field(init=False, repr=False, compare=False)
+    recovery_prob: np.ndarray = field(init=False, repr=False, compare=False)
+    dose_multiplier: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        _check_bands("disease.transmission_by_age", self.transmission_by_age, 3)
+        _check_bands("disease.natural_recovery_by_age", self.natural_recovery_by_age, 2)
+        if len(self.dose_risk_multiplier) != 3:
+            raise ConfigError("disease.dose_risk_multiplier needs 3 values (0, 1, 2+ doses)")
+        if not all(b[2] > 0 for b in self.transmission_by_age):
+            raise ConfigError("disease.transmission_by_age sd values must be positive")
+        compiled = {
+            "transmission_age_edges": _frozen_array([b[0] for b in self.transmission_by_age[:-1]], np.int64),
+            "transmission_mean": _frozen_array([b[1] for b in self.transmission_by_age], np.float64),
+            "transmission_sd": _frozen_array([b[2] for b in self.transmission_by_age], np.float64),
+            "transmission_prob": _frozen_array(
+                [0.5 * (1 + math.erf(mean / (sd * math.sqrt(2)))) for _, mean, sd in self.transmission_by_age],
+                np.float64),
+            "recovery_age_edges": _frozen_array([b[0] for b in self.natural_recovery_by_age[:-1]], np.int64),
+            "recovery_prob": _frozen_array([b[1] for b in self.natural_recovery_by_age], np.float64),
+            "dose_multiplier": _frozen_array(self.dose_risk_multiplier, np.float64),
+        }
+        for name, value in compiled.items():
+            object.__setattr__(self, name, value)
+        # Plain tuples for the scalar lookups used by the Agent engine
+        object.__setattr__(self, "_transmission_edges", tuple(b[0] for b in self.transmission_by_age[:-1]))
+        object.__setattr__(self, "_recovery_edges", tuple(b[0] for b in self.natural_recovery_by_age[:-1]))
+
+    def transmission_params(self, age):
+        """(mean, sd) of the transmission draw for one agent's age."""
+        band = self.transmission_by_age[bisect.bisect_left(self._transmission_edges, age)]
+        return band[1], band[2]
+
+    def recovery_probability(self, age):
+        return self.natural_recovery_by_age[bisect.bisect_left(self._recovery_edges, age)][1]
+
+    def risk_multiplier(self, doses):
+        return self.dose_risk_multiplier[min(doses, 2)]
+
+
+@dataclass(frozen=True)
+class HospitalConfig:
+    count: int = 4
+    vaccine_capacity: int = 10
+    admin_speed: int = 5
+    beds_per_1000: float = 2.35
+    min_beds: int = 5
+    vaccine_types: typing.Tuple[str, ...] = ("Type 1", "Type 2")
+    treatment_success_prob: float = 0.5
+    # Sick agents at least this old and sick for more than this many days seek treatment
+    treatment_min_age: int = 30
+    treatment_after_days: int = 14
+    vaccine_seeking_prob: float = 0.05
+
+
+@dataclass(frozen=True)
+class RunConfig:
+    max_steps: int = 365
+    monte_carlo_runs: int = 50
+    random_seed: Optional[int] = None
+    workers: int = 1
+    # Reference engine only: move everyone with one set of array draws per tick.
+    # Faster, but consumes the random stream differently, so seeded runs change.
+    bulk_movement: bool = False
+
+
+@dataclass(frozen=True)
+class OutputConfig:
+    results_dir: str = "results"
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    grid: GridConfig = field(default_factory=GridConfig)
+    population: PopulationConfig = field(default_factory=PopulationConfig)
+    disease: DiseaseConfig = field(default_factory=DiseaseConfig)
+    hospital: HospitalConfig = field(default_factory=HospitalConfig)
+    simulation: RunConfig = field(default_factory=RunConfig)
+    output: OutputConfig = field(default_factory=OutputConfig)
+
+
+DEFAULT_CONFIG = SimulationConfig()
+
+_SECTIONS = {f.name: f.default_factory for f in fields(SimulationConfig)}
+_BAND_KEYS = {
+    "transmission_by_age": ("max_age", "mean", "sd"),
+    "natural_recovery_by_age": ("max_age", "prob"),
+}
+
+# Settings of the original config file that the engine does not model (yet):
+# a whole section (None) or the listed keys of a section
+UNMODELLED = {
+    "spatial": None,
+    "interventions": None,
+    "population": ("total_agents", "age_distribution", "health_status", "occupation_distribution"),
+    "disease": ("initial_infected", "incubation_period_days", "infectious_period_days", "transmission_probability",
+                "mortality_rate_by_age", "hospitalization_rate_by_age"),
+    "simulation": ("duration_days",),
+    "hospital": ("total_beds", "icu_beds", "average_stay_days"),
+    "output": ("save_interval", "generate_plots", "save_agent_data", "verbose"),
+}
+
+
+def _coerce(path, value, annotation):
+    # Checks/converts one value against a field annotation: bool, int, float,
+    # str, Tuple[T, ...] or Optional[one of those]
+    if typing.get_origin(annotation) is typing.Union:
+        if value is None:
+            return None
+        annotation = next(a for a in typing.get_args(annotation) if a is not type(None))
+    origin = typing.get_origin(annotation)
+    name = getattr(annotation, "__name__", str(annotation))
+    try:
+        if value is None:
+            raise TypeError
+        if origin is tuple:
+            if isinstance(value, (str, bytes, dict)):
+                raise TypeError
+            item = typing.get_args(annotation)[0]
+            return tuple(_coerce(f"{path}[{i}]", v, item) for i, v in enumerate(value))
+        if annotation is bool:
+            if not isinstance(value, bool):
+                raise TypeError
+            return value
+        if isinstance(value, bool):
+            raise TypeError
+        if annotation is int:
+            if not float(value).is_integer():
+                raise TypeError
+            return int(value)
+        if annotation is float:
+            return float(value)
+        if annotation is str:
+            if not isinstance(value, str):
+                raise TypeError
+            return value
+    except (TypeError, ValueError):
+        raise ConfigError(f"{path}: expected {name}, got {value!r}") from None
+    return value
+
+
+def _coerce_bands(path, value, keys):
+    # [{max_age, mean, sd}, ...] -> ((max_age, mean, sd), ...); max_age is an int or null
+    try:
+        bands = [tuple(band[k] for k in keys) for band in value]
+    except (TypeError, KeyError):
+        raise ConfigError(f"{path}: each band needs keys {list(keys)}") from None
+    return tuple(
+        (_coerce(f"{path}[{i}].max_age", band[0], Optional[int]),)
+        + tuple(_coerce(f"{path}[{i}].{k}", v, float) for k, v in zip(keys[1:], band[1:]))
+        for i, band in enumerate(bands)
+    )
+
+
+def _drop_unmodelled(data):
+    # Copy of `data` without the UNMODELLED settings, and their dotted paths
+    kept, dropped = {}, []
+    for section, raw in data.items():
+        skip = UNMODELLED.get(section, ())
+        if skip is None:
+            dropped.append(section)
+        elif isinstance(raw, dict) and set(raw) & set(skip):
+            dropped.extend(f"{section}.{key}" for key in raw if key in skip)
+            kept[section] = {key: value for key, value in raw.items() if key not in skip}
+        else:
+            kept[section] = raw
+    return kept, dropped
+
+
+def _build_section(name, raw):
+    cls = _SECTIONS[name]
+    if not isinstance(raw, dict):
+        raise ConfigError(f"{name}: expected a mapping")
+    known = {f.name: f for f in fields(cls) if f.init}
+    unknown = set(raw) - set(known)
+    if unknown:
+        raise ConfigError(f"{name}: unknown keys {sorted(unknown)}")
+
+    values = {}
+    for key, value in raw.items():
+        path = f"{name}.{key}"
+        if key in _BAND_KEYS:
+            values[key] = _coerce_bands(path, value, _BAND_KEYS[key])
+        else:
+            values[key] = _coerce(path, value, known[key].type)
+    return cls(**values)
+
+
+def config_from_dict(data) -> SimulationConfig:
+    """
+    Builds and validates a SimulationConfig from a nested dict (e.g. parsed
+    YAML). UNMODELLED settings are dropped with a ConfigWarning.
+    """
+    data, dropped = _drop_unmodelled(data or {})
+    if dropped:
+        warnings.warn(f"Ignoring config settings the engine does not model: {', '.join(dropped)}",
+                      ConfigWarning, stacklevel=2)
+    unknown = set(data) - set(_SECTIONS)
+    if unknown:
+        raise ConfigError(f"Unknown config sections {sorted(unknown)}")
+    config = SimulationConfig(**{name: _build_section(name, raw) for name, raw in data.items()})
+    _validate(config)
+    return config
+
+
+def config_to_dict(config) -> dict:
+    """Inverse of config_from_dict()."""
+    data = {}
+    for section in fields(config):
+        values = {}
+        for f in fields(getattr(config, section.name)):
+            if not f.init:
+                continue
+            value = getattr(getattr(config, section.name), f.name)
+            if f.name in _BAND_KEYS:
+                value = [dict(zip(_BAND_KEYS[f.name], band)) for band in value]
+            elif isinstance(value, tuple):
+                value = list(value)
+            values[f.name] = value
+        data[section.name] = values
+    return data
+
+
+def _validate(config):
+    pop, disease, hc, run = config.population, config.disease, config.hospital, config.simulation
+    checks = [
+        (config.grid.size > 0, "grid.size must be positive"),
+        (pop.num_agents >= 0, "population.num_agents must be >= 0"),
+        (0 <= pop.initial_infected <= pop.num_agents,
+         "population.initial_infected must be between 0 and num_agents"),
+        (pop.age_sd >= 0, "population.age_sd must be >= 0"),
+        (0 <= pop.age_mean <= pop.age_max, "population.age_mean must be between 0 and age_max"),
+        (disease.incubation_days > 0, "disease.incubation_days must be positive"),
+        (disease.recovery_after_days > disease.incubation_days,
+         "disease.recovery_after_days must be greater than incubation_days"),
+        (disease.death_after_days > disease.incubation_days,
+         "disease.death_after_days must be greater than incubation_days"),
+        (disease.death_risk_sd >= 0, "disease.death_risk_sd must be >= 0"),
+        (all(0 <= m <= 1 for m in disease.dose_risk_multiplier),
+         "disease.dose_risk_multiplier values must be in [0, 1]"),
+        (all(0 <= b[1] <= 1 for b in disease.natural_recovery_by_age),
+         "disease.natural_recovery_by_age probabilities must be in [0, 1]"),
+        (hc.count >= 0, "hospital.count must be >= 0"),
+        (hc.vaccine_capacity >= 0, "hospital.vaccine_capacity must be >= 0"),
+        (hc.beds_per_1000 >= 0 and hc.min_beds >= 0, "hospital.beds_per_1000 and min_beds must be >= 0"),
+        (len(hc.vaccine_types) > 0, "hospital.vaccine_types must not be empty"),
+        (len(hc.vaccine_types) <= 8, "hospital.vaccine_types can list at most 8 types (one bit each per agent)"),
+        (0 <= hc.treatment_success_prob <= 1, "hospital.treatment_success_prob must be in [0, 1]"),
+        (hc.treatment_after_days >= 0, "hospital.treatment_after_days must be >= 0"),
+        (0 <= hc.vaccine_seeking_prob <= 1, "hospital.vaccine_seeking_prob must be in [0, 1]"),
+        (run.max_steps >= 0, "simulation.max_steps must be >= 0"),
+        (run.monte_carlo_runs >= 0, "simulation.monte_carlo_runs must be >= 0"),
+        (run.workers >= 1, "simulation.workers must be >= 1"),
+        (run.random_seed is None or run.random_seed >= 0, "simulation.random_seed must be null or >= 0"),
+    ]
+    for ok, message in checks:
+        if not ok:
+            raise ConfigError(message)
+
+
+def with_overrides(config, overrides) -> SimulationConfig:
+    """
+    Copy of `config` with dotted-path values replaced, e.g.
+    {"population.num_agents": 500, "hospital.vaccine_capacity": 20}.
+    """
+    sections = {}
+    for path, value in overrides.items():
+        section, _, key = path.partition(".")
+        if section not in _SECTIONS or not key:
+            raise ConfigError(f"Bad override path {path!r}")
+        sections.setdefault(section, {})[key] = value
+    data = config_to_dict(config)
+    for section, values in sections.items():
+        data[section].update(values)
+    return config_from_dict(data)
+
+
+@lru_cache(maxsize=8)
+def _load_cached(path, mtime):
+    import yaml
+
+    with open(path) as f:
+        data = yaml.safe_load(f)
+    return config_from_dict(data)
+
+
+def load_config(path=None) -> SimulationConfig:
+    """Loads and validates a YAML config; repeated loads of an unchanged file are cached."""
+    path = os.path.abspath(path or DEFAULT_CONFIG_PATH)
+    return _load_cached(path, os.path.getmtime(path))
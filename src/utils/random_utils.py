@@ -0,0 +1,139 @@
+"""
+Random number generation helpers.
+
+Every stochastic function in the engine takes an optional
+numpy.random.Generator. Pass one per simulation to make a run reproducible
+and to run simulations concurrently without sharing RNG state; None falls
+back to a process-wide default Generator.
+"""
+import numpy as np
+
+_default_rng = None
+
+
+def get_rng(rng=None):
+    """Returns rng, or the process-wide default Generator when rng is None."""
+    global _default_rng
+    if rng is not None:
+        return rng
+    if _default_rng is None:
+        _default_rng = np.random.default_rng()
+    return _default_rng
+
+
+def seed_default_rng(seed=None):
+    """Reseeds the process-wide default Generator."""
+    global _default_rng
+    _default_rng = np.random.default_rng(seed)
+    return _default_rng
+
+
+class BatchedDraws:
+    """
+    Generator look-alike that serves scalar draws out of pre-drawn blocks.
+
+    A phase that needs one or two random numbers per agent asks for them one
+    at a time; this object draws `size` of each kind in a single call up
+    front and hands them out in order, drawing another block only if the
+    phase runs past the estimate. Supports the subset of the Generator API
+    the engine uses: random(), normal(loc, scale) and integers(low, high).
+    """
+
+    def __init__(self, rng, size: int):
+        self._rng = rng
+        self._size = max(int(size), 1)
+        self._uniform = []
+        self._u_pos = 0
+        self._normal = []
+        self._n_pos = 0
+
+    def random(self) -> float:
+        if self._u_pos >= len(self._uniform):
+            # tolist() so each draw is a plain float, not a NumPy scalar
+            self._uniform = self._rng.random(self._size).tolist()
+            self._u_pos = 0
+        value = self._uniform[self._u_pos]
+        self._u_pos += 1
+        return value
+
+    def normal(self, loc: float = 0.0, scale: float = 1.0) -> float:
+        if self._n_pos >= len(self._normal):
+            self._normal = self._rng.standard_normal(self._size).tolist()
+            self._n_pos = 0
+        value = self._normal[self._n_pos]
+        self._n_pos += 1
+        return loc + scale * value
+
+    def integers(self, low: int, high: int) -> int:
+        return low + int(self.random() * (high - low))
+
+
+class AntitheticGenerator:
+    """
+    Mirror image of a Generator for antithetic variates: uniforms u become
+    1 - u, normals are reflected about their mean and integers about the
+    middle of their range. Two runs fed by a Generator and by its mirror
+    are negatively correlated, so their average has lower variance. Other
+    methods are passed through unchanged.
+    """
+
+    def __init__(self, rng):
+        self._rng = rng
+
+    def random(self, size=None):
+        return 1.0 - self._rng.random(size)
+
+    def standard_normal(self, size=None):
+        return -self._rng.standard_normal(size)
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        return 2 * loc - self._rng.normal(loc, scale, size)
+
+    def integers(self, low, high=None, size=None):
+        if high is None:
+            low, high = 0, low
+        return low + high - 1 - self._rng.integers(low, high, size)
+
+    def __getattr__(self, name):
+        return getattr(self._rng, name)
+
+
+# Purposes with their own random substream in common-random-numbers mode
+STREAM_PURPOSES = ("hospitals", "population", "movement", "transmission", "progression", "treatment")
+_PURPOSE = {name: i for i, name in enumerate(STREAM_PURPOSES)}
+
+
+class RandomStreams:
+    """
+    Common random numbers: one independent Generator per (purpose, tick),
+    derived from a single SeedSequence.
+
+    Two simulations built from the same seed draw movement, transmission,
+    progression and treatment numbers from identical substreams, and every
+    tick starts fresh substreams. A variant that consumes more or fewer
+    numbers in one phase (e.g. more hospitals, so more treatment rolls)
+    therefore stays synchronized with the baseline in every other phase
+    and in every later tick. antithetic=True mirrors every draw (see
+    AntitheticGenerator).
+    """
+
+    def __init__(self, seed=None, antithetic=False):
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.entropy = seed.entropy
+        self.spawn_key = tuple(seed.spawn_key)
+        self.antithetic = antithetic
+
+    def generator(self, purpose: str, tick: int = 0):
+        seq = np.random.SeedSequence(self.entropy, spawn_key=self.spawn_key + (_PURPOSE[purpose], tick))
+        rng = np.random.default_rng(seq)
+        return AntitheticGenerator(rng) if self.antithetic else rng
+
+    def to_dict(self):
+        # JSON-friendly, for checkpoints
+        return {"entropy": self.entropy, "spawn_key": list(self.spawn_key), "antithetic": self.antithetic}
+
+    @classmethod
+    def from_dict(cls, data):
+        seq = np.random.SeedSequence(data["entropy"], spawn_key=tuple(data["spawn_key"]))
+        return cls(seq, antithetic=data["antithetic"])
@@ -0,0 +1,154 @@
+"""
+Append-only, on-disk store for Monte Carlo results.
+
+Each finished run is written straight away as its own partition, so a crash
+loses at most the runs still in flight, and a resumed sweep can skip every
+run ID already on disk:
+
+    <root>/meta.json                       seed entropy and config of the sweep
+    <root>/runs/run_id=<id>/part-0.<ext>   the run's flattened stats row
+    <root>/series/run_id=<id>/part-0.<ext> its per-tick time series (optional)
+
+Partitions are Parquet (default) or Arrow IPC files when pyarrow is
+installed, and CSV otherwise. The run_id=<id> directory names follow the
+Hive layout, so pyarrow.dataset / pandas.read_parquet can open a whole
+directory directly. Excel and single-file CSV are export steps on top
+(export_results), not the primary store.
+"""
+import json
+import os
+import shutil
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+
+
+def _write_frame(frame, path, fmt):
+    # Written under a temporary name and renamed, so a partition is either complete or absent
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        frame.to_parquet(tmp, index=False)
+    elif fmt == "arrow":
+        frame.to_feather(tmp)
+    else:
+        frame.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _read_frame(path, fmt):
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    if fmt == "arrow":
+        return pd.read_feather(path)
+    return pd.read_csv(path)
+
+
+class ResultsStore:
+
+    def __init__(self, root, fmt=None):
+        # fmt: "parquet", "arrow" or "csv"; None picks parquet when pyarrow is installed, else csv
+        if fmt is None:
+            fmt = "parquet" if PYARROW_AVAILABLE else "csv"
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown results format {fmt!r}, expected one of {sorted(FORMATS)}")
+        if fmt != "csv" and not PYARROW_AVAILABLE:
+            raise ImportError(f"The {fmt!r} results format requires pyarrow; use fmt='csv'")
+        self.root = root
+        self.fmt = fmt
+        self.ext = FORMATS[fmt]
+
+    def _part(self, kind, run_id):
+        return os.path.join(self.root, kind, f"run_id={run_id}", f"part-0{self.ext}")
+
+    # --- Sweep metadata ---
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.root, "meta.json")
+
+    def read_meta(self):
+        if not os.path.exists(self.meta_path):
+            return None
+        with open(self.meta_path) as f:
+            return json.load(f)
+
+    def write_meta(self, meta):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.meta_path, "w") as f:
+            json.dump(meta, f, indent=2)
+
+    # --- Runs ---
+
+    def completed_run_ids(self, kind="runs"):
+        """Run IDs that already have a complete partition."""
+        directory = os.path.join(self.root, kind)
+        if not os.path.isdir(directory):
+            return set()
+        ids = set()
+        for name in os.listdir(directory):
+            if name.startswith("run_id=") and os.path.exists(os.path.join(directory, name, f"part-0{self.ext}")):
+                ids.add(int(name[len("run_id="):]))
+        return ids
+
+    def append(self, row, series=None):
+        """
+        Stores one run's row (a flatten_stats dict with a "Run ID") and,
+        optionally, its time series (a DataFrame, e.g. StatsAccumulator.time_series_frame()).
+        The series is written first, so a run counts as complete only once both are on disk.
+        """
+        run_id = row["Run ID"]
+        if series is not None:
+            path = self._part("series", run_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_frame(series, path, self.fmt)
+        path = self._part("runs", run_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_frame(pd.DataFrame([row]), path, self.fmt)
+
+    def read_runs(self):
+        """All stored rows as one DataFrame, in Run ID order."""
+        ids = sorted(self.completed_run_ids())
+        if not ids:
+            return pd.DataFrame()
+        return pd.concat([_read_frame(self._part("runs", i), self.fmt) for i in ids], ignore_index=True)
+
+    def read_series(self, run_ids=None):
+        """Stored time series, stacked with a "Run ID" column."""
+        ids = sorted(self.completed_run_ids("series") if run_ids is None else run_ids)
+        frames = []
+        for run_id in ids:
+            frame = _read_frame(self._part("series", run_id), self.fmt)
+            frame.insert(0, "Run ID", run_id)
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def clear(self):
+        """Deletes everything this store wrote under its root."""
+        for kind in ("runs", "series"):
+            shutil.rmtree(os.path.join(self.root, kind), ignore_errors=True)
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+
+
+def export_results(df, excel_path=None, csv_path=None):
+    """
+    Post-processing export of collected rows: Excel when excel_path is given
+    and openpyxl is installed, otherwise CSV. Returns the path written.
+    """
+    if excel_path is not None:
+        try:
+            df.to_excel(excel_path, index=False)
+            return excel_path
+        except Exception as e:
+            print(f"Could not save to Excel (missing openpyxl?): {e}")
+            if csv_path is None:
+                csv_path = os.path.splitext(excel_path)[0] + ".csv"
+    df.to_csv(csv_path, index=False)
+    return csv_path
@@ -0,0 +1,20 @@
+"""Colours shared by the pygame visualizer and the headless renderer (RGB tuples)."""
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+LIGHT_GRAY = (230, 230, 230)
+DARK_GRAY = (120, 120, 120)
+BLUE = (50, 120, 220)
+RED = (220, 60, 60)
+GREEN = (60, 180, 75)
+YELLOW = (255, 255, 0)
+LIGHT_BLUE = (173, 216, 230)
+DARK_BLUE = (0, 0, 139)
+GRAY = (128, 128, 128)
+
+# Cell colour by the most severe status in the cell (colour index of visulation.snapshot)
+# Priority: Infectious (Red) > Infected (Yellow) > Immune (Blue) > Healthy (Green)
+SEVERITY_COLORS = (GREEN, BLUE, YELLOW, RED)
+
+# By hospital code of visulation.snapshot (0 = no hospital)
+HOSPITAL_COLORS = (None, GRAY, LIGHT_BLUE, DARK_BLUE)
@@ -0,0 +1,160 @@
+"""
+Offscreen rendering for batch jobs: no pygame, no display.
+
+rasterize() turns a Snapshot into an RGB NumPy image with one cell_size x
+cell_size block per cell, coloured like the pygame visualizer (the most
+severe agent in the cell, else the hospital, else white). FrameRecorder
+writes every k-th tick's image either to a PNG sequence (write_png, zlib
+only) or, for a video path, straight into an ffmpeg process through a pipe
+when an ffmpeg executable is available.
+
+    sim = Simulation.create(seed=1, backend="numpy")
+    record_simulation(sim, "run.mp4", every=2, cell_size=4)
+"""
+import os
+import shutil
+import struct
+import subprocess
+import zlib
+
+import numpy as np
+
+from visulation.colors import WHITE, SEVERITY_COLORS, HOSPITAL_COLORS
+from visulation.snapshot import take_snapshot
+
+# Palette index: 0 empty, 1-3 hospital code, 4-7 colour index of the agents
+PALETTE = np.array([WHITE] + list(HOSPITAL_COLORS[1:]) + list(SEVERITY_COLORS), dtype=np.uint8)
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".webm", ".avi", ".mov", ".gif")
+
+
+def rasterize(snapshot, cell_size: int = 1):
+    """(height * cell_size, width * cell_size, 3) uint8 image of a Snapshot."""
+    index = np.where(snapshot.count > 0, 4 + snapshot.color.astype(np.intp), snapshot.hospital)
+    image = PALETTE[index].reshape(snapshot.height, snapshot.width, 3)
+    if cell_size > 1:
+        image = image.repeat(cell_size, axis=0).repeat(cell_size, axis=1)
+    return image
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(image, level: int = 6) -> bytes:
+    """PNG bytes of an (h, w, 3) uint8 image: 8-bit RGB, no filtering."""
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    h, w = image.shape[:2]
+    # Each scanline starts with its filter type byte (0 = none)
+    raw = np.zeros((h, w * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(h, w * 3)
+    header = struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", header)
+            + _png_chunk(b"IDAT", zlib.compress(raw.tobytes(), level)) + _png_chunk(b"IEND", b""))
+
+
+def write_png(path, image, level: int = 6):
+    with open(path, "wb") as f:
+        f.write(encode_png(image, level))
+
+
+class FrameRecorder:
+
+    def __init__(self, path, every: int = 1, cell_size: int = 1, fps: int = 30, ffmpeg=None):
+        """
+        path: a directory for a PNG sequence (frame_000000.png, numbered by
+        tick), or a video file (.mp4, .mkv, ...) encoded by ffmpeg. ffmpeg is
+        the executable to use (default: ffmpeg on PATH); without one a video
+        path falls back to a PNG sequence in <path stem>_frames/.
+        """
+        self.every = every
+        self.cell_size = cell_size
+        self.fps = fps
+        self.frames = 0
+        self._process = None
+        self._size = None
+
+        self.ffmpeg = ffmpeg or shutil.which("ffmpeg")
+        self.video = path.lower().endswith(VIDEO_EXTENSIONS)
+        if self.video and self.ffmpeg is None:
+            print(f"ffmpeg not found, writing PNG frames instead of {path}")
+            path = os.path.splitext(path)[0] + "_frames"
+            self.video = False
+        self.path = path
+        if not self.video:
+            os.makedirs(path, exist_ok=True)
+
+    def capture(self, snapshot) -> bool:
+        """Writes the snapshot if its tick is a multiple of `every`; returns whether it did."""
+        if snapshot.tick % self.every != 0:
+            return False
+        self.write(rasterize(snapshot, self.cell_size), snapshot.tick)
+        return True
+
+    def write(self, image, tick=None):
+        if self.video:
+            self._pipe(image)
+        else:
+            tick = self.frames if tick is None else tick
+            write_png(os.path.join(self.path, f"frame_{tick:06d}.png"), image)
+        self.frames += 1
+
+    def _pipe(self, image):
+        h, w = image.shape[:2]
+        if self._process is None:
+            self._size = (w, h)
+            self._process = subprocess.Popen(
+                [self.ffmpeg, "-y", "-loglevel", "error",
+                 "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}", "-r", str(self.fps), "-i", "-",
+                 # yuv420p (playable everywhere) needs even dimensions
+                 "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", self.path],
+                stdin=subprocess.PIPE,
+            )
+        elif (w, h) != self._size:
+            raise ValueError(f"Frame size {w}x{h} differs from the video's {self._size[0]}x{self._size[1]}")
+        self._process.stdin.write(np.ascontiguousarray(image, dtype=np.uint8).tobytes())
+
+    def close(self):
+        if self._process is not None:
+            self._process.stdin.close()
+            returncode = self._process.wait()
+            self._process = None
+            if returncode != 0:
+                raise RuntimeError(f"ffmpeg exited with status {returncode} writing {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record(step_fn, grid, agents, hospitals, path, steps=365, every: int = 1, cell_size: int = 1, fps: int = 30,
+           ffmpeg=None, tick=0) -> int:
+    """
+    Runs step_fn() (engine.step / Simulation.step) up to `steps` ticks or until
+    it returns False, writing a frame every `every` ticks (tick 0 included).
+    Returns the number of ticks run.
+    """
+    with FrameRecorder(path, every=every, cell_size=cell_size, fps=fps, ffmpeg=ffmpeg) as recorder:
+
+        def capture():
+            # Snapshots are only taken for the ticks that are written
+            if tick % every == 0:
+                recorder.capture(take_snapshot(tick, grid.width, grid.height, agents, hospitals, grid))
+
+        capture()
+        start = tick
+        while tick - start < steps:
+            should_continue = step_fn()
+            tick += 1
+            capture()
+            if should_continue is False:
+                break
+    return tick - start
+
+
+def record_simulation(sim, path, every: int = 1, cell_size: int = 1, fps: int = 30, ffmpeg=None) -> int:
+    """record() for a simulation.simulation.Simulation, until it finishes."""
+    return record(sim.step, sim.grid, sim.agents, sim.hospitals, path, steps=sim.max_ticks - sim.tick,
+                  every=every, cell_size=cell_size, fps=fps, ffmpeg=ffmpeg, tick=sim.tick)
@@ -3,20 +3,28 @@ from __future__ import annotations
 import sys
 from typing import Callable, List, Tuple, Optional
 
+import numpy as np
 import pygame
 
-# Colors
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-LIGHT_GRAY = (230, 230, 230)
-DARK_GRAY = (120, 120, 120)
-BLUE = (50, 120, 220)
-RED = (220, 60, 60)
-GREEN = (60, 180, 75)
-YELLOW = (255, 255, 0)
-LIGHT_BLUE = (173, 216, 230)
-DARK_BLUE = (0, 0, 139)
-GRAY = (128, 128, 128)
+from models.agent import HealthState
+from visulation.colors import (WHITE, BLACK, LIGHT_GRAY, DARK_GRAY, BLUE, RED, GREEN, YELLOW, LIGHT_BLUE,
+                               DARK_BLUE, GRAY, SEVERITY_COLORS, HOSPITAL_COLORS)
+from visulation.snapshot import SimulationRunner, cell_state
+
+# Fonts are looked up once per size; SysFont scans the system fonts on every call
+_fonts = {}
+
+
+def _font(size: int):
+    if size not in _fonts:
+        _fonts[size] = pygame.font.SysFont(None, size)
+    return _fonts[size]
+
+
+def _quit() -> None:
+    # Fonts do not survive pygame.quit(); the next run() loads them again
+    _fonts.clear()
+    pygame.quit()
 
 
 def _draw_grid(surface, width: int, height: int, cell_size: int) -> None:
@@ -47,24 +55,37 @@ def _draw_hospitals(surface, hospitals, cell_size: int) -> None:
             
         pygame.draw.rect(surface, color, rect)
         # Small "H" label
-        font = pygame.font.SysFont(None, max(12, cell_size // 2))
+        font = _font(max(12, cell_size // 2))
         text = font.render("H", True, WHITE)
         text_rect = text.get_rect(center=rect.center)
         surface.blit(text, text_rect)
 
 
-def _draw_agents(surface, agents, cell_size: int) -> None:
-    # Group agents by location
+def _group_agents(agents, grid=None):
+    # Read the groups from the grid's occupancy index when there is one
+    if grid is not None and hasattr(grid, "index"):
+        ids = grid.index.ids.tolist()
+        return {
+            (cell % grid.width, cell // grid.width): [agents[i] for i in ids[start:end]]
+            for cell, start, end in zip(*(a.tolist() for a in grid.index.groups()))
+        }
+
     location_agents = {}
     for ag in agents:
-        if ag.health == "dead":
+        if ag.state == HealthState.DEAD:
             continue
         loc = ag.location
         if loc not in location_agents:
             location_agents[loc] = []
         location_agents[loc].append(ag)
+    return location_agents
+
+
+def _draw_agents(surface, agents, cell_size: int, grid=None) -> None:
+    # Group agents by location
+    location_agents = _group_agents(agents, grid)
     
-    font = pygame.font.SysFont(None, int(cell_size * 0.8))
+    font = _font(int(cell_size * 0.8))
 
     for (x, y), ag_list in location_agents.items():
         count = len(ag_list)
@@ -74,9 +95,9 @@ def _draw_agents(surface, agents, cell_size: int) -> None:
         
         # Determine color based on the most severe status in the cell
         # Priority: Infectious (Red) > Infected (Yellow) > Immune (Blue) > Healthy (Green)
-        has_infectious = any(ag.health == "infectious" for ag in ag_list)
-        has_infected = any(ag.health == "infected" for ag in ag_list)
-        has_immune = any(ag.health == "immune" for ag in ag_list)
+        has_infectious = any(ag.state == HealthState.INFECTIOUS for ag in ag_list)
+        has_infected = any(ag.state == HealthState.INFECTED for ag in ag_list)
+        has_immune = any(ag.state == HealthState.IMMUNE for ag in ag_list)
         
         if has_infectious:
             color = RED
@@ -97,12 +118,113 @@ def _draw_agents(surface, agents, cell_size: int) -> None:
 
 
 def _draw_step_counter(surface, step: int, width: int, cell_size: int) -> None:
-    font = pygame.font.SysFont(None, 30)
+    font = _font(30)
     text = font.render(f"Step: {step}", True, BLACK)
     text_rect = text.get_rect(topright=(width * cell_size - 10, 10))
     surface.blit(text, text_rect)
 
 
+class GridRenderer:
+    """
+    Incremental renderer for the same picture as the _draw_* functions.
+
+    The grid lines live on a background surface drawn once, fonts and text
+    glyphs ("H", the per-cell counts) are rendered once and reused, and each
+    frame only the cells whose hospital, agent count or colour changed since
+    the last frame are redrawn and passed to pygame.display.update(rects).
+    Per-cell state comes from the grid's occupancy index when there is one.
+    """
+
+    # Above this fraction of changed cells one full flip is cheaper than many rects
+    FULL_REDRAW_FRACTION = 0.3
+
+    def __init__(self, surface, width: int, height: int, cell_size: int):
+        self.surface = surface
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        # In the display's pixel format, so a full redraw is one plain copy
+        self.background = pygame.Surface(surface.get_size()).convert(surface)
+        _draw_grid(self.background, width, height, cell_size)
+        self._glyphs = {}
+        self._state = None
+        self._step_rect = None
+
+    def _glyph(self, text: str, size: int, color):
+        key = (text, size, color)
+        if key not in self._glyphs:
+            self._glyphs[key] = _font(size).render(text, True, color).convert_alpha(self.surface)
+        return self._glyphs[key]
+
+    def _draw_cell(self, cell: int, hospital: int, count: int, color: int):
+        x, y = cell % self.width, cell // self.width
+        rect = _cell_rect(x, y, self.cell_size)
+        # The background of one cell is white with its top and left grid lines;
+        # filling those reads nothing, unlike a blit from the background surface
+        self.surface.fill(WHITE, rect)
+        self.surface.fill(LIGHT_GRAY, (rect.x, rect.y, rect.w, 1))
+        self.surface.fill(LIGHT_GRAY, (rect.x, rect.y, 1, rect.h))
+        if hospital:
+            pygame.draw.rect(self.surface, HOSPITAL_COLORS[hospital], rect)
+            self._blit_label("H", max(12, self.cell_size // 2), rect.center, rect)
+        if count:
+            center = (int((x + 0.5) * self.cell_size), int((y + 0.5) * self.cell_size))
+            pygame.draw.circle(self.surface, SEVERITY_COLORS[color], center, int(self.cell_size * 0.4))
+            if count > 1:
+                self._blit_label(str(count), int(self.cell_size * 0.8), center, rect)
+        return rect
+
+    def _blit_label(self, label: str, size: int, center, cell_rect):
+        text = self._glyph(label, size, WHITE)
+        text_rect = text.get_rect(center=center)
+        if cell_rect.contains(text_rect):
+            self.surface.blit(text, text_rect)
+        else:
+            # Clipped to its cell, so redrawing one cell never leaves traces in its neighbours
+            self.surface.set_clip(cell_rect)
+            self.surface.blit(text, text_rect)
+            self.surface.set_clip(None)
+
+    def _cells_under(self, rect):
+        # Cells covered by a screen rect
+        x0, x1 = rect.left // self.cell_size, min(self.width, (rect.right - 1) // self.cell_size + 1)
+        y0, y1 = rect.top // self.cell_size, min(self.height, (rect.bottom - 1) // self.cell_size + 1)
+        return [y * self.width + x for y in range(max(y0, 0), y1) for x in range(max(x0, 0), x1)]
+
+    def draw(self, agents, hospitals, step: int, grid=None):
+        """Draws one frame and returns the dirty rects (None after a full redraw)."""
+        state = cell_state(self.width, self.height, agents, hospitals, grid)
+        return self.draw_state(state, f"Step: {step}")
+
+    def draw_snapshot(self, snapshot, label: Optional[str] = None):
+        """Same as draw() for a visulation.snapshot.Snapshot."""
+        return self.draw_state(snapshot.state(), label or f"Step: {snapshot.tick}")
+
+    def draw_state(self, state, label: str):
+        """state: (hospital code, agent count, colour index) per cell, see visulation.snapshot.cell_state."""
+        if self._state is None:
+            changed = np.arange(self.width * self.height)
+        else:
+            changed = np.flatnonzero(np.logical_or.reduce([new != old for new, old in zip(state, self._state)]))
+        self._state = state
+
+        # The step counter sits on top of the cells under it, so those are redrawn with it
+        text = _font(30).render(label, True, BLACK)
+        step_rect = text.get_rect(topright=(self.width * self.cell_size - 10, 10))
+        under = step_rect if self._step_rect is None else step_rect.union(self._step_rect)
+        self._step_rect = step_rect
+        changed = np.union1d(changed, self._cells_under(under)).astype(np.int64)
+
+        full = len(changed) >= self.FULL_REDRAW_FRACTION * self.width * self.height
+        if full:
+            self.surface.blit(self.background, (0, 0))
+            changed = np.flatnonzero((state[0] != 0) | (state[1] != 0))
+        hospital, count, color = (a[changed].tolist() for a in state)
+        rects = list(map(self._draw_cell, changed.tolist(), hospital, count, color))
+        self.surface.blit(text, step_rect)
+        return None if full else rects
+
+
 def run(
     grid,
     agents,
@@ -111,17 +233,32 @@ def run(
     cell_size: int = 20,
     fps: int = 60, # default 8
     step_fn: Optional[Callable[[], None]] = None,
+    threaded: bool = False,
+    ticks_per_frame: int = 1,
 ) -> None:
     """Run a simple visualization loop using pygame.
 
     Close the window or press ESC to exit early.
+
+    threaded=True runs step_fn in a worker thread (see visulation.snapshot)
+    and draws the latest snapshot at `fps`, so `steps` counts ticks rather
+    than frames. Keys: SPACE pause/resume, RIGHT single step, UP/DOWN
+    double/halve the ticks simulated per frame.
     """
+    if threaded:
+        if step_fn is None:
+            raise ValueError("threaded=True needs a step_fn")
+        runner = SimulationRunner(step_fn, grid, agents, hospitals, max_ticks=steps, ticks_per_frame=ticks_per_frame)
+        run_threaded(runner, cell_size, fps)
+        return
+
     pygame.init()
     try:
         width, height = grid.width, grid.height
         screen = pygame.display.set_mode((width * cell_size, height * cell_size))
         pygame.display.set_caption("Pandemic Simulation")
         clock = pygame.time.Clock()
+        renderer = GridRenderer(screen, width, height, cell_size)
 
         running = True
         frame = 0
@@ -139,14 +276,70 @@ def run(
                     print("Simulation ended early: All agents are either healthy or infected.")
                     running = False
 
-            # Draw
-            _draw_grid(screen, width, height, cell_size)
-            _draw_hospitals(screen, hospitals, cell_size)
-            _draw_agents(screen, agents, cell_size)
-            _draw_step_counter(screen, frame, width, cell_size)
-
-            pygame.display.flip()
+            # Draw only what changed since the last frame
+            rects = renderer.draw(agents, hospitals, frame, grid)
+            if rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(rects)
             clock.tick(fps)
             frame += 1
     finally:
-        pygame.quit()
+        _quit()
+
+
+def _runner_label(runner, snapshot) -> str:
+    label = f"Step: {snapshot.tick}"
+    if runner.paused:
+        return label + " (paused)"
+    if runner.ticks_per_frame > 1:
+        return label + f" x{runner.ticks_per_frame}"
+    return label
+
+
+def run_threaded(runner: SimulationRunner, cell_size: int = 20, fps: int = 30) -> None:
+    """
+    Render loop over a SimulationRunner (e.g. SimulationRunner.for_simulation(sim)):
+    the simulation advances in the runner's thread, this loop shows its latest
+    snapshot at `fps` until the run ends or the window is closed.
+    """
+    pygame.init()
+    try:
+        width, height = runner.grid.width, runner.grid.height
+        screen = pygame.display.set_mode((width * cell_size, height * cell_size))
+        pygame.display.set_caption("Pandemic Simulation")
+        clock = pygame.time.Clock()
+        renderer = GridRenderer(screen, width, height, cell_size)
+
+        with runner:
+            running = True
+            while running:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_ESCAPE:
+                            running = False
+                        elif event.key == pygame.K_SPACE:
+                            runner.toggle_pause()
+                        elif event.key == pygame.K_RIGHT:
+                            runner.step_once()
+                        elif event.key == pygame.K_UP:
+                            runner.faster()
+                        elif event.key == pygame.K_DOWN:
+                            runner.slower()
+
+                snapshot = runner.frame()
+                rects = renderer.draw_snapshot(snapshot, _runner_label(runner, snapshot))
+                if rects is None:
+                    pygame.display.flip()
+                else:
+                    pygame.display.update(rects)
+
+                if snapshot.finished:
+                    if runner.ended_early:
+                        print("Simulation ended early: All agents are either healthy or infected.")
+                    running = False
+                clock.tick(fps)
+    finally:
+        _quit()
@@ -0,0 +1,226 @@
+"""
+Immutable grid snapshots and a background simulation runner for the visualizer.
+
+Nothing here imports pygame. A Snapshot holds what the renderer draws per
+cell (hospital, agent count, colour) as read-only arrays, so the render loop
+can keep drawing the latest one while the simulation thread moves on.
+
+SimulationRunner steps the simulation in a worker thread. The render loop
+calls frame() once per displayed frame, which grants the worker up to
+ticks_per_frame ticks; the worker publishes a new snapshot after them (and
+at least every publish_interval seconds during a long batch). A slow tick
+therefore never blocks the window, and a fast simulation can run many ticks
+per displayed frame. pause(), resume(), step_once(), faster() and slower()
+are the keyboard controls.
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from models.population import DEAD, Population
+
+# Colour index per health code, by the most severe status in a cell:
+# 0 healthy < 1 immune < 2 infected < 3 infectious (dead agents are not on the grid)
+SEVERITY = np.array([0, 2, 3, 1, 0], dtype=np.int8)
+
+HOSPITAL_INACTIVE, HOSPITAL_TYPE_1, HOSPITAL_OTHER = 1, 2, 3
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    tick: int
+    width: int
+    height: int
+    hospital: np.ndarray  # 0 = none, else HOSPITAL_INACTIVE / HOSPITAL_TYPE_1 / HOSPITAL_OTHER
+    count: np.ndarray     # living agents per cell
+    color: np.ndarray     # colour index (see SEVERITY) of the most severe agent per cell
+    finished: bool = False
+
+    def state(self):
+        return self.hospital, self.count, self.color
+
+
+def hospital_code(hosp) -> int:
+    if not hosp.active:
+        return HOSPITAL_INACTIVE
+    return HOSPITAL_TYPE_1 if hosp.vaccine_type == "Type 1" else HOSPITAL_OTHER
+
+
+def cell_state(width, height, agents, hospitals, grid=None):
+    """
+    (hospital code, agent count, colour index) per cell as three flat arrays
+    of width * height. agents is an Agent list or a Population; the cells are
+    read from the grid's occupancy index when a grid is given.
+    """
+    num_cells = width * height
+    hospital = np.zeros(num_cells, dtype=np.int8)
+    for hosp in hospitals:
+        x, y = hosp.location
+        hospital[y * width + x] = hospital_code(hosp)
+
+    if isinstance(agents, Population):
+        ids = grid.index.ids if grid is not None else agents.living()
+        health = agents.health[ids]
+        cells = agents.y[ids].astype(np.int64) * width + agents.x[ids]
+    elif grid is not None:
+        ids = grid.index.ids
+        health = np.fromiter((agents[i].state for i in ids), dtype=np.int8, count=len(ids))
+        cells = grid.index.cell_of[ids]
+    else:
+        living = [ag for ag in agents if ag.state != DEAD]
+        health = np.fromiter((ag.state for ag in living), dtype=np.int8, count=len(living))
+        cells = np.array([ag.location[1] * width + ag.location[0] for ag in living], dtype=np.int64)
+
+    count = np.bincount(cells, minlength=num_cells)
+    color = np.zeros(num_cells, dtype=np.int8)
+    np.maximum.at(color, cells, SEVERITY[health])
+    return hospital, count, color
+
+
+def take_snapshot(tick, width, height, agents, hospitals, grid=None, finished=False) -> Snapshot:
+    hospital, count, color = cell_state(width, height, agents, hospitals, grid)
+    for a in (hospital, count, color):
+        a.flags.writeable = False
+    return Snapshot(tick, width, height, hospital, count, color, finished)
+
+
+class SimulationRunner:
+
+    # Upper bound for faster()
+    MAX_TICKS_PER_FRAME = 1024
+
+    def __init__(self, step_fn, grid, agents, hospitals, max_ticks=None, ticks_per_frame=1, tick=0,
+                 publish_interval=0.05):
+        # step_fn() advances one tick and returns False once the run has ended (engine.step / Simulation.step)
+        self.step_fn = step_fn
+        self.grid = grid
+        self.agents = agents
+        self.hospitals = hospitals
+        self.max_ticks = max_ticks
+        self.ticks_per_frame = ticks_per_frame
+        self.tick = tick
+        self.publish_interval = publish_interval
+        self.paused = False
+        self.finished = False
+        self.ended_early = False  # step_fn() returned False before max_ticks
+        self.error = None
+        self._budget = 0
+        self._stop = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self._latest = self._snapshot()
+
+    @classmethod
+    def for_simulation(cls, sim, ticks_per_frame=1, **kwargs):
+        """Runner over a simulation.simulation.Simulation, any backend."""
+        return cls(sim.step, sim.grid, sim.agents, sim.hospitals, max_ticks=sim.max_ticks,
+                   ticks_per_frame=ticks_per_frame, tick=sim.tick, **kwargs)
+
+    def _snapshot(self):
+        return take_snapshot(self.tick, self.grid.width, self.grid.height, self.agents, self.hospitals,
+                             self.grid, self.finished)
+
+    @property
+    def latest(self) -> Snapshot:
+        return self._latest
+
+    # --- Worker thread ---
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="simulation", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stop or self._budget > 0)
+                if self._stop:
+                    return
+                n, self._budget = self._budget, 0
+
+            published = time.perf_counter()
+            for _ in range(n):
+                try:
+                    should_continue = self.step_fn()
+                except BaseException as e:
+                    self.error = e
+                    self.finished = True
+                    break
+                self.tick += 1
+                if should_continue is False:
+                    self.ended_early = True
+                    self.finished = True
+                elif self.max_ticks is not None and self.tick >= self.max_ticks:
+                    self.finished = True
+                if self.finished or self._stop:
+                    break
+                if time.perf_counter() - published >= self.publish_interval:
+                    self._latest = self._snapshot()
+                    published = time.perf_counter()
+
+            # Publishing is one reference assignment; readers never see a half-built snapshot
+            self._latest = self._snapshot()
+            if self.finished:
+                return
+
+    # --- Render-loop side ---
+
+    def frame(self) -> Snapshot:
+        """
+        Called once per displayed frame: lets the worker run up to
+        ticks_per_frame more ticks (a tick budget that does not pile up while
+        the simulation is slower than the display) and returns the latest snapshot.
+        """
+        if self.error is not None:
+            raise self.error
+        if not self.paused and not self.finished:
+            with self._cond:
+                self._budget = max(self._budget, self.ticks_per_frame)
+                self._cond.notify_all()
+        return self._latest
+
+    def pause(self):
+        with self._cond:
+            self.paused = True
+            self._budget = 0
+
+    def resume(self):
+        self.paused = False
+
+    def toggle_pause(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def step_once(self):
+        """Pauses and advances exactly one tick."""
+        with self._cond:
+            self.paused = True
+            if not self.finished:
+                self._budget += 1
+                self._cond.notify_all()
+
+    def faster(self):
+        self.ticks_per_frame = min(self.ticks_per_frame * 2, self.MAX_TICKS_PER_FRAME)
+
+    def slower(self):
+        self.ticks_per_frame = max(self.ticks_per_frame // 2, 1)
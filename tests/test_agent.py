@@ -0,0 +1,70 @@
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+from models.agent import DEFAULT_VACCINE_TYPES, Agent, HealthState, VaccineTypes
+from models.hospital import Hospital
+from models.population import HEALTH_NAMES, INFECTED, Population
+from simulation.vectorized import create_population
+from utils.config_loader import DEFAULT_CONFIG, with_overrides
+
+
+def test_string_interface_is_derived_from_the_compact_fields():
+    ag = Agent(3, None, 40, (1, 2), "infected")
+    assert ag.name == "Agent_3" and ag.state == HealthState.INFECTED == INFECTED
+    assert ag.health == ag.healthStatus() == "infected" and str(ag.state) == "infected"
+    assert ag.has_been_infected
+
+    ag.updateHealth("immune")
+    assert ag.state is HealthState.IMMUNE
+    ag.updateHealth(HealthState.DEAD)
+    assert ag.health == "dead"
+    ag.health = 0
+    assert ag.state is HealthState.HEALTHY and not hasattr(ag, "__dict__")
+
+    ag.received_vaccine_types.add("Type 2")
+    assert ag.has_vaccine("Type 2") and not ag.has_vaccine("Type 1")
+    ag.received_vaccine_types = {"Type 1", "Type 2"}
+    assert ag.received_vaccine_types == {"Type 1", "Type 2"}
+    ag.vaccine_doses = 2
+    assert ag.get_info().startswith("Agent ID: 3, Name: Agent_3, Age: 40, Location: (1, 2), Health: healthy, Doses: 2")
+
+    named = Agent(4, "Ada", 30, (0, 0), HealthState.HEALTHY)
+    assert named.name == "Ada" and not named.has_been_infected
+    assert [str(s) for s in HealthState] == list(HEALTH_NAMES)
+
+
+def test_slotted_objects_copy_and_pickle():
+    ag = Agent(1, None, 55, (4, 4), "infectious")
+    ag.received_vaccine_types.add("Type 1")
+    ag.immunity_reason = "natural"
+    hosp = Hospital(location=(2, 3), vaccine_capacity=10, vaccine_type="Type 2", admin_speed=5, bed_capacity=4)
+    hosp.administer_vaccine(3)
+    for original in (ag, hosp):
+        for clone in (copy.deepcopy(original), pickle.loads(pickle.dumps(original))):
+            assert clone.get_info() == original.get_info()
+    with pytest.raises(AttributeError):
+        hosp.extra = 1
+
+
+def test_vaccine_types_are_a_fixed_mapping_per_population():
+    config = with_overrides(DEFAULT_CONFIG, {"hospital.vaccine_types": ["mRNA", "Vector", "Protein"]})
+    pop = create_population(20, 5, rng=np.random.default_rng(0), config=config)
+    assert pop.vaccine_types.names == ("mRNA", "Vector", "Protein")
+    view = pop.agents()[0]
+    view.received_vaccine_types.add("Protein")
+    assert pop.vaccine_mask[0] == 0b100 and view.has_vaccine("Protein") and not view.has_vaccine("mRNA")
+
+    agents = pop.to_agents()
+    assert agents[0].vaccine_types is pop.vaccine_types
+    assert agents[0].received_vaccine_types == {"Protein"}
+    assert Population.from_agents(agents).vaccine_types == pop.vaccine_types
+    # Types outside the run's mapping are an error, not a new bit
+    with pytest.raises(ValueError, match="Unknown vaccine type 'Type 1'"):
+        view.received_vaccine_types.add("Type 1")
+    assert pop.vaccine_mask[0] == 0b100
+    assert DEFAULT_VACCINE_TYPES.names == ("Type 1", "Type 2")
+    with pytest.raises(ValueError, match="At most 8"):
+        VaccineTypes([f"Type {i}" for i in range(9)])
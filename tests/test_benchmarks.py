@@ -0,0 +1,58 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+_PATH = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "run_benchmarks.py")
+_spec = importlib.util.spec_from_file_location("run_benchmarks", _PATH)
+run_benchmarks = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(run_benchmarks)
+
+TICK_PHASES = {"movement", "grid_update", "transmission", "progression", "hospitals", "grid_cleanup", "termination"}
+
+
+def test_sweep_times_every_phase(monkeypatch):
+    synced = []
+    sync_hospitals = run_benchmarks.grid.Grid.sync_hospitals
+    monkeypatch.setattr(run_benchmarks.grid.Grid, "sync_hospitals",
+                        lambda self, hospitals: synced.append(self) or sync_hospitals(self, hospitals))
+    data = run_benchmarks.run_sweep([60, 200], [8], ["agents", "numpy"], ticks=2, agent_limit=100)
+    assert [(r["backend"], r["agents"]) for r in data["results"]] == [("agents", 60), ("numpy", 60), ("numpy", 200)]
+    for result in data["results"]:
+        timings = result["timings"]
+        assert TICK_PHASES | {"create_agents", "create_hospitals", "collect_stats"} <= set(timings)
+        assert all(t >= 0 for t in timings.values())
+        assert result["tick_total"] == pytest.approx(sum(v for k, v in timings.items()
+                                                         if k not in ("create_agents", "create_hospitals",
+                                                                      "collect_stats")))
+    assert "grouping" in data["results"][0]["timings"]
+    # Like step(), every timed tick refreshes the hospitals on the grid (plus once at setup)
+    assert len(synced) == 3 * (1 + 2)
+
+
+def test_compare_flags_slower_phases(tmp_path):
+    def result(**timings):
+        return {"results": [{"backend": "numpy", "agents": 100, "grid": 40, "timings": timings}]}
+
+    baseline = result(movement=0.010, transmission=0.010, termination=1e-6)
+    current = result(movement=0.0125, transmission=0.011, termination=1e-3)
+    # Only movement is >20% slower; termination is below the noise floor in the baseline
+    assert [r["phase"] for r in run_benchmarks.compare(baseline, current)] == ["movement"]
+    assert run_benchmarks.compare(baseline, current, threshold=0.3) == []
+
+    paths = []
+    for name, data in (("baseline.json", baseline), ("current.json", current)):
+        paths.append(str(tmp_path / name))
+        with open(paths[-1], "w") as f:
+            json.dump(data, f)
+    assert run_benchmarks.main(["--compare", *paths]) == 1
+    assert run_benchmarks.main(["--compare", *paths, "--threshold", "0.5"]) == 0
+
+
+def test_main_writes_results(tmp_path):
+    output = tmp_path / "bench.json"
+    assert run_benchmarks.main(["--agents", "50", "--grids", "6", "--ticks", "1", "--output", str(output)]) == 0
+    data = json.loads(output.read_text())
+    assert data["version"] == run_benchmarks.RESULTS_VERSION
+    assert [(r["backend"], r["agents"], r["grid"]) for r in data["results"]] == [("numpy", 50, 6)]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from models.population import Population
+from simulation.simulation import Simulation, load_checkpoint
+from utils.config_loader import DEFAULT_CONFIG, with_overrides
+
+
+def _state(sim):
+    pop = sim.agents if sim.vectorized else Population.from_agents(sim.agents)
+    return pop, sim.stats.to_arrays()
+
+
+def assert_same_run(a, b):
+    pop_a, stats_a = _state(a)
+    pop_b, stats_b = _state(b)
+    for name in ("x", "y", "age", "health", "mask", "days_infected", "vaccine_doses", "vaccine_mask"):
+        np.testing.assert_array_equal(getattr(pop_a, name), getattr(pop_b, name), err_msg=name)
+    for name, value in stats_a.items():
+        np.testing.assert_array_equal(value, stats_b[name], err_msg=name)
+    assert a.collect_stats() == b.collect_stats()
+    assert a.tick == b.tick
+    assert [h.get_info() for h in a.hospitals] == [h.get_info() for h in b.hospitals]
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+@pytest.mark.parametrize("batched, crn", [(False, False), (True, False), (False, True)])
+@pytest.mark.parametrize("compress", [True, False])
+def test_restore_continues_bit_identically(tmp_path, vectorized, batched, crn, compress):
+    sim = Simulation.create(StateSpace=20, NumAgents=200, seed=5, vectorized=vectorized, batched=batched, crn=crn)
+    sim.run(15)
+    path = tmp_path / "run.npz"
+    sim.save_checkpoint(path, compress=compress)
+
+    restored = load_checkpoint(path)
+    assert restored.vectorized == sim.vectorized
+    assert_same_run(restored, sim)
+
+    sim.run(40)
+    restored.run(40)
+    assert_same_run(restored, sim)
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_restore_keeps_the_runs_vaccine_types(tmp_path, vectorized):
+    config = with_overrides(DEFAULT_CONFIG, {"hospital.vaccine_types": ["Type 2", "Booster", "Type 1"]})
+    sim = Simulation.create(StateSpace=10, NumAgents=200, seed=8, vectorized=vectorized, config=config)
+    sim.run(15)
+    path = tmp_path / "run.npz"
+    sim.save_checkpoint(path)
+
+    restored = load_checkpoint(path)
+    pop, _ = _state(restored)
+    assert pop.vaccine_types.names == ("Type 2", "Booster", "Type 1")
+    assert pop.vaccine_mask.any()
+    assert ([sorted(ag.received_vaccine_types) for ag in restored.agent_list()]
+            == [sorted(ag.received_vaccine_types) for ag in sim.agent_list()])
+    sim.run(30)
+    restored.run(30)
+    assert_same_run(restored, sim)
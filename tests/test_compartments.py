@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from models.agent import Agent
+from models.population import HEALTH_NAMES, HEALTHY, INFECTED, IMMUNE, DEAD, Population
+from simulation.compartments import CompartmentCounts, transition, transition_population
+from simulation.engine import isTerminationConditionMet
+from simulation.simulation import Simulation
+
+from test_stats import setup
+
+
+def recount(agents):
+    health = [HEALTH_NAMES.index(ag.health) for ag in agents]
+    return dict(zip(HEALTH_NAMES, np.bincount(health, minlength=len(HEALTH_NAMES)).tolist()))
+
+
+@pytest.mark.parametrize("backend", ["agents", "numpy", "numba"])
+def test_live_counts_match_recount(backend):
+    agents, stats, advance, _ = setup(backend, seed=11, num_agents=250)
+    agent_list = agents if backend == "agents" else agents.agents()
+    counts = stats.compartments
+    assert counts.as_dict() == recount(agent_list)
+    for tick in range(1, 81):
+        running = advance()
+        expected = recount(agent_list)
+        assert counts.as_dict() == expected, f"tick {tick}"
+        assert counts.is_terminal() == isTerminationConditionMet(agent_list)
+        assert running == (not counts.is_terminal())
+        if not running:
+            break
+
+
+@pytest.mark.parametrize("backend", ["agents", "numpy"])
+def test_live_counts_match_recount_with_crn(backend):
+    sim = Simulation.create(StateSpace=12, NumAgents=250, seed=11, backend=backend, crn=True)
+    counts = sim.stats.compartments
+    while not sim.finished and sim.tick < 80:
+        sim.step()
+        agent_list = sim.agents if backend == "agents" else sim.agents.agents()
+        assert counts.as_dict() == recount(agent_list), f"tick {sim.tick}"
+        assert counts.is_terminal() == isTerminationConditionMet(agent_list)
+
+
+def test_transition_keeps_counts():
+    agents = [Agent(i, f"Agent_{i}", 30, (0, 0), health) for i, health in enumerate(["healthy", "healthy", "infected"])]
+    counts = CompartmentCounts.from_agents(agents)
+    transition(agents[0], "infected", counts)
+    transition(agents[2], "immune", counts)
+    transition(agents[1], "healthy", counts)  # no change
+    assert counts.as_dict() == CompartmentCounts.from_agents(agents).as_dict()
+    assert counts["infected"] == 1 and counts[IMMUNE] == 1 and counts.living == 3
+
+
+def test_transition_population_keeps_counts():
+    health = np.array([HEALTHY, INFECTED, INFECTED, IMMUNE, DEAD, HEALTHY], dtype=np.int8)
+    n = len(health)
+    pop = Population(np.zeros(n, dtype=np.int32), np.zeros(n, dtype=np.int32), np.full(n, 30), health,
+                     np.zeros(n, dtype=bool))
+    counts = CompartmentCounts.from_population(pop)
+    # Rows already in the target state are not moved twice
+    transition_population(pop, pop.health == INFECTED, IMMUNE, counts)
+    transition_population(pop, np.array([0, 3]), DEAD, counts)
+    assert counts.as_dict() == CompartmentCounts.from_population(pop).as_dict()
+    assert counts.living == 3
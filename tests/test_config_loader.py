@@ -0,0 +1,147 @@
+import warnings
+
+import pytest
+
+from utils.config_loader import (
+    DEFAULT_CONFIG,
+    DEFAULT_CONFIG_PATH,
+    UNMODELLED,
+    ConfigError,
+    ConfigWarning,
+    config_from_dict,
+    config_to_dict,
+    load_config,
+    with_overrides,
+)
+
+
+def test_sample_yaml_matches_the_defaults(tmp_path):
+    # The sample file also keeps the original design's settings, which are ignored with a warning
+    copy = tmp_path / "simulation_config.yaml"
+    copy.write_text(open(DEFAULT_CONFIG_PATH).read())
+    with pytest.warns(ConfigWarning) as caught:
+        assert load_config(str(copy)) == DEFAULT_CONFIG
+    ignored = str(caught[0].message).split(": ", 1)[1].split(", ")
+    expected = [section if keys is None else f"{section}.{key}" for section, keys in UNMODELLED.items()
+                for key in (keys or [None])]
+    assert sorted(ignored) == sorted(expected)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ConfigWarning)
+        assert load_config() == DEFAULT_CONFIG
+        assert load_config() is load_config()  # cached while the file is unchanged
+    assert config_from_dict({}) == DEFAULT_CONFIG
+    assert config_from_dict(None) == DEFAULT_CONFIG
+
+
+def test_round_trip_and_overrides():
+    assert config_from_dict(config_to_dict(DEFAULT_CONFIG)) == DEFAULT_CONFIG
+    config = with_overrides(DEFAULT_CONFIG, {"population.num_agents": 500, "disease.dose_risk_multiplier": [1, 0.5, 0]})
+    assert config.population.num_agents == 500
+    assert config.disease.dose_risk_multiplier == (1.0, 0.5, 0.0)
+    assert config.disease.dose_multiplier.tolist() == [1.0, 0.5, 0.0]
+    assert config.grid == DEFAULT_CONFIG.grid
+    # Sections are frozen; the lookup tables are read-only
+    with pytest.raises(AttributeError):
+        config.grid.size = 3
+    with pytest.raises(ValueError):
+        config.disease.transmission_mean[0] = 1.0
+
+
+def test_transmission_bands_compile_to_the_age_lookups():
+    disease = DEFAULT_CONFIG.disease
+    assert disease.transmission_params(4) == (0.27111401, 1.5623923)
+    assert disease.transmission_params(5) == (0.27619241, 1.5853057)
+    assert disease.transmission_params(90) == (0.20907177, 1.35574058)
+    assert disease.recovery_probability(29) == 0.5 and disease.recovery_probability(70) == 0.0
+    assert disease.risk_multiplier(5) == 0.0
+
+
+@pytest.mark.parametrize("data, message", [
+    ({"spatial_grid": {"width": 10}}, "Unknown config sections"),
+    ({"population": {"num_agent": 10}}, "unknown keys"),
+    ({"disease": {"incubation": 2}}, "unknown keys"),
+    ({"grid": 40}, "expected a mapping"),
+    ({"with_overrides": {}}, "Unknown config sections"),
+])
+def test_unknown_keys_are_rejected(data, message):
+    with pytest.raises(ConfigError, match=message):
+        config_from_dict(data)
+    with pytest.raises(ConfigError, match="Bad override path"):
+        with_overrides(DEFAULT_CONFIG, {"num_agents": 10})
+
+
+def test_unmodelled_settings_are_dropped_with_a_warning():
+    with pytest.warns(ConfigWarning, match="interventions, population.total_agents"):
+        config = config_from_dict({"interventions": {"school_closure": {"enabled": True}},
+                                   "population": {"total_agents": 1000, "num_agents": 50}})
+    assert config == with_overrides(DEFAULT_CONFIG, {"population.num_agents": 50})
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", ConfigWarning)
+        with_overrides(config, {"grid.size": 10})
+
+
+@pytest.mark.parametrize("path, value", [
+    ("grid.size", "forty"),
+    ("grid.size", 40.5),
+    ("grid.size", True),
+    ("grid.size", None),
+    ("disease.death_risk_sd", "wide"),
+    ("hospital.vaccine_types", 3),
+    ("hospital.vaccine_types", "Type 1"),
+    ("hospital.vaccine_types", ["Type 1", 2]),
+    ("disease.dose_risk_multiplier", [1.0, "half", 0.0]),
+    ("simulation.random_seed", "abc"),
+    ("simulation.random_seed", 4.5),
+    ("simulation.bulk_movement", "yes"),
+    ("output.results_dir", 7),
+    ("disease.transmission_by_age", [{"max_age": "old", "mean": 0.2, "sd": 1.0}]),
+    ("disease.natural_recovery_by_age", [{"max_age": None, "prob": "high"}]),
+    ("disease.transmission_by_age", [{"max_age": None, "mean": 0.2}]),
+    ("disease.dose_risk_multiplier", [1.0, 0.5]),
+    ("disease.natural_recovery_by_age", [{"max_age": 10, "prob": 0.1}]),
+])
+def test_bad_types_are_rejected(path, value):
+    with pytest.raises(ConfigError):
+        with_overrides(DEFAULT_CONFIG, {path: value})
+
+
+@pytest.mark.parametrize("path, value", [
+    ("grid.size", 0),
+    ("population.initial_infected", 400),
+    ("hospital.treatment_success_prob", 1.5),
+    ("hospital.vaccine_types", []),
+    ("hospital.vaccine_types", [f"Type {i}" for i in range(9)]),
+    ("simulation.max_steps", -1),
+    ("simulation.workers", 0),
+    ("simulation.random_seed", -1),
+    ("population.age_sd", -1),
+    ("disease.incubation_days", 0),
+    ("disease.recovery_after_days", 5),
+    ("disease.death_after_days", 3),
+    ("disease.dose_risk_multiplier", [1.0, 1.5, 0.0]),
+    ("disease.transmission_by_age", [{"max_age": None, "mean": 0.2, "sd": 0.0}]),
+    ("disease.natural_recovery_by_age", [{"max_age": None, "prob": 2.0}]),
+    ("hospital.vaccine_capacity", -1),
+])
+def test_out_of_range_values_are_rejected(path, value):
+    with pytest.raises(ConfigError):
+        with_overrides(DEFAULT_CONFIG, {path: value})
+
+
+def test_optional_fields_accept_null_and_their_type():
+    assert with_overrides(DEFAULT_CONFIG, {"simulation.random_seed": 42}).simulation.random_seed == 42
+    assert with_overrides(DEFAULT_CONFIG, {"simulation.random_seed": 7.0}).simulation.random_seed == 7
+    assert with_overrides(DEFAULT_CONFIG, {"simulation.random_seed": None}).simulation.random_seed is None
+    with pytest.raises(ConfigError, match="simulation.random_seed: expected int"):
+        with_overrides(DEFAULT_CONFIG, {"simulation.random_seed": "abc"})
+    with pytest.raises(ConfigError, match="grid.size: expected int"):
+        with_overrides(DEFAULT_CONFIG, {"grid.size": None})
+
+
+def test_yaml_file_errors_name_the_key(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text("grid:\n  size: 12\nhospital:\n  count: lots\n")
+    with pytest.raises(ConfigError, match="hospital.count"):
+        load_config(str(path))
+    path.write_text("grid:\n  size: 12\n")
+    assert load_config(str(path)).grid.size == 12
@@ -0,0 +1,129 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from main import run_monte_carlo_analysis
+from simulation.convergence import ConvergenceMonitor, RunningStats, t_quantile
+from utils.config_loader import DEFAULT_CONFIG, with_overrides
+from utils.results_store import ResultsStore
+
+# Two-sided 95% Student-t critical values
+T_975 = {1: 12.706205, 2: 4.302653, 3: 3.182446, 4: 2.776445, 5: 2.570582, 10: 2.228139, 30: 2.042272,
+         100: 1.983972}
+# Two-sided 99% and one-sided 90% values at the exactly computed small dof
+T_SMALL = {(0.995, 1): 63.656741, (0.995, 2): 9.924843, (0.995, 3): 5.840909, (0.995, 4): 4.604095,
+           (0.9, 1): 3.077684, (0.9, 2): 1.885618, (0.9, 3): 1.637744, (0.9, 4): 1.533206}
+
+
+def rows(values, metric="Total Infected"):
+    return [{"Run ID": i + 1, metric: v} for i, v in enumerate(values)]
+
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(0).normal(50, 7, size=40)
+    stats = RunningStats()
+    for v in values:
+        stats.add(v)
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.std == pytest.approx(values.std(ddof=1))
+    assert (stats.min, stats.max) == (values.min(), values.max())
+    expected = t_quantile(0.975, 39) * values.std(ddof=1) / math.sqrt(40)
+    assert stats.half_width() == pytest.approx(expected)
+    low, high = stats.ci()
+    assert high - low == pytest.approx(2 * expected)
+    assert RunningStats().half_width() == math.inf
+
+
+@pytest.mark.parametrize("dof", sorted(T_975))
+def test_t_quantile(dof):
+    tol = 1e-6 if dof < 5 else 2e-3
+    assert t_quantile(0.975, dof) == pytest.approx(T_975[dof], abs=tol)
+    assert t_quantile(0.025, dof) == pytest.approx(-T_975[dof], abs=tol)
+
+
+@pytest.mark.parametrize("p, dof", sorted(T_SMALL))
+def test_t_quantile_small_dof(p, dof):
+    assert t_quantile(p, dof) == pytest.approx(T_SMALL[p, dof], abs=1e-6)
+    assert t_quantile(0.5, dof) == pytest.approx(0.0, abs=1e-12)
+
+
+def test_monitor_does_not_stop_on_two_close_runs():
+    # Two runs 1 apart: a normal quantile would put the half-width at ~0.98, the t one (dof 1) is 6.35
+    monitor = ConvergenceMonitor(2.0, metrics=["Total Infected"], min_runs=2)
+    assert not monitor.add({"Run ID": 1, "Total Infected": 100.0})
+    assert not monitor.add({"Run ID": 2, "Total Infected": 101.0})
+    assert monitor.stats["Total Infected"].half_width() == pytest.approx(12.706205 * math.sqrt(0.5) / math.sqrt(2))
+    # A third run close to the mean brings the dof 2 half-width (4.303 * 0.5 / sqrt(3) = 1.24) inside the target
+    assert monitor.add({"Run ID": 3, "Total Infected": 100.5})
+    assert monitor.stopped_at == 3
+
+
+def test_monitor_stops_at_the_first_run_inside_the_target():
+    values = np.random.default_rng(1).normal(100, 10, size=200)
+    target = 3.0
+    monitor = ConvergenceMonitor(target, metrics=["Total Infected"], min_runs=5)
+    for row in rows(values):
+        if monitor.add(row):
+            break
+    n = monitor.stopped_at
+    assert n is not None and n >= 5
+
+    def half_width(k):
+        return t_quantile(0.975, k - 1) * values[:k].std(ddof=1) / math.sqrt(k)
+
+    assert half_width(n) <= target
+    assert all(half_width(k) > target for k in range(5, n))
+    assert monitor.count == n
+
+
+def test_monitor_is_independent_of_arrival_order():
+    values = np.random.default_rng(2).normal(100, 10, size=120)
+    in_order = ConvergenceMonitor(0.05, relative=True, metrics=["Total Infected"])
+    for row in rows(values):
+        in_order.add(row)
+
+    shuffled = ConvergenceMonitor(0.05, relative=True, metrics=["Total Infected"])
+    order = np.random.default_rng(3).permutation(len(values))
+    for i in order:
+        shuffled.add(rows(values)[i])
+    assert shuffled.stopped_at == in_order.stopped_at is not None
+    # Rows after the stopping run are ignored
+    assert shuffled.count == in_order.count == in_order.stopped_at
+    assert shuffled.summary() == in_order.summary()
+
+
+def test_monitor_options():
+    with pytest.raises(ValueError, match="No such tracked metrics"):
+        ConvergenceMonitor({"Total Recovered": 1.0})
+    # No target never stops; a per-metric target only checks that metric
+    never = ConvergenceMonitor(None, metrics=["a", "b"])
+    some = ConvergenceMonitor({"a": 1.0}, metrics=["a", "b"], min_runs=3)
+    for i in range(30):
+        row = {"Run ID": i + 1, "a": 5.0, "b": float(i * i)}
+        never.add(row)
+        some.add(row)
+    assert not never.converged and never.count == 30
+    assert some.stopped_at == 3
+
+
+def test_sweep_stops_early_for_any_worker_count(tmp_path):
+    config = with_overrides(DEFAULT_CONFIG, {"grid.size": 15, "population.num_agents": 80,
+                                             "simulation.max_steps": 40})
+    target = {"Total Infected": 5.0}
+    stored = []
+    for workers in (1, 2):
+        out = tmp_path / f"workers{workers}"
+        run_monte_carlo_analysis(num_runs=40, output_dir=str(out), workers=workers, seed=5, config=config,
+                                 results_format="csv", target_half_width=target, min_runs=4)
+        stored.append(ResultsStore(str(out / "monte_carlo_runs"), "csv").read_runs())
+
+    monitor = ConvergenceMonitor(target, min_runs=4)
+    for row in stored[1].to_dict("records"):
+        monitor.add(row)
+    stop = monitor.stopped_at
+    assert 4 <= stop < 40
+    # The serial sweep stops right there; a pool may have finished a few more runs, which are ignored
+    assert stored[0]["Run ID"].tolist() == list(range(1, stop + 1))
+    assert stored[0].equals(stored[1][stored[1]["Run ID"] <= stop])
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.agent import Agent
+from simulation.events import COLUMNS, DEATH, EVENT_TYPES, NATURAL_RECOVERY, TREATMENT, VACCINATION, EventLog
+from simulation.simulation import Simulation
+
+
+def event_counts(frame):
+    return frame["event"].value_counts().reindex(EVENT_TYPES, fill_value=0).to_dict()
+
+
+@pytest.mark.parametrize("backend", ["agents", "numpy", "numba"])
+def test_events_account_for_the_stats(backend):
+    log = EventLog()
+    sim = Simulation.create(StateSpace=15, NumAgents=200, seed=4, backend=backend, events=log)
+    plain = Simulation.create(StateSpace=15, NumAgents=200, seed=4, backend=backend)
+    sim.run()
+    plain.run()
+    stats = sim.collect_stats()
+    assert stats == plain.collect_stats()
+
+    frame = log.to_frame()
+    assert list(frame.columns) == list(COLUMNS)
+    counts = event_counts(frame)
+    immunity = stats["immunity_breakdown"]
+    assert counts == {
+        "natural_recovery": immunity["natural"],
+        "death": stats["total_deaths"],
+        "treatment": immunity["treatment"],
+        "vaccination": sum(doses * n for doses, n in stats["vaccination_status"].items()),
+    }
+    assert frame["tick"].is_monotonic_increasing and frame["tick"].max() < sim.tick
+    # Every agent dies at most once; hospital ids only on hospital events
+    assert not frame.loc[frame["event"] == "death", "agent_id"].duplicated().any()
+    at_hospital = frame["event"].isin(["treatment", "vaccination"])
+    assert (frame.loc[at_hospital, "hospital_id"] >= 0).all()
+    assert (frame.loc[~at_hospital, "hospital_id"] == -1).all()
+
+
+def test_sinks_receive_every_row_in_batches(tmp_path):
+    path = str(tmp_path / "events.csv")
+    batches = []
+    log = EventLog(path=path, callback=batches.append, flush_every=3)
+    for tick in range(4):
+        log.record(DEATH, tick)
+        log.record_many(VACCINATION, [10 + tick, 20 + tick], hospital_id=1)
+        log.end_tick()
+    log.record(TREATMENT, 99, hospital_id=0)
+    log.close()
+    assert len(log) == 0 and log.total_events == 13
+    assert [len(b["agent_id"]) for b in batches] == [3, 3, 3, 3, 1]
+
+    written = pd.read_csv(path)
+    assert list(written.columns) == list(COLUMNS)
+    assert len(written) == 13
+    assert written["tick"].tolist() == [0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 4]
+    assert np.concatenate([b["agent_id"] for b in batches]).tolist() == written["agent_id"].tolist()
+    assert written["event"].tolist()[-1] == "treatment"
+
+
+def test_verbose_prints_each_event(capsys):
+    log = EventLog(verbose=True)
+    log.record(DEATH, 3)
+    log.record_many(VACCINATION, [4, 5], hospital_id=2)
+    out = capsys.readouterr().out.splitlines()
+    assert out == ["Tick 0: Agent 3 has died.", "Tick 0: Agent 4 vaccinated at hospital 2.",
+                   "Tick 0: Agent 5 vaccinated at hospital 2."]
+
+
+def test_verbose_lines_carry_the_agents_details(capsys):
+    agents = [Agent(i, None, 30 + i, (0, 0), "infected") for i in range(3)]
+    agents[1].days_infected = 21
+    log = EventLog(verbose=True, agents=agents)
+    log.record(DEATH, 1)
+    log.record(TREATMENT, 1, hospital_id=0)
+    log.record_many(NATURAL_RECOVERY, [2])
+    assert capsys.readouterr().out.splitlines() == [
+        "Tick 0: Agent 1 has died after being infectious for 21 days.",
+        "Tick 0: Agent 1 (Age 31) treated and recovered at hospital 0 after 21 days.",
+        "Tick 0: Agent 2 (Age 32) naturally recovered."]
+
+    sim = Simulation.create(StateSpace=15, NumAgents=100, seed=4, backend="numpy", events=EventLog(verbose=True))
+    sim.run(40)
+    assert "after being infectious for" in capsys.readouterr().out
+
+
+def test_without_a_sink_rows_are_capped():
+    log = EventLog(max_rows=5)
+    for tick in range(3):
+        log.record(DEATH, tick)
+        log.end_tick()
+    with pytest.warns(RuntimeWarning, match="dropping later events"):
+        log.record_many(VACCINATION, [10, 11, 12, 13], hospital_id=1)
+    log.record(DEATH, 99)
+    assert len(log) == 5 and log.dropped == 3
+    assert log.to_frame()["agent_id"].tolist() == [0, 1, 2, 10, 11]
+
+    printing = EventLog(verbose=True, max_rows=0)
+    printing.record(DEATH, 1)
+    assert len(printing) == 0 and printing.dropped == 1
+    unbounded = EventLog(max_rows=None)
+    unbounded.record_many(DEATH, np.arange(50))
+    assert len(unbounded) == 50 and unbounded.dropped == 0
+
+
+def test_parquet_needs_pyarrow(tmp_path):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        with pytest.raises(ImportError, match="pyarrow"):
+            EventLog(path=str(tmp_path / "events.parquet"))
+    else:
+        pytest.skip("pyarrow is installed")
@@ -0,0 +1,103 @@
+import os
+import struct
+import zlib
+
+import numpy as np
+
+import main
+from models.grid import Grid
+from simulation.simulation import Simulation
+from utils.config_loader import DEFAULT_CONFIG, with_overrides
+from visulation.colors import HOSPITAL_COLORS, SEVERITY_COLORS, WHITE
+from visulation.headless import FrameRecorder, encode_png, rasterize, record_simulation
+from visulation.snapshot import Snapshot, take_snapshot
+
+
+def decode_png(data):
+    # Reads back what encode_png writes: 8-bit RGB, one IDAT, filter type 0 on every row
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    pos, chunks = 8, {}
+    while pos < len(data):
+        (length,) = struct.unpack(">I", data[pos:pos + 4])
+        kind, body = data[pos + 4:pos + 8], data[pos + 8:pos + 8 + length]
+        (crc,) = struct.unpack(">I", data[pos + 8 + length:pos + 12 + length])
+        assert crc == zlib.crc32(kind + body)
+        chunks[kind] = body
+        pos += 12 + length
+    w, h, depth, color_type, _, _, _ = struct.unpack(">IIBBBBB", chunks[b"IHDR"])
+    assert (depth, color_type) == (8, 2) and b"IEND" in chunks
+    raw = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8).reshape(h, w * 3 + 1)
+    assert not raw[:, 0].any()
+    return raw[:, 1:].reshape(h, w, 3)
+
+
+def test_png_round_trip():
+    image = np.random.default_rng(0).integers(0, 256, size=(7, 13, 3), dtype=np.uint8)
+    np.testing.assert_array_equal(decode_png(encode_png(image)), image)
+    np.testing.assert_array_equal(decode_png(encode_png(image[:, ::2], level=0)), image[:, ::2])
+
+
+def test_rasterize_colours_each_cell():
+    hospital = np.array([0, 1, 2, 3, 0, 2], dtype=np.int8)
+    count = np.array([0, 0, 0, 0, 2, 1], dtype=np.int64)
+    color = np.array([0, 0, 0, 0, 3, 1], dtype=np.int8)
+    snapshot = Snapshot(0, 3, 2, hospital, count, color)
+    image = rasterize(snapshot, cell_size=2)
+    assert image.shape == (4, 6, 3) and image.dtype == np.uint8
+    # Agents win over the hospital under them
+    expected = [WHITE, HOSPITAL_COLORS[1], HOSPITAL_COLORS[2], HOSPITAL_COLORS[3], SEVERITY_COLORS[3],
+                SEVERITY_COLORS[1]]
+    for cell, rgb in enumerate(expected):
+        y, x = divmod(cell, 3)
+        assert (image[2 * y:2 * y + 2, 2 * x:2 * x + 2] == rgb).all(), cell
+
+
+def test_record_simulation_writes_every_kth_tick(tmp_path):
+    sim = Simulation.create(StateSpace=12, NumAgents=80, seed=3, backend="numpy", max_ticks=10)
+    assert record_simulation(sim, str(tmp_path / "frames"), every=3, cell_size=2) == 10
+    assert sorted(os.listdir(tmp_path / "frames")) == [f"frame_{t:06d}.png" for t in (0, 3, 6, 9)]
+    last = decode_png((tmp_path / "frames" / "frame_000009.png").read_bytes())
+    assert last.shape == (24, 24, 3)
+
+    # Frame 9 is the state after nine ticks of the same run
+    twin = Simulation.create(StateSpace=12, NumAgents=80, seed=3, backend="numpy", max_ticks=10)
+    twin.run(9)
+    np.testing.assert_array_equal(last, rasterize(take_snapshot(9, 12, 12, twin.agents, twin.hospitals, twin.grid), 2))
+
+
+def test_video_path_without_ffmpeg_falls_back_to_png(tmp_path, monkeypatch):
+    monkeypatch.setattr("shutil.which", lambda name: None)
+    recorder = FrameRecorder(str(tmp_path / "run.mp4"))
+    assert not recorder.video and recorder.path == str(tmp_path / "run_frames")
+    recorder.write(np.zeros((2, 2, 3), dtype=np.uint8))
+    recorder.close()
+    assert os.listdir(tmp_path / "run_frames") == ["frame_000000.png"]
+
+
+def test_grid_text_is_unchanged():
+    grid = Grid(4, 3)
+    grid.addHospital(1, 0, 0)
+    grid.addAgent(1, 0, 5)
+    grid.addAgent(3, 2, 7)
+    grid.addAgent(3, 2, 8)
+    grid.set_cell(0, 1, "X")
+    # The old loop over grid.cells
+    expected = "".join(" | ".join(",".join(map(str, cell)) if cell else "." for cell in row) + "\n"
+                       for row in grid.cells)
+    assert str(grid) == expected
+    assert str(grid).splitlines()[0] == ". | H0,A5 | . | ."
+
+
+def test_main_records_a_seeded_run(tmp_path, capsys):
+    config = with_overrides(DEFAULT_CONFIG, {"grid.size": 12, "population.num_agents": 60,
+                                             "simulation.max_steps": 8, "simulation.random_seed": 11})
+    reports, frames = [], []
+    for seed in (None, 11, 12):
+        out = tmp_path / f"frames{seed}"
+        main.main(config=config, record_path=str(out), seed=seed)
+        reports.append(capsys.readouterr().out.replace(str(out), "<out>"))
+        frames.append([(out / name).read_bytes() for name in sorted(os.listdir(out))])
+    # No seed falls back to config.simulation.random_seed: the same run, frame for frame
+    assert "Seed entropy: 11" in reports[0]
+    assert reports[0] == reports[1] and frames[0] == frames[1] and len(frames[0]) > 1
+    assert "Seed entropy: 12" in reports[2] and frames[2] != frames[1]
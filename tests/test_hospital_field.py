@@ -0,0 +1,85 @@
+import numpy as np
+
+from models.agent import Agent
+from models.grid import Grid
+from models.hospital import Hospital
+from simulation.engine import findHosp
+
+
+def make_hospitals(locations):
+    return [Hospital(location=loc, vaccine_capacity=10, vaccine_type="Type 1", admin_speed=5, bed_capacity=5)
+            for loc in locations]
+
+
+def assert_matches_find_hosp(field, hospitals, width, height):
+    active = [h for h in hospitals if h.active]
+    assert field.any_active == bool(active)
+    for y in range(height):
+        for x in range(width):
+            if not active:
+                assert field.target(x, y) is None
+                continue
+            ag = Agent(id=0, name="A", age=40, location=(x, y), health="healthy")
+            findHosp(active, ag, width)
+            assert field.next_location(x, y) == ag.location, (x, y)
+            # Same hospital as findHosp's strict "<" scan: closest, then first in the list
+            best = min(active, key=lambda h: abs(h.location[0] - x) + abs(h.location[1] - y))
+            assert field.target(x, y) is best
+    xs, ys = np.meshgrid(np.arange(width), np.arange(height))
+    nx, ny = field.next_locations(xs.ravel(), ys.ravel())
+    assert list(zip(nx.tolist(), ny.tolist())) == [field.next_location(x, y) for x, y in zip(xs.ravel(), ys.ravel())]
+
+
+def test_field_matches_find_hosp_as_hospitals_open_and_close():
+    width, height = 9, 7
+    # Two hospitals share a cell and several cells are equidistant from two of them
+    hospitals = make_hospitals([(1, 1), (7, 1), (4, 5), (4, 5), (8, 6)])
+    grid = Grid(width, height)
+    field = grid.hospital_field(hospitals)
+    assert_matches_find_hosp(field, hospitals, width, height)
+
+    for k in (2, 0, 4, 1, 3):
+        hospitals[k].deactivate()
+        assert_matches_find_hosp(field, hospitals, width, height)
+    hospitals[2].active = True
+    hospitals[0].update_occupancy(0)  # stays active: no change
+    assert_matches_find_hosp(field, hospitals, width, height)
+    assert grid.hospital_field(hospitals) is field
+
+
+def test_field_matches_find_hosp_on_random_layouts():
+    rng = np.random.default_rng(6)
+    for _ in range(5):
+        width, height = rng.integers(3, 15, size=2)
+        locations = [(int(rng.integers(width)), int(rng.integers(height))) for _ in range(rng.integers(1, 6))]
+        hospitals = make_hospitals(locations)
+        field = Grid(width, height).hospital_field(hospitals)
+        for hosp in hospitals:
+            if rng.random() < 0.4:
+                hosp.deactivate()
+        assert_matches_find_hosp(field, hospitals, width, height)
+
+
+def test_replaced_fields_stop_listening():
+    width, height = 8, 6
+    hospitals = make_hospitals([(1, 1), (6, 4), (3, 5)])
+    grid = Grid(width, height)
+    fields = []
+    for k in range(4):
+        # A different hospital list each time: the grid replaces its field
+        current = hospitals[:2] if k % 2 else hospitals
+        fields.append(grid.hospital_field(current))
+        assert all(len(h._listeners) == 1 for h in current)
+    assert len(set(map(id, fields))) == 4
+    assert len(hospitals[2]._listeners) == 0  # the last field only tracks the first two
+
+    field = fields[-1]
+    for k in (1, 0):
+        hospitals[k].deactivate()
+        assert_matches_find_hosp(field, hospitals[:2], width, height)
+    hospitals[0].active = True
+    assert_matches_find_hosp(field, hospitals[:2], width, height)
+
+    field.detach()
+    assert all(len(h._listeners) == 0 for h in hospitals)
+    hospitals[0].remove_listener(field._on_hospital_change)  # already gone: ignored
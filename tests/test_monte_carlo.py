@@ -0,0 +1,21 @@
+import numpy as np
+
+from simulation.monte_carlo import iter_monte_carlo_runs, run_single_simulation, spawn_run_seeds
+
+PARAMS = {"StateSpace": 15, "NumOfHospitals": 3, "NumAgents": 80, "SickPeople": 4, "MaxSteps": 60}
+
+
+def test_rows_do_not_depend_on_worker_count():
+    serial = list(iter_monte_carlo_runs(6, workers=1, seed=2024, params=PARAMS))
+    parallel = sorted(iter_monte_carlo_runs(6, workers=2, seed=2024, params=PARAMS), key=lambda row: row["Run ID"])
+    assert [row["Run ID"] for row in serial] == list(range(1, 7))
+    assert parallel == serial
+    # Different runs, not one run repeated
+    assert len({row["Total Infected"] for row in serial}) > 1
+
+
+def test_single_run_reproduces_its_row():
+    rows = list(iter_monte_carlo_runs(4, seed=7, params=PARAMS))
+    np.random.seed(999)  # leftover global state must not leak into a run
+    seed_seq = spawn_run_seeds(4, 7)[2]
+    assert run_single_simulation(3, seed_seq, PARAMS) == rows[2]
@@ -0,0 +1,142 @@
+import copy
+
+import numpy as np
+import pytest
+
+from models.agent import Agent
+from models.grid import Grid
+from models.parameters import AgentParameters
+from models.population import DEAD
+from simulation.engine import (create_agents, create_hospitals, process_movement, process_movement_bulk, step,
+                               update_grid_occupancy)
+from simulation.vectorized import create_population, move_population
+from utils.config_loader import DEFAULT_CONFIG, with_overrides
+
+SIZE = 20
+
+
+def mixed_state(seed, num_agents=3000):
+    rng = np.random.default_rng(seed)
+    hospitals = create_hospitals(4, SIZE, num_agents, rng=rng)
+    hospitals[1].deactivate()
+    agents = create_agents(num_agents, SIZE, NumSick=0, rng=rng)
+    for i, ag in enumerate(agents):
+        ag.health = ("healthy", "infected", "infectious", "immune", "dead")[i % 5]
+        ag.days_infected = 20 if i % 3 else 2
+    return agents, hospitals
+
+
+def offsets(before, agents, ids):
+    return np.array([(agents[i].location[0] - before[i][0], agents[i].location[1] - before[i][1]) for i in ids])
+
+
+def test_bulk_stage_matches_array_backend():
+    pop = create_population(500, SIZE, NumSick=20, rng=np.random.default_rng(1))
+    hospitals = create_hospitals(4, SIZE, 500, rng=np.random.default_rng(2))
+    agents = pop.to_agents()
+    grid = Grid(SIZE, SIZE)
+    field = grid.hospital_field(hospitals)
+    for tick in range(5):
+        process_movement_bulk(agents, hospitals, grid, SIZE, np.random.default_rng(tick))
+        move_population(pop, hospitals, SIZE, np.random.default_rng(tick), field)
+        assert [ag.location for ag in agents] == list(zip(pop.x.tolist(), pop.y.tolist()))
+
+
+class CountingAgent(Agent):
+    # Counts reads of `location`, to see where the bulk stage takes positions from
+    location_reads = 0
+
+    @property
+    def location(self):
+        CountingAgent.location_reads += 1
+        return self.__dict__["_location"]
+
+    @location.setter
+    def location(self, value):
+        self.__dict__["_location"] = value
+
+
+def test_bulk_stage_reads_positions_from_the_grid():
+    pop = create_population(500, SIZE, NumSick=20, rng=np.random.default_rng(1))
+    pop.health[::7] = DEAD
+    hospitals = create_hospitals(4, SIZE, 500, rng=np.random.default_rng(2))
+    agents = [CountingAgent(ag.id, None, ag.age, ag.location, ag.state) for ag in pop.to_agents()]
+    grid = Grid(SIZE, SIZE)
+    field = grid.hospital_field(hospitals)
+    for tick in range(5):
+        CountingAgent.location_reads = 0
+        moved = process_movement_bulk(agents, hospitals, grid, SIZE, np.random.default_rng(tick))
+        # Only the first tick, before the grid knows anyone, reads (living) agents' positions
+        assert CountingAgent.location_reads == (np.count_nonzero(pop.health != DEAD) if tick == 0 else 0)
+        update_grid_occupancy(grid, *moved)
+        move_population(pop, hospitals, SIZE, np.random.default_rng(tick), field)
+        assert [ag.location for ag in agents] == list(zip(pop.x.tolist(), pop.y.tolist()))
+
+
+def test_bulk_stage_moves_like_the_agent_loop():
+    agents, hospitals = mixed_state(seed=3)
+    params = AgentParameters.from_agents(agents)
+    hc = DEFAULT_CONFIG.hospital
+    before = [ag.location for ag in agents]
+    results = {}
+    for name, move in (("loop", process_movement), ("bulk", process_movement_bulk)):
+        moved = copy.deepcopy(agents)
+        grid = Grid(SIZE, SIZE)
+        living_ids, xs, ys, dead_ids = move(moved, hospitals, grid, SIZE, np.random.default_rng(4), params=params)
+        assert list(living_ids) == [ag.id for ag in agents if ag.health != "dead"]
+        assert list(dead_ids) == [ag.id for ag in agents if ag.health == "dead"]
+        assert list(zip(list(xs), list(ys))) == [moved[i].location for i in living_ids]
+        for ag in moved:
+            x, y = ag.location
+            assert 0 <= x < SIZE and 0 <= y < SIZE
+        step = offsets(before, moved, range(len(agents)))
+        assert (np.abs(step) <= 1).all()
+        assert not step[list(dead_ids)].any()
+        results[name] = (moved, step)
+
+    # Treatment seekers are routed deterministically: both paths put them on the same cell
+    seeking = [ag.id for ag in agents if ag.health in ("infected", "infectious") and params.treatment_eligible[ag.id]
+               and ag.days_infected > hc.treatment_after_days]
+    assert len(seeking) > 100
+    assert [results["loop"][0][i].location for i in seeking] == [results["bulk"][0][i].location for i in seeking]
+
+    # Everyone else walks: the nine offsets are equally likely on both paths (interior agents only, no clipping)
+    others = [ag.id for ag in agents if ag.health != "dead" and ag.id not in set(seeking)
+              and 0 < before[ag.id][0] < SIZE - 1 and 0 < before[ag.id][1] < SIZE - 1]
+    for name, (_, step) in results.items():
+        codes = (step[others, 0] + 1) * 3 + (step[others, 1] + 1)
+        freq = np.bincount(codes, minlength=9) / len(others)
+        # Vaccine seekers take one of the walk offsets too, so only the spread is checked
+        assert np.abs(freq - 1 / 9).max() < 0.04, (name, freq)
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_nobody_seeks_without_an_open_hospital(bulk):
+    agents, hospitals = mixed_state(seed=5, num_agents=400)
+    for hosp in hospitals:
+        hosp.deactivate()
+    move = process_movement_bulk if bulk else process_movement
+    before = [ag.location for ag in agents]
+    move(agents, hospitals, Grid(SIZE, SIZE), SIZE, np.random.default_rng(6))
+    living = [ag.id for ag in agents if ag.health != "dead"]
+    step = offsets(before, agents, living)
+    assert (np.abs(step) <= 1).all() and step.any()
+
+
+def test_step_moves_per_agent_unless_the_config_asks_for_bulk():
+    def run(config=None, **kwargs):
+        rng = np.random.default_rng(7)
+        hospitals = create_hospitals(4, SIZE, 200, rng=rng)
+        agents = create_agents(200, SIZE, NumSick=10, rng=rng)
+        grid = Grid(SIZE, SIZE)
+        for ag in agents:
+            grid.addAgent(*ag.location, ag.id)
+        for _ in range(20):
+            step(agents, hospitals, grid, SIZE, rng=rng, config=config, **kwargs)
+        return [ag.get_info() for ag in agents]
+
+    bulk_config = with_overrides(DEFAULT_CONFIG, {"simulation.bulk_movement": True})
+    assert run() == run(bulk_movement=False)
+    assert run(bulk_config) == run(bulk_movement=True)
+    assert run(bulk_config, bulk_movement=False) == run()
+    assert run() != run(bulk_config)
@@ -0,0 +1,136 @@
+from functools import partial
+
+import numpy as np
+import pytest
+
+from models.grid import Grid
+from models.occupancy import OccupancyIndex
+from simulation.engine import create_agents, create_hospitals, group_agents_by_location, step
+from simulation.jit import step_numba
+from simulation.vectorized import create_population, step_vectorized
+
+
+def assert_matches(index, cell_of):
+    # cell_of: agent id -> cell, the brute-force model of the index
+    num_cells = index.num_cells
+    expected = [[] for _ in range(num_cells)]
+    for agent_id in sorted(cell_of):
+        expected[cell_of[agent_id]].append(agent_id)
+
+    assert len(index) == len(cell_of)
+    assert index.offsets[0] == 0 and index.offsets[-1] == len(cell_of)
+    np.testing.assert_array_equal(index.counts(), [len(ids) for ids in expected])
+    np.testing.assert_array_equal(index.occupied_cells(), [c for c in range(num_cells) if expected[c]])
+    for cell in range(num_cells):
+        assert index.agents_in(cell).tolist() == expected[cell]
+    for agent_id in range(len(index.cell_of)):
+        assert index.cell_of[agent_id] == cell_of.get(agent_id, -1)
+    cells, starts, ends = index.groups()
+    assert [index.ids[a:b].tolist() for a, b in zip(starts, ends)] == [expected[c] for c in cells]
+
+
+@pytest.mark.parametrize("moves_per_round", [3, 200])  # incremental merge and full rebuild
+def test_index_agrees_with_recount(moves_per_round):
+    rng = np.random.default_rng(4)
+    num_cells, num_agents = 25, 300
+    index = OccupancyIndex(num_cells)
+    cell_of = {}
+    for agent_id in rng.permutation(num_agents):
+        cell = int(rng.integers(num_cells))
+        index.add(int(agent_id), cell)
+        cell_of[int(agent_id)] = cell
+    assert_matches(index, cell_of)
+
+    for _ in range(20):
+        ids = rng.integers(num_agents, size=moves_per_round)
+        cells = rng.integers(num_cells, size=moves_per_round)
+        index.move(ids, cells)
+        # Duplicate ids in one move: the last cell wins
+        cell_of.update(zip(ids.tolist(), cells.tolist()))
+        removed = rng.choice(num_agents, size=2, replace=False)
+        index.remove(removed)
+        for agent_id in removed.tolist():
+            cell_of.pop(agent_id, None)
+        assert_matches(index, cell_of)
+
+
+def test_updates_do_not_scan_untouched_cells(monkeypatch):
+    # A grid far larger than the population: nothing but reading `offsets` may touch every cell
+    num_cells, num_agents = 4_000_000, 2_000
+    rng = np.random.default_rng(5)
+    index = OccupancyIndex(num_cells)
+    index.move(np.arange(num_agents), rng.integers(num_cells, size=num_agents))
+
+    scanned = []
+    for name in ("cumsum", "flatnonzero", "nonzero", "bincount", "unique", "cumulative_sum"):
+        original = getattr(np, name)
+
+        def spy(a, *args, _original=original, **kwargs):
+            scanned.append(np.size(a))
+            return _original(a, *args, **kwargs)
+
+        monkeypatch.setattr(np, name, spy)
+
+    for _ in range(50):
+        ids = rng.integers(num_agents, size=10)
+        index.move(ids, rng.integers(num_cells, size=10))
+        index.remove(rng.integers(num_agents, size=1))
+        cell = int(index.cell_of[ids[0]])
+        assert ids[0] in index.agents_in(cell).tolist()
+        assert len(index.occupied_cells()) == len(np.unique(index.cell_of[index.cell_of >= 0]))
+    assert scanned and max(scanned) < num_cells
+
+    # offsets is rebuilt once, on demand
+    scanned.clear()
+    offsets = index.offsets
+    assert scanned == [num_cells] and offsets[-1] == len(index)
+    assert index.offsets is offsets and scanned == [num_cells]
+    cells, starts, _ = index.groups()
+    np.testing.assert_array_equal(offsets[cells], starts)
+
+
+def living_by_cell(agents):
+    expected = {}
+    for ag in agents:
+        if ag.health != "dead":
+            expected.setdefault(ag.location, []).append(ag.id)
+    return expected
+
+
+@pytest.mark.parametrize("backend", ["agents", "numpy", "numba"])
+def test_grid_agrees_with_agent_locations(backend):
+    size = 12
+    rng = np.random.default_rng(9)
+    hospitals = create_hospitals(4, size, 250, rng=rng)
+    map_grid = Grid(size, size)
+    if backend in ("numpy", "numba"):
+        pop = create_population(250, size, NumSick=10, rng=rng)
+        agents = pop.agents()
+        step_fn = step_vectorized if backend == "numpy" else partial(step_numba, fallback=False)
+        advance = partial(step_fn, pop, hospitals, map_grid, size, rng=rng)
+    else:
+        agents = create_agents(250, size, NumSick=10, rng=rng)
+        advance = partial(step, agents, hospitals, map_grid, size, rng=rng)
+    for ag in agents:
+        map_grid.addAgent(*ag.location, ag.id)
+
+    for _ in range(60):
+        advance()
+        expected = living_by_cell(agents)
+        for y in range(size):
+            for x in range(size):
+                assert map_grid.agents_at(x, y).tolist() == sorted(expected.get((x, y), []))
+        assert group_agents_by_location(agents, map_grid) == group_agents_by_location(agents)
+    assert any(ag.health == "dead" for ag in agents)
+
+
+def test_grid_move_and_remove():
+    grid = Grid(4, 3)
+    for agent_id, (x, y) in enumerate([(0, 0), (3, 2), (3, 2), (1, 1)]):
+        grid.addAgent(x, y, agent_id)
+    grid.move_agents(np.array([0, 2]), np.array([3, 1]), np.array([2, 1]))
+    grid.remove_agents([1])
+    assert grid.agents_at(3, 2).tolist() == [0]
+    assert grid.agents_at(1, 1).tolist() == [2, 3]
+    assert grid.agents_at(0, 0).tolist() == []
+    assert len(grid.index) == 3
@@ -0,0 +1,39 @@
+import numpy as np
+
+from models.parameters import AgentParameters
+from simulation.engine import create_agents
+from simulation.vectorized import create_population
+from utils.config_loader import DEFAULT_CONFIG, with_overrides
+
+
+def assert_matches_band_lookups(params, ages, config):
+    disease, hc = config.disease, config.hospital
+    assert len(params) == len(ages)
+    for i, age in enumerate(ages):
+        assert (params.transmission_mean[i], params.transmission_sd[i]) == disease.transmission_params(age)
+        assert params.recovery_prob[i] == disease.recovery_probability(age)
+        assert params.treatment_eligible[i] == (age >= hc.treatment_min_age)
+
+
+def test_table_matches_per_agent_band_lookups():
+    # Every age, including each band edge
+    ages = np.arange(0, 111)
+    assert_matches_band_lookups(AgentParameters(ages), ages, DEFAULT_CONFIG)
+
+    config = with_overrides(DEFAULT_CONFIG, {
+        "hospital.treatment_min_age": 45,
+        "disease.natural_recovery_by_age": [{"max_age": 17, "prob": 0.9}, {"max_age": None, "prob": 0.1}],
+    })
+    agents = create_agents(200, 10, NumSick=5, rng=np.random.default_rng(1))
+    assert_matches_band_lookups(AgentParameters.from_agents(agents, config), [ag.age for ag in agents], config)
+
+
+def test_population_caches_its_table():
+    pop = create_population(100, 10, NumSick=5, rng=np.random.default_rng(2))
+    params = pop.parameters()
+    assert pop.parameters() is params
+    assert pop.parameters(DEFAULT_CONFIG) is params
+    config = with_overrides(DEFAULT_CONFIG, {"hospital.treatment_min_age": 60})
+    rebuilt = pop.parameters(config)
+    assert rebuilt is not params
+    assert_matches_band_lookups(rebuilt, pop.age.tolist(), config)
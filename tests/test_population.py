@@ -0,0 +1,28 @@
+import copy
+import pickle
+
+from models.population import AgentView
+from simulation.simulation import Simulation
+
+
+def test_fork_and_pickle_after_agent_list():
+    sim = Simulation.create(seed=1, backend="numpy")
+    sim.agent_list()  # fills Population._views
+    sim.run(10)
+
+    forked = sim.fork()
+    restored = pickle.loads(pickle.dumps(sim))
+    sim.run()
+    forked.run()
+    restored.run()
+    assert forked.collect_stats() == sim.collect_stats()
+    assert restored.collect_stats() == sim.collect_stats()
+
+
+def test_agent_view_copies_its_row():
+    sim = Simulation.create(seed=2, backend="numpy")
+    view = sim.agent_list()[3]
+    copied = copy.deepcopy(view)
+    assert isinstance(copied, AgentView)
+    assert copied.get_info() == view.get_info()
+    assert copied._pop is not sim.agents
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from simulation.profiling import COUNTERS, PHASES, TickProfiler
+from simulation.simulation import Simulation
+
+
+@pytest.mark.parametrize("backend", ["agents", "numpy", "numba"])
+def test_profiled_run_is_unchanged_and_counts_match_stats(backend):
+    records = []
+    profiler = TickProfiler(capacity=16, callback=records.append)
+    plain = Simulation.create(StateSpace=15, NumAgents=200, seed=4, backend=backend, max_ticks=40)
+    profiled = Simulation.create(StateSpace=15, NumAgents=200, seed=4, backend=backend, max_ticks=40,
+                                 profiler=profiler)
+    plain.run()
+    profiled.run()
+    assert profiled.collect_stats() == plain.collect_stats()
+
+    assert [r["tick"] for r in records] == list(range(profiled.tick))
+    stats = profiled.collect_stats()
+    assert sum(r["new_infections"] for r in records) == stats["total_infected"] - 5
+    assert sum(r["deaths"] for r in records) == stats["total_deaths"]
+    for r in records:
+        assert r["total"] == pytest.approx(sum(r[phase] for phase in PHASES))
+        assert 0 < r["occupied_cells"] <= 15 * 15
+        assert r["hospital_seekers"] <= r["agents_moved"] <= 200
+
+    # The buffer keeps the last `capacity` ticks, oldest first
+    assert len(profiler) == 16
+    assert profiler.records() == records[-16:]
+    frame = profiler.to_frame()
+    assert list(frame.columns) == ["tick", "total", *PHASES, *COUNTERS]
+    assert frame["tick"].tolist() == [r["tick"] for r in records[-16:]]
+    summary = profiler.summary()
+    assert summary["new_infections"] == pytest.approx(np.mean([r["new_infections"] for r in records[-16:]]))
+
+
+def test_ring_buffer_before_it_wraps(tmp_path):
+    profiler = TickProfiler(capacity=8)
+    assert profiler.summary() == {} and profiler.records() == []
+    sim = Simulation.create(StateSpace=10, NumAgents=50, seed=1, backend="numpy", profiler=profiler)
+    sim.run(3)
+    assert len(profiler) == 3
+    assert [r["tick"] for r in profiler.records()] == [0, 1, 2]
+    path = tmp_path / "profile.csv"
+    profiler.to_csv(path)
+    assert len(path.read_text().splitlines()) == 4
+    # Copies of a profiled simulation start without a profiler
+    assert sim.fork().profiler is None
+
+
+def test_reset_clears_the_buffer():
+    profiler = TickProfiler(capacity=4)
+    sim = Simulation.create(StateSpace=10, NumAgents=50, seed=2, backend="numpy", profiler=profiler)
+    sim.run(6)
+    profiler.reset()
+    assert len(profiler) == 0 and profiler.records() == [] and profiler.summary() == {}
+    assert not profiler.times.any() and not profiler.counts.any() and not profiler.tick_ids.any()
+    sim.run(2)
+    # Recording restarts at tick 0 with nothing left over from before the reset
+    assert [r["tick"] for r in profiler.records()] == [0, 1]
+    assert not profiler.times[2:].any() and not profiler.counts[2:].any()
@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pytest
+
+from simulation.comparison import run_paired_comparison
+from simulation.simulation import Simulation
+from utils.config_loader import DEFAULT_CONFIG, with_overrides
+from utils.random_utils import STREAM_PURPOSES, AntitheticGenerator, RandomStreams
+
+
+def test_streams_are_deterministic_and_independent():
+    a, b = RandomStreams(42), RandomStreams(42)
+    for purpose in STREAM_PURPOSES:
+        for tick in (0, 1, 50):
+            np.testing.assert_array_equal(a.generator(purpose, tick).random(5), b.generator(purpose, tick).random(5))
+    draws = {(purpose, tick): a.generator(purpose, tick).random() for purpose in STREAM_PURPOSES for tick in range(3)}
+    assert len(set(draws.values())) == len(draws)
+    assert RandomStreams(43).generator("movement", 0).random() != draws["movement", 0]
+
+
+def test_streams_round_trip_through_json():
+    child = np.random.SeedSequence(7).spawn(3)[2]
+    streams = RandomStreams(child, antithetic=True)
+    restored = RandomStreams.from_dict(json.loads(json.dumps(streams.to_dict())))
+    assert restored.antithetic
+    np.testing.assert_array_equal(restored.generator("treatment", 9).random(4),
+                                  streams.generator("treatment", 9).random(4))
+
+
+def test_antithetic_generator_mirrors_draws():
+    mirror = AntitheticGenerator(np.random.default_rng(3))
+    rng = np.random.default_rng(3)
+    np.testing.assert_array_equal(mirror.random(4), 1.0 - rng.random(4))
+    np.testing.assert_allclose(mirror.normal(2.0, 0.5, 4), 4.0 - rng.normal(2.0, 0.5, 4))
+    np.testing.assert_array_equal(mirror.integers(3, 10, 6), 12 - rng.integers(3, 10, 6))
+    np.testing.assert_array_equal(mirror.integers(5, size=6), 4 - rng.integers(5, size=6))
+    # Pass-through methods share the wrapped Generator's state
+    assert mirror.permutation(5).tolist() == rng.permutation(5).tolist()
+
+    streams, mirrored = RandomStreams(1), RandomStreams(1, antithetic=True)
+    np.testing.assert_array_equal(mirrored.generator("transmission", 4).random(3),
+                                  1.0 - streams.generator("transmission", 4).random(3))
+
+
+@pytest.mark.parametrize("backend", ["agents", "numpy"])
+def test_crn_runs_are_reproducible(backend):
+    runs = [Simulation.create(seed=21, backend=backend, NumAgents=150, crn=True) for _ in range(2)]
+    for sim in runs:
+        sim.run(60)
+    np.testing.assert_array_equal(runs[0].stats.time_series(), runs[1].stats.time_series())
+
+
+def test_crn_population_does_not_depend_on_hospitals():
+    def population(crn, hospitals):
+        sim = Simulation.create(seed=8, backend="numpy", NumAgents=150, NumOfHospitals=hospitals, crn=crn)
+        return np.stack([sim.agents.x, sim.agents.y, sim.agents.age, sim.agents.health])
+
+    np.testing.assert_array_equal(population(True, 4), population(True, 8))
+    assert not np.array_equal(population(False, 4), population(False, 8))
+
+
+def test_identical_variants_pair_exactly():
+    variants = {"baseline": {}, "same": {}}
+    config = with_overrides(DEFAULT_CONFIG, {"grid.size": 15, "population.num_agents": 80, "simulation.max_steps": 40})
+    rows, diffs = run_paired_comparison(variants, replicates=3, seed=5, config=config, antithetic=True)
+    assert len(rows) == 3 * 2 * 2
+    assert all(d["Mean Difference"] == 0 and d["Paired CI +/-"] == 0 for d in diffs)
+
+    _, unpaired = run_paired_comparison(variants, replicates=3, seed=5, config=config, crn=False)
+    assert any(d["Mean Difference"] != 0 for d in unpaired)
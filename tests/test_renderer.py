@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+
+from models.agent import Agent, HealthState  # noqa: E402
+from models.grid import Grid  # noqa: E402
+from simulation.engine import create_agents, create_hospitals, step  # noqa: E402
+from visulation.colors import BLUE, RED, YELLOW  # noqa: E402
+from visulation.pygame_visualizer import GridRenderer, _draw_agents, _group_agents, _quit  # noqa: E402
+from visulation.snapshot import SimulationRunner  # noqa: E402
+
+SIZE, CELL = 40, 12
+# pygame.font warns when fc-list is missing and falls back to its default font
+pytestmark = pytest.mark.filterwarnings("ignore:.fc-list. is missing")
+
+
+@pytest.fixture
+def screen():
+    pygame.init()
+    yield pygame.display.set_mode((SIZE * CELL, SIZE * CELL))
+    _quit()  # also drops the cached fonts, which don't survive pygame.quit()
+
+
+def pixels(surface):
+    return pygame.image.tobytes(surface, "RGB")
+
+
+def test_incremental_frames_match_a_full_redraw(screen):
+    rng = np.random.default_rng(2)
+    hospitals = create_hospitals(3, SIZE, 120, rng=rng)
+    agents = create_agents(120, SIZE, NumSick=10, rng=rng)
+    grid = Grid(SIZE, SIZE)
+    for ag in agents:
+        grid.addAgent(*ag.location, ag.id)
+
+    renderer = GridRenderer(screen, SIZE, SIZE, CELL)
+    assert renderer.draw(agents, hospitals, 0, grid) is None  # the first frame is a full redraw
+    partial_frames = 0
+    for tick in range(1, 30):
+        step(agents, hospitals, grid, SIZE, rng=rng)
+        if tick == 10:
+            hospitals[0].deactivate()
+        rects = renderer.draw(agents, hospitals, tick, grid)
+        partial_frames += rects is not None
+
+        fresh = pygame.Surface(screen.get_size()).convert(screen)
+        GridRenderer(fresh, SIZE, SIZE, CELL).draw(agents, hospitals, tick, grid)
+        assert pixels(screen) == pixels(fresh), f"tick {tick}"
+    assert partial_frames > 0
+
+    # A snapshot of the same state draws the same picture
+    snapshot = SimulationRunner(lambda: True, grid, agents, hospitals, tick=29).latest
+    from_snapshot = pygame.Surface(screen.get_size()).convert(screen)
+    GridRenderer(from_snapshot, SIZE, SIZE, CELL).draw_snapshot(snapshot)
+    assert pixels(from_snapshot) == pixels(screen)
+
+
+def test_agents_without_a_grid_skip_the_dead_and_take_the_worst_color(screen):
+    agents = [Agent(i, None, 40, loc, state) for i, (loc, state) in enumerate([
+        ((1, 1), HealthState.DEAD), ((2, 2), HealthState.DEAD), ((2, 2), HealthState.IMMUNE),
+        ((3, 3), HealthState.INFECTED), ((3, 3), HealthState.INFECTIOUS)])]
+    groups = _group_agents(agents)
+    assert {loc: [ag.id for ag in group] for loc, group in groups.items()} == {(2, 2): [2], (3, 3): [3, 4]}
+
+    screen.fill((0, 0, 0))
+    _draw_agents(screen, agents, CELL)
+
+    def colors_in(x, y):
+        return {tuple(screen.get_at((px, py)))[:3] for px in range(x * CELL, (x + 1) * CELL)
+                for py in range(y * CELL, (y + 1) * CELL)}
+
+    assert colors_in(1, 1) == {(0, 0, 0)}
+    assert BLUE in colors_in(2, 2)
+    # Infectious beats infected in a shared cell
+    assert RED in colors_in(3, 3) and YELLOW not in colors_in(3, 3)
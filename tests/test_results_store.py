@@ -0,0 +1,59 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from main import run_monte_carlo_analysis
+from utils.config_loader import DEFAULT_CONFIG, with_overrides
+from utils.results_store import ResultsStore
+
+CONFIG = with_overrides(DEFAULT_CONFIG, {"grid.size": 15, "population.num_agents": 80, "simulation.max_steps": 40})
+SEED = 123
+
+
+def sweep(output_dir, num_runs=6, resume=False, seed=SEED):
+    run_monte_carlo_analysis(num_runs=num_runs, output_dir=str(output_dir), workers=1, seed=seed, config=CONFIG,
+                             resume=resume, save_series=True, results_format="csv")
+    return ResultsStore(os.path.join(str(output_dir), "monte_carlo_runs"), "csv")
+
+
+def assert_same_sweep(a, b):
+    assert a.completed_run_ids() == b.completed_run_ids()
+    pd.testing.assert_frame_equal(a.read_runs(), b.read_runs())
+    pd.testing.assert_frame_equal(a.read_series(), b.read_series())
+
+
+@pytest.fixture(scope="module")
+def fresh(tmp_path_factory):
+    return sweep(tmp_path_factory.mktemp("fresh"))
+
+
+def test_resume_after_lost_partitions(fresh, tmp_path):
+    store = sweep(tmp_path)
+    assert_same_sweep(store, fresh)
+
+    # A crash loses whole partitions (and may leave a half-written temp file)
+    for run_id in (2, 5):
+        shutil.rmtree(os.path.dirname(store._part("runs", run_id)))
+    series = store._part("series", 3)
+    os.replace(series, series + ".tmp")
+    shutil.rmtree(os.path.dirname(store._part("runs", 3)))
+    assert store.completed_run_ids() == {1, 4, 6}
+
+    sweep(tmp_path, resume=True)
+    assert_same_sweep(store, fresh)
+
+
+def test_resume_extends_a_shorter_sweep(fresh, tmp_path):
+    store = sweep(tmp_path, num_runs=4)
+    assert store.completed_run_ids() == {1, 2, 3, 4}
+    sweep(tmp_path, num_runs=6, resume=True)
+    assert_same_sweep(store, fresh)
+    assert store.read_meta()["num_runs"] == 6
+
+
+def test_resume_rejects_another_seed(tmp_path):
+    sweep(tmp_path, num_runs=2)
+    with pytest.raises(ValueError, match="seed entropy"):
+        sweep(tmp_path, num_runs=2, resume=True, seed=SEED + 1)
@@ -0,0 +1,51 @@
+import pytest
+
+from simulation.scenarios import apply_overrides, run_scenario_tree
+from simulation.simulation import Simulation
+
+PARAMS = {"StateSpace": 15, "NumOfHospitals": 3, "NumAgents": 100, "SickPeople": 5, "MaxSteps": 80}
+BRANCHES = [
+    {"name": "baseline"},
+    {"name": "same again"},
+    {"name": "no hospitals", "deactivate": [0, 1, 2]},
+]
+
+
+def without_name(row):
+    return {k: v for k, v in row.items() if k != "Scenario"}
+
+
+def test_branches_share_the_prefix_and_its_stream():
+    rows = run_scenario_tree(BRANCHES, branch_tick=20, replicates=2, seed=3, params=PARAMS)
+    assert [(row["Run ID"], row["Scenario"]) for row in rows] == [
+        (r, b["name"]) for r in (1, 2) for b in BRANCHES]
+    for replicate in (0, 3):
+        baseline, same, closed = rows[replicate:replicate + 3]
+        assert without_name(same) == without_name(baseline)
+        assert closed["Immune (Treatment)"] <= baseline["Immune (Treatment)"]
+    assert without_name(rows[0]) != without_name(rows[3])
+
+
+def test_worker_count_does_not_change_rows():
+    serial = run_scenario_tree(BRANCHES, branch_tick=20, replicates=2, seed=3, params=PARAMS)
+    assert run_scenario_tree(BRANCHES, branch_tick=20, replicates=2, seed=3, params=PARAMS, workers=2) == serial
+
+
+def test_fork_is_independent():
+    sim = Simulation.create(StateSpace=15, NumAgents=100, seed=4)
+    sim.run(10)
+    forked = sim.fork()
+    forked.hospitals[0].deactivate()
+    forked.run(30)
+    assert sim.hospitals[0].active and sim.tick == 10
+    sim.run(30)
+    assert sim.fork().collect_stats() == sim.collect_stats()
+
+
+def test_unsupported_overrides_are_rejected():
+    with pytest.raises(ValueError, match="no 'mask' override"):
+        run_scenario_tree([{"name": "baseline"}, {"name": "masks", "mask": 0.5}], branch_tick=5, params=PARAMS)
+    sim = Simulation.create(StateSpace=15, NumAgents=100, seed=4)
+    with pytest.raises(ValueError, match="unknown overrides \\['close'\\]"):
+        apply_overrides(sim, {"name": "typo", "close": [0]})
+    assert all(hosp.active for hosp in sim.hospitals)
@@ -0,0 +1,124 @@
+import time
+
+import numpy as np
+import pytest
+
+from models.grid import Grid
+from simulation.engine import create_agents, create_hospitals, step
+from simulation.simulation import Simulation
+from visulation.snapshot import HOSPITAL_INACTIVE, SimulationRunner, cell_state, hospital_code
+
+SIZE = 10
+COLOR = {"healthy": 0, "immune": 1, "infected": 2, "infectious": 3}
+
+
+def recount(agents, hospitals, width):
+    # Per-agent reference for cell_state()
+    hospital = np.zeros(width * SIZE, dtype=np.int8)
+    count = np.zeros(width * SIZE, dtype=np.int64)
+    color = np.zeros(width * SIZE, dtype=np.int8)
+    for hosp in hospitals:
+        hospital[hosp.location[1] * width + hosp.location[0]] = hospital_code(hosp)
+    for ag in agents:
+        if ag.health == "dead":
+            continue
+        cell = ag.location[1] * width + ag.location[0]
+        count[cell] += 1
+        color[cell] = max(color[cell], COLOR[ag.health])
+    return hospital, count, color
+
+
+def assert_state_equal(state, expected):
+    for got, want in zip(state, expected):
+        np.testing.assert_array_equal(got, want)
+
+
+def test_cell_state_matches_a_per_agent_recount():
+    rng = np.random.default_rng(3)
+    hospitals = create_hospitals(3, SIZE, 100, rng=rng)
+    agents = create_agents(100, SIZE, NumSick=10, rng=rng)
+    grid = Grid(SIZE, SIZE)
+    for ag in agents:
+        grid.addAgent(*ag.location, ag.id)
+    for tick in range(25):
+        step(agents, hospitals, grid, SIZE, rng=rng)
+        if tick == 5:
+            hospitals[1].deactivate()
+        expected = recount(agents, hospitals, SIZE)
+        assert_state_equal(cell_state(SIZE, SIZE, agents, hospitals, grid), expected)
+        assert_state_equal(cell_state(SIZE, SIZE, agents, hospitals), expected)
+    assert (expected[0] == HOSPITAL_INACTIVE).any()
+
+
+def test_cell_state_of_a_population():
+    sim = Simulation.create(StateSpace=SIZE, NumAgents=120, seed=2, backend="numpy")
+    for _ in range(25):
+        sim.step()
+        expected = recount(sim.agents.agents(), sim.hospitals, SIZE)
+        assert_state_equal(cell_state(SIZE, SIZE, sim.agents, sim.hospitals, sim.grid), expected)
+        assert_state_equal(cell_state(SIZE, SIZE, sim.agents, sim.hospitals), expected)
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_runner_pause_step_once_and_finish():
+    sim = Simulation.create(StateSpace=SIZE, NumAgents=80, seed=4, backend="numpy", max_ticks=1000)
+    runner = SimulationRunner.for_simulation(sim, ticks_per_frame=3)
+    runner.max_ticks = 20
+    first = runner.latest
+    assert first.tick == 0 and not first.count.flags.writeable
+    with runner:
+        runner.frame()
+        wait_for(lambda: runner.latest.tick >= 3)
+
+        runner.pause()
+        wait_for(lambda: runner.latest.tick == runner.tick)
+        paused_at = runner.tick
+        for _ in range(5):
+            runner.frame()
+        time.sleep(0.05)
+        assert runner.tick == paused_at and runner.latest.tick == paused_at
+
+        runner.step_once()
+        wait_for(lambda: runner.latest.tick == paused_at + 1)
+        assert runner.paused and sim.tick == paused_at + 1
+
+        runner.resume()
+        runner.faster()
+        assert runner.ticks_per_frame == 6
+        wait_for(lambda: runner.frame().finished)
+    snapshot = runner.latest
+    assert snapshot.tick == runner.tick == sim.tick == 20
+    assert runner.finished and not runner.ended_early
+    assert_state_equal(snapshot.state(), recount(sim.agents.agents(), sim.hospitals, SIZE))
+    # The first snapshot was not touched by the run
+    assert first.tick == 0 and first.count.sum() == 80
+
+
+def test_runner_reports_an_early_end_and_errors():
+    calls = []
+
+    def ends_at_three():
+        calls.append(1)
+        return len(calls) < 3
+
+    grid = Grid(SIZE, SIZE)
+    runner = SimulationRunner(ends_at_three, grid, [], [], ticks_per_frame=10)
+    with runner:
+        wait_for(lambda: runner.frame().finished)
+    assert runner.ended_early and runner.tick == 3 and len(calls) == 3
+
+    def fails():
+        raise RuntimeError("boom")
+
+    runner = SimulationRunner(fails, grid, [], [])
+    with runner:
+        runner.frame()
+        wait_for(lambda: runner.finished)
+        with pytest.raises(RuntimeError, match="boom"):
+            runner.frame()
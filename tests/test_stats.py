@@ -0,0 +1,80 @@
+from functools import partial
+
+import numpy as np
+import pytest
+
+import models.grid as grid
+from models.population import HEALTH_NAMES
+from simulation.engine import collect_stats, create_agents, create_hospitals, step
+from simulation.jit import step_numba
+from simulation.stats import SERIES_COLUMNS, StatsAccumulator
+from simulation.vectorized import collect_stats_vectorized, create_population, step_vectorized
+
+SIZE = 12
+
+
+def setup(backend, seed, num_agents=200):
+    rng = np.random.default_rng(seed)
+    hospitals = create_hospitals(4, SIZE, num_agents, rng=rng)
+    map_grid = grid.Grid(SIZE, SIZE)
+    if backend in ("numpy", "numba"):
+        agents = create_population(num_agents, SIZE, NumSick=10, rng=rng)
+        stats = StatsAccumulator.from_population(agents, hospitals)
+        # "numba" runs the kernels, compiled or (without numba) as plain Python
+        step_fn = step_vectorized if backend == "numpy" else partial(step_numba, fallback=False)
+
+        def advance():
+            return step_fn(agents, hospitals, map_grid, SIZE, rng=rng, stats=stats)
+
+        def recount():
+            return collect_stats_vectorized(agents, hospitals)
+    else:
+        agents = create_agents(num_agents, SIZE, NumSick=10, rng=rng)
+        stats = StatsAccumulator.from_agents(agents, hospitals)
+        for ag in agents:
+            map_grid.addAgent(*ag.location, ag.id)
+
+        def advance():
+            return step(agents, hospitals, map_grid, SIZE, rng=rng, stats=stats)
+
+        def recount():
+            return collect_stats(agents, hospitals)
+    return agents, stats, advance, recount
+
+
+@pytest.mark.parametrize("backend", ["agents", "numpy", "numba"])
+def test_snapshot_equals_collect_stats(backend):
+    agents, stats, advance, recount = setup(backend, seed=13)
+    assert stats.snapshot() == recount()
+    for tick in range(1, 121):
+        running = advance()
+        assert stats.tick == tick
+        assert stats.snapshot() == recount(), f"tick {tick}"
+        if not running:
+            break
+    final = stats.snapshot()
+    assert final["total_deaths"] > 0 and final["hospital_stats"]["stockouts"] >= 0
+    assert final["immunity_breakdown"]["total"] > 0
+
+
+@pytest.mark.parametrize("backend", ["agents", "numpy", "numba"])
+def test_time_series_tracks_compartments(backend):
+    agents, stats, advance, recount = setup(backend, seed=14)
+    col = {name: i for i, name in enumerate(SERIES_COLUMNS)}
+    compartments = ("susceptible", "exposed", "infectious", "recovered", "dead")
+    for _ in range(80):
+        before = recount()
+        running = advance()
+        after = recount()
+        row = stats.time_series()[-1]
+        health = np.array([HEALTH_NAMES.index(ag.health) for ag in (agents if backend == "agents" else agents.agents())])
+        assert [row[col[name]] for name in compartments] == np.bincount(health, minlength=5).tolist()
+        assert row[col["fully_vaccinated"]] == after["vaccination_status"][2]
+        assert row[col["new_infections"]] == after["total_infected"] - before["total_infected"]
+        assert row[col["new_deaths"]] == after["total_deaths"] - before["total_deaths"]
+        assert row[col["vaccine_stockouts"]] == (after["hospital_stats"]["stockouts"]
+                                                 - before["hospital_stats"]["stockouts"])
+        if not running:
+            break
+    assert len(stats.time_series()) == stats.tick + 1
+    assert stats.time_series()[:, col["tick"]].tolist() == list(range(stats.tick + 1))
@@ -0,0 +1,53 @@
+import numpy as np
+
+from models.population import DEAD, HEALTHY, IMMUNE, INFECTED, INFECTIOUS
+from simulation.vectorized import transmission_kernel
+from utils.config_loader import DEFAULT_CONFIG
+
+
+class RecordingDraws:
+    # Hands out `value` for every uniform and remembers how many were asked for
+    def __init__(self, value):
+        self.value = value
+        self.sizes = []
+
+    def random(self, size=None):
+        self.sizes.append(size)
+        return np.full(size, self.value)
+
+
+def test_only_healthy_agents_sharing_a_sick_cell_are_exposed():
+    # cell:     0        0       1        1      2        2     3     3
+    health = [HEALTHY, INFECTED, HEALTHY, IMMUNE, HEALTHY, DEAD, INFECTIOUS, HEALTHY]
+    cells = np.array([0, 0, 1, 1, 2, 2, 3, 3])
+    health = np.array(health, dtype=np.int8)
+    doses = np.array([0, 0, 0, 0, 0, 0, 0, 2], dtype=np.int8)
+    infection_prob = np.full(len(health), 0.5)
+
+    draws = RecordingDraws(0.0)
+    infected = transmission_kernel(cells, health, doses, infection_prob, DEFAULT_CONFIG.disease.dose_multiplier, 4,
+                                   draws)
+    # Agent 7 is exposed but fully vaccinated (multiplier 0)
+    assert draws.sizes == [2]
+    assert infected.tolist() == [0]
+
+    draws = RecordingDraws(0.99)
+    assert transmission_kernel(cells, health, doses, infection_prob, DEFAULT_CONFIG.disease.dose_multiplier, 4,
+                               draws).tolist() == []
+
+
+def test_infection_rate_matches_the_two_draw_model():
+    # The old model drew Normal(mean, sd) > 0 then uniform < multiplier; the kernel's single draw has the same chance
+    disease = DEFAULT_CONFIG.disease
+    rng = np.random.default_rng(3)
+    n = 200_000
+    mean, sd = disease.transmission_mean[0], disease.transmission_sd[0]
+    multiplier = disease.dose_multiplier[1]
+    old_rate = ((rng.normal(mean, sd, n) > 0) & (rng.random(n) < multiplier)).mean()
+
+    health = np.full(n + 1, HEALTHY, dtype=np.int8)
+    health[-1] = INFECTED
+    doses = np.ones(n + 1, dtype=np.int8)
+    infected = transmission_kernel(np.zeros(n + 1, dtype=np.int64), health, doses,
+                                   np.full(n + 1, disease.transmission_prob[0]), disease.dose_multiplier, 1, rng)
+    assert abs(len(infected) / n - old_rate) < 0.01
@@ -0,0 +1,129 @@
+import copy
+
+import numpy as np
+import pytest
+
+import models.grid as grid
+from models.population import DEAD, HEALTHY, IMMUNE, INFECTED, INFECTIOUS, POPCOUNT, Population
+from simulation.engine import collect_stats, create_agents, create_hospitals, step
+from simulation.vectorized import collect_stats_vectorized, create_population, step_vectorized, treat_and_vaccinate
+
+SIZE = 12
+
+
+def run_agent_engine(seed, ticks, num_agents=150):
+    rng = np.random.default_rng(seed)
+    hospitals = create_hospitals(4, SIZE, num_agents, rng=rng)
+    agents = create_agents(num_agents, SIZE, NumSick=8, rng=rng)
+    map_grid = grid.Grid(SIZE, SIZE)
+    for _ in range(ticks):
+        if not step(agents, hospitals, map_grid, SIZE, rng=rng):
+            break
+    return agents, hospitals
+
+
+def test_collect_stats_matches_agent_engine():
+    # Same state read through both backends: every count, bucket and hospital total agrees
+    agents, hospitals = run_agent_engine(seed=3, ticks=40)
+    pop = Population.from_agents(agents)
+    expected = collect_stats(agents, hospitals)
+    assert expected["total_deaths"] > 0 and expected["hospital_stats"]["requests"] > 0
+    assert collect_stats_vectorized(pop, hospitals) == expected
+    assert collect_stats(pop.to_agents(), hospitals) == expected
+    assert collect_stats(pop.agents(), hospitals) == expected
+
+
+def reference_hospital_phase(agents, hospitals, rng):
+    # The per-agent hospital loop of engine.step()
+    for hosp in hospitals:
+        patients_here = [ag for ag in agents if ag.location == hosp.location and ag.health != "dead"]
+        hosp.update_occupancy(len(patients_here))
+        if hosp.active:
+            for ag in patients_here:
+                if ag.health in ["infected", "infectious"] and ag.age >= 30 and ag.days_infected > 14:
+                    if hosp.treat_patient(rng):
+                        ag.updateHealth("immune")
+                        ag.immunity_reason = "treatment"
+                elif ag.health == "healthy" and ag.vaccine_doses < 2 and hosp.vaccine_type not in ag.received_vaccine_types:
+                    if hosp.administer_vaccine(1):
+                        ag.received_vaccine_types.add(hosp.vaccine_type)
+                        ag.vaccine_doses = len(ag.received_vaccine_types)
+                        if ag.vaccine_doses >= 2:
+                            ag.updateHealth("immune")
+                            ag.immunity_reason = "vaccine"
+
+
+def crowded_hospital_state(seed):
+    # Small grid, most agents on a hospital cell, queues longer than the vaccine stock
+    rng = np.random.default_rng(seed)
+    hospitals = create_hospitals(3, 3, 40, rng=rng)
+    hospitals[0].vaccine_capacity = 2
+    # Two hospitals stay open, the third overflows its beds and closes
+    hospitals[0].bed_capacity = hospitals[1].bed_capacity = 100
+    hospitals[2].bed_capacity = 2
+    agents = create_agents(40, 3, NumSick=0, rng=rng)
+    for i, ag in enumerate(agents):
+        ag.location = hospitals[i % 3].location if i % 4 else (1, 1)
+        ag.health = ("healthy", "healthy", "infected", "infectious", "immune", "dead")[i % 6]
+        ag.days_infected = 20 if i % 5 else 3
+        if i % 7 == 0:
+            ag.received_vaccine_types.add("Type 2")
+            ag.vaccine_doses = 1
+    return agents, hospitals
+
+
+class FixedDraws:
+    # Every uniform draw is `value`: treatment outcomes then don't depend on how many numbers a path draws
+    def __init__(self, value):
+        self.value = value
+
+    def random(self, size=None):
+        return self.value if size is None else np.full(size, self.value)
+
+
+@pytest.mark.parametrize("treatment_roll", [0.0, 0.9])  # every treatment succeeds / fails
+def test_hospital_phase_matches_agent_loop(treatment_roll):
+    agents, hospitals = crowded_hospital_state(seed=5)
+    pop = Population.from_agents(agents)
+    pop_hospitals = copy.deepcopy(hospitals)
+
+    reference_hospital_phase(agents, hospitals, FixedDraws(treatment_roll))
+    treat_and_vaccinate(pop, pop_hospitals, FixedDraws(treatment_roll), StateSpace=3)
+
+    for hosp, twin in zip(hospitals, pop_hospitals):
+        assert (twin.vaccine_requests, twin.vaccine_stockouts, twin.vaccine_capacity, twin.current_patients,
+                twin.active) == (hosp.vaccine_requests, hosp.vaccine_stockouts, hosp.vaccine_capacity,
+                                 hosp.current_patients, hosp.active)
+    assert hospitals[0].vaccine_stockouts > 0 and not hospitals[2].active
+    assert collect_stats_vectorized(pop, pop_hospitals) == collect_stats(agents, hospitals)
+
+
+def test_step_vectorized_invariants():
+    rng = np.random.default_rng(8)
+    pop = create_population(300, SIZE, NumSick=10, rng=rng)
+    hospitals = create_hospitals(4, SIZE, 300, rng=rng)
+    map_grid = grid.Grid(SIZE, SIZE)
+    for _ in range(60):
+        before = {name: getattr(pop, name).copy() for name in ("x", "y", "health", "days_infected", "has_been_infected")}
+        vax_requests = sum(h.vaccine_requests for h in hospitals)
+        running = step_vectorized(pop, hospitals, map_grid, SIZE, rng=rng)
+
+        assert ((0 <= pop.x) & (pop.x < SIZE) & (0 <= pop.y) & (pop.y < SIZE)).all()
+        assert np.isin(pop.health, [HEALTHY, INFECTED, INFECTIOUS, IMMUNE, DEAD]).all()
+        was_dead = before["health"] == DEAD
+        assert (pop.health[was_dead] == DEAD).all()
+        assert (pop.x[was_dead] == before["x"][was_dead]).all() and (pop.y[was_dead] == before["y"][was_dead]).all()
+        # At most one step per tick
+        assert (np.abs(pop.x - before["x"]) <= 1).all() and (np.abs(pop.y - before["y"]) <= 1).all()
+        assert (pop.has_been_infected >= before["has_been_infected"]).all()
+        assert pop.has_been_infected[(pop.health == INFECTED) | (pop.health == INFECTIOUS)].all()
+        assert (pop.vaccine_doses == POPCOUNT[pop.vaccine_mask]).all()
+        assert (pop.immunity_reason[pop.health == IMMUNE] > 0).all()
+        assert sum(h.vaccine_requests for h in hospitals) >= vax_requests
+
+        stats = collect_stats_vectorized(pop, hospitals)
+        assert stats == collect_stats(pop.agents(), hospitals)
+        assert sum(stats["vaccination_status"].values()) == len(pop)
+        if not running:
+            break
+